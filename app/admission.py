@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from . import config, image_pipeline, sbox_cache, timing
+
+# Lane antrian: request interaktif (murah) didahulukan dan boleh memakai cadangan budget
+INTERACTIVE = 0
+BULK = 1
+
+# Estimasi biaya (detik CPU), diukur dari pipeline pada satu core
+COST_PER_PIXEL = 4e-7            # enkripsi/dekripsi gambar: decode + AES + encode PNG
+COST_PER_UPLOAD_BYTE = 4e-7      # gambar yang dimensinya belum diketahui (batch ZIP): ~1 piksel/byte
+COST_PER_DATA_BYTE = 6e-8        # AES mentah (/data, batch teks)
+SBOX_METRICS_COST = {"summary": 0.02, "full": 0.03}
+SBOX_CACHED_COST = 0.001         # S-Box bawaan / sudah ada di shared memory
+COST_PER_OPTIMIZER_STEP = 2e-4   # satu swap + update inkremental + skor objective
+MIN_COST = 0.001
+
+# Request dengan estimasi di bawah ini masuk lane interaktif
+INTERACTIVE_MAX_COST = 0.1
+
+
+class AdmissionRejected(Exception):
+    """Antrian penuh atau waktu tunggu habis; dipetakan ke HTTP 503 + Retry-After."""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def lane_for(cost: float) -> int:
+    return INTERACTIVE if cost < INTERACTIVE_MAX_COST else BULK
+
+
+def image_cost(contents) -> float:
+    """Biaya dari jumlah piksel di header gambar; fallback ukuran upload bila header tak terbaca."""
+    pixels = image_pipeline.image_pixels(contents)
+    if pixels is None:
+        return len(contents) * COST_PER_UPLOAD_BYTE
+    return pixels * COST_PER_PIXEL
+
+
+def data_cost(nbytes: int) -> float:
+    return nbytes * COST_PER_DATA_BYTE
+
+
+def sbox_metrics_cost(sbox, detail: str = "summary") -> float:
+    if sbox_cache.builtin_name(sbox) is not None:
+        return SBOX_CACHED_COST
+    return SBOX_METRICS_COST.get(detail, SBOX_METRICS_COST["full"])
+
+
+def optimizer_cost(chains: int, steps: int) -> float:
+    return chains * steps * COST_PER_OPTIMIZER_STEP
+
+
+class AdmissionController:
+    """
+    Admission control berbasis estimasi biaya CPU. Request berat masuk bila total biaya
+    yang sedang berjalan masih di bawah budget; selebihnya antri (lane interaktif dulu,
+    lalu FIFO) sampai max_queue, dan sisanya ditolak. Lane interaktif boleh memakai
+    cadangan budget tambahan agar request murah tidak terjebak di belakang gambar besar.
+    Request yang biayanya melebihi budget tetap diterima bila tidak ada yang berjalan.
+    """
+
+    def __init__(self, budget: float, max_queue: int, max_wait: float, reserve: float, drain_rate: float):
+        self.budget = budget
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.drain_rate = max(1.0, drain_rate)
+        self.in_flight = 0.0
+        self.running = 0
+        self._queue: List[tuple] = []  # heap (lane, seq, cost, future)
+        self._seq = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def _fits(self, cost: float, lane: int) -> bool:
+        if self.running == 0:
+            return True
+        limit = self.budget + (self.reserve if lane == INTERACTIVE else 0.0)
+        return self.in_flight + cost <= limit
+
+    def _admit(self, cost: float) -> None:
+        self.in_flight += cost
+        self.running += 1
+
+    def _queued(self) -> int:
+        return sum(1 for entry in self._queue if not entry[3].done())
+
+    def retry_after(self) -> int:
+        """Perkiraan detik sampai antrian terkuras (total biaya / jumlah core)."""
+        pending = self.in_flight + sum(entry[2] for entry in self._queue if not entry[3].done())
+        return min(60, max(1, math.ceil(pending / self.drain_rate)))
+
+    async def acquire(self, cost: float, lane: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        cost = max(MIN_COST, cost)
+        lane = lane_for(cost) if lane is None else lane
+        endpoint = timing.current_endpoint()
+        ahead = [entry for entry in self._queue if entry[0] <= lane]
+        if not ahead and self._fits(cost, lane):
+            self._admit(cost)
+            timing.registry.count_admission(endpoint, "admitted")
+            return
+        if self._queued() >= self.max_queue:
+            timing.registry.count_admission(endpoint, "rejected")
+            raise AdmissionRejected("Server sibuk: antrian request penuh, coba lagi nanti", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (lane, next(self._seq), cost, future)
+        heapq.heappush(self._queue, entry)
+        timing.registry.count_admission(endpoint, "queued")
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # Sudah di-admit tepat saat timeout/cancel: kembalikan slotnya
+                self.release(cost)
+            else:
+                future.cancel()
+                self._remove(entry)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            timing.registry.count_admission(endpoint, "rejected")
+            raise AdmissionRejected("Server sibuk: waktu tunggu antrian habis, coba lagi nanti", self.retry_after())
+
+    def _remove(self, entry: tuple) -> None:
+        try:
+            self._queue.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._queue)
+        self._wake()
+
+    def release(self, cost: float) -> None:
+        if not self.enabled:
+            return
+        self.in_flight = max(0.0, self.in_flight - max(MIN_COST, cost))
+        self.running = max(0, self.running - 1)
+        if self.running == 0:
+            self.in_flight = 0.0
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._queue:
+            lane, _, cost, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._fits(cost, lane):
+                break
+            heapq.heappop(self._queue)
+            self._admit(cost)
+            future.set_result(None)
+
+    def releaser(self, cost: float) -> Callable[[], None]:
+        """release(cost) yang aman dipanggil lebih dari sekali (dari beberapa jalur cleanup)."""
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.release(cost)
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self, cost: float, lane: Optional[int] = None) -> AsyncIterator[None]:
+        """Tahan slot selama blok berjalan; AdmissionRejected bila tidak bisa masuk."""
+        await self.acquire(cost, lane)
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budget_seconds": self.budget,
+            "in_flight_seconds": round(self.in_flight, 4),
+            "running": self.running,
+            "queued": self._queued(),
+            "max_queue": self.max_queue,
+        }
+
+
+controller = AdmissionController(
+    budget=config.ADMISSION_BUDGET_MS / 1000.0,
+    max_queue=config.ADMISSION_MAX_QUEUE,
+    max_wait=config.ADMISSION_MAX_WAIT_MS / 1000.0,
+    reserve=config.ADMISSION_INTERACTIVE_RESERVE_MS / 1000.0,
+    drain_rate=os.cpu_count() or 1,
+)
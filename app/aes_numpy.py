@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from . import gf256
+from .aes_core import NR, build_inv_sbox, key_expansion, pkcs7_pad, pkcs7_unpad
+
+# Byte di dalam blok disusun kolom-mayor: index = row + 4 * col (sama dengan bytes_to_state)
+SHIFT_ROWS_IDX = np.array(
+    [r + 4 * ((c + r) % 4) for c in range(4) for r in range(4)], dtype=np.intp
+)
+INV_SHIFT_ROWS_IDX = np.array(
+    [r + 4 * ((c - r) % 4) for c in range(4) for r in range(4)], dtype=np.intp
+)
+
+# Baris tabel perkalian GF(2^8): MULn[a] = a * n
+XTIME_TABLE = gf256.AES_FIELD.mul_table[0x02]
+MUL9 = gf256.AES_FIELD.mul_table[0x09]
+MUL11 = gf256.AES_FIELD.mul_table[0x0B]
+MUL13 = gf256.AES_FIELD.mul_table[0x0D]
+MUL14 = gf256.AES_FIELD.mul_table[0x0E]
+
+# Jumlah blok yang diproses sekaligus; membatasi memori sementara per langkah
+DEFAULT_CHUNK_BLOCKS = 1 << 16
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass(frozen=True)
+class CipherTables:
+    """Key schedule + S-Box yang sudah disiapkan, bisa dipakai ulang untuk banyak blok."""
+    sbox: np.ndarray
+    inv_sbox: np.ndarray
+    round_keys: np.ndarray  # shape (NR + 1, 16)
+
+
+def prepare_cipher(key: bytes, sbox: List[int]) -> CipherTables:
+    round_keys = key_expansion(key, sbox)
+    return CipherTables(
+        sbox=np.array(sbox, dtype=np.uint8),
+        inv_sbox=np.array(build_inv_sbox(sbox), dtype=np.uint8),
+        round_keys=np.array(round_keys, dtype=np.uint8),
+    )
+
+
+def _mix_columns(state: np.ndarray) -> np.ndarray:
+    cols = state.reshape(-1, 4, 4)
+    s0, s1, s2, s3 = cols[:, :, 0], cols[:, :, 1], cols[:, :, 2], cols[:, :, 3]
+    t = s0 ^ s1 ^ s2 ^ s3
+    out = np.empty_like(cols)
+    out[:, :, 0] = s0 ^ t ^ XTIME_TABLE[s0 ^ s1]
+    out[:, :, 1] = s1 ^ t ^ XTIME_TABLE[s1 ^ s2]
+    out[:, :, 2] = s2 ^ t ^ XTIME_TABLE[s2 ^ s3]
+    out[:, :, 3] = s3 ^ t ^ XTIME_TABLE[s3 ^ s0]
+    return out.reshape(-1, 16)
+
+
+def _inv_mix_columns(state: np.ndarray) -> np.ndarray:
+    cols = state.reshape(-1, 4, 4)
+    s0, s1, s2, s3 = cols[:, :, 0], cols[:, :, 1], cols[:, :, 2], cols[:, :, 3]
+    out = np.empty_like(cols)
+    out[:, :, 0] = MUL14[s0] ^ MUL11[s1] ^ MUL13[s2] ^ MUL9[s3]
+    out[:, :, 1] = MUL9[s0] ^ MUL14[s1] ^ MUL11[s2] ^ MUL13[s3]
+    out[:, :, 2] = MUL13[s0] ^ MUL9[s1] ^ MUL14[s2] ^ MUL11[s3]
+    out[:, :, 3] = MUL11[s0] ^ MUL13[s1] ^ MUL9[s2] ^ MUL14[s3]
+    return out.reshape(-1, 16)
+
+
+def _encrypt_chunk(state: np.ndarray, tables: CipherTables) -> np.ndarray:
+    rk = tables.round_keys
+    sbox = tables.sbox
+    state = state ^ rk[0]
+    for rnd in range(1, NR):
+        state = sbox[state][:, SHIFT_ROWS_IDX]
+        state = _mix_columns(state)
+        state ^= rk[rnd]
+    state = sbox[state][:, SHIFT_ROWS_IDX]
+    state ^= rk[NR]
+    return state
+
+
+def _decrypt_chunk(state: np.ndarray, tables: CipherTables) -> np.ndarray:
+    rk = tables.round_keys
+    inv_sbox = tables.inv_sbox
+    state = state ^ rk[NR]
+    for rnd in range(NR - 1, 0, -1):
+        state = inv_sbox[state[:, INV_SHIFT_ROWS_IDX]]
+        state ^= rk[rnd]
+        state = _inv_mix_columns(state)
+    state = inv_sbox[state[:, INV_SHIFT_ROWS_IDX]]
+    state ^= rk[0]
+    return state
+
+
+def _run_blocks(
+    blocks: np.ndarray,
+    tables: CipherTables,
+    fn,
+    out: Optional[np.ndarray],
+    progress: Optional[ProgressCallback],
+    chunk_blocks: int,
+) -> np.ndarray:
+    blocks = blocks.reshape(-1, 16)
+    total = blocks.shape[0]
+    if out is None:
+        out = np.empty_like(blocks)
+    else:
+        out = out.reshape(-1, 16)
+    for lo in range(0, total, chunk_blocks):
+        hi = min(lo + chunk_blocks, total)
+        out[lo:hi] = fn(blocks[lo:hi], tables)
+        if progress is not None:
+            progress(hi, total)
+    return out
+
+
+def encrypt_blocks(
+    blocks: np.ndarray,
+    tables: CipherTables,
+    out: Optional[np.ndarray] = None,
+    progress: Optional[ProgressCallback] = None,
+    chunk_blocks: int = DEFAULT_CHUNK_BLOCKS,
+) -> np.ndarray:
+    """Enkripsi array uint8 (N, 16) blok demi blok secara vectorized (ECB)."""
+    return _run_blocks(blocks, tables, _encrypt_chunk, out, progress, chunk_blocks)
+
+
+def decrypt_blocks(
+    blocks: np.ndarray,
+    tables: CipherTables,
+    out: Optional[np.ndarray] = None,
+    progress: Optional[ProgressCallback] = None,
+    chunk_blocks: int = DEFAULT_CHUNK_BLOCKS,
+) -> np.ndarray:
+    """Dekripsi array uint8 (N, 16) secara vectorized (ECB)."""
+    return _run_blocks(blocks, tables, _decrypt_chunk, out, progress, chunk_blocks)
+
+
+def encrypt_ecb(plaintext: bytes, tables: CipherTables, use_padding: bool = True) -> bytes:
+    """Padanan aes_core.aes_encrypt_ecb memakai engine NumPy."""
+    if use_padding:
+        plaintext = pkcs7_pad(plaintext, 16)
+    usable = (len(plaintext) // 16) * 16
+    if usable == 0:
+        return b""
+    blocks = np.frombuffer(plaintext, dtype=np.uint8, count=usable)
+    return encrypt_blocks(blocks, tables).tobytes()
+
+
+def decrypt_ecb(ciphertext: bytes, tables: CipherTables, use_padding: bool = True) -> bytes:
+    """Padanan aes_core.aes_decrypt_ecb memakai engine NumPy."""
+    if len(ciphertext) % 16 != 0:
+        raise ValueError("Ciphertext harus kelipatan 16 byte (blok AES).")
+    if not ciphertext:
+        out = b""
+    else:
+        blocks = np.frombuffer(ciphertext, dtype=np.uint8)
+        out = decrypt_blocks(blocks, tables).tobytes()
+    if use_padding:
+        return pkcs7_unpad(out)
+    return out
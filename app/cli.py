@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import aes_numpy, config, engines, sbox_optimizer
+from .aes_core import AES_STANDARD_SBOX, SBOX_44, derive_key_from_input, validate_sbox
+
+ENC_SUFFIX = ".enc"
+DEFAULT_CHUNK_MB = 8
+
+# Engine default CLI: paralelisme sudah dari process pool sendiri, jadi numpy-mp tidak dipakai
+DEFAULT_ENGINE = "numpy-ttable"
+_CLI_ENGINES = [name for name in engines.registry.engines if name != "numpy-mp"]
+
+# Diisi oleh _init_worker di setiap proses worker
+_worker_tables: Optional[aes_numpy.CipherTables] = None
+_worker_engine: Optional[engines.Engine] = None
+
+
+def load_sbox(spec: str) -> List[int]:
+    """S-Box dari nama (standard, sbox44) atau path file JSON (array / {"sbox": [...]})."""
+    if spec == "standard":
+        return AES_STANDARD_SBOX
+    if spec == "sbox44":
+        return SBOX_44
+    path = Path(spec)
+    if not path.is_file():
+        raise ValueError("S-Box harus 'standard', 'sbox44', atau path file JSON")
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        raise ValueError(f"Gagal membaca/parse JSON S-Box: {spec}")
+    sbox = data.get("sbox") if isinstance(data, dict) else data
+    if not validate_sbox(sbox):
+        raise ValueError("sbox tidak valid (harus permutasi unik 0..255)")
+    return sbox
+
+
+def _init_worker(key: bytes, sbox: List[int], engine: str) -> None:
+    global _worker_tables, _worker_engine
+    _worker_tables = aes_numpy.prepare_cipher(key, sbox)
+    _worker_engine = engines.registry.get(engine)
+
+
+def _process_range(op: str, src_path: str, dst_path: str, offset: int, length: int) -> int:
+    """Proses satu rentang blok penuh: baca via mmap input, tulis langsung ke mmap output."""
+    with open(src_path, "rb") as fsrc, open(dst_path, "r+b") as fdst:
+        with mmap.mmap(fsrc.fileno(), 0, access=mmap.ACCESS_READ) as src_mm, \
+                mmap.mmap(fdst.fileno(), 0, access=mmap.ACCESS_WRITE) as dst_mm:
+            src = np.frombuffer(src_mm, dtype=np.uint8, count=length, offset=offset)
+            dst = np.frombuffer(dst_mm, dtype=np.uint8, count=length, offset=offset)
+            if op == "encrypt":
+                _worker_engine.encrypt_blocks(src, _worker_tables, out=dst)
+            else:
+                _worker_engine.decrypt_blocks(src, _worker_tables, out=dst)
+            # View numpy harus dilepas sebelum mmap ditutup
+            del src, dst
+    return length
+
+
+def _split_ranges(total: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    return [(lo, min(chunk_bytes, total - lo)) for lo in range(0, total, chunk_bytes)]
+
+
+def _preallocate(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+def _run_ranges(pool, op: str, src: Path, dst: Path, total: int, chunk_bytes: int) -> None:
+    futures = [
+        pool.submit(_process_range, op, str(src), str(dst), offset, length)
+        for offset, length in _split_ranges(total, chunk_bytes)
+    ]
+    for fut in futures:
+        fut.result()
+
+
+def encrypt_file(pool, tables: aes_numpy.CipherTables, src: Path, dst: Path, chunk_bytes: int) -> int:
+    size = src.stat().st_size
+    full = (size // 16) * 16
+    out_size = full + 16  # PKCS#7 selalu menambah 1..16 byte
+    _preallocate(dst, out_size)
+    if full:
+        _run_ranges(pool, "encrypt", src, dst, full, chunk_bytes)
+    with open(src, "rb") as f:
+        f.seek(full)
+        tail = f.read()
+    last = aes_numpy.encrypt_ecb(tail, tables, use_padding=True)
+    with open(dst, "r+b") as f:
+        f.seek(full)
+        f.write(last)
+    return size
+
+
+def decrypt_file(pool, tables: aes_numpy.CipherTables, src: Path, dst: Path, chunk_bytes: int) -> int:
+    size = src.stat().st_size
+    if size == 0 or size % 16 != 0:
+        raise ValueError(f"{src}: ciphertext harus kelipatan 16 byte (blok AES)")
+    # Blok terakhir didekripsi dulu untuk mengetahui panjang padding -> ukuran output pasti
+    with open(src, "rb") as f:
+        f.seek(size - 16)
+        last_plain = aes_numpy.decrypt_ecb(f.read(16), tables, use_padding=True)
+    body = size - 16
+    _preallocate(dst, body + len(last_plain))
+    if body:
+        _run_ranges(pool, "decrypt", src, dst, body, chunk_bytes)
+    with open(dst, "r+b") as f:
+        f.seek(body)
+        f.write(last_plain)
+    return size
+
+
+def _collect_jobs(op: str, src: Path, dst: Optional[Path]) -> List[Tuple[Path, Path]]:
+    def out_name(path: Path) -> Path:
+        if op == "encrypt":
+            return path.with_name(path.name + ENC_SUFFIX)
+        if path.name.endswith(ENC_SUFFIX):
+            return path.with_name(path.name[: -len(ENC_SUFFIX)])
+        return path.with_name(path.name + ".dec")
+
+    if src.is_file():
+        return [(src, dst if dst is not None else out_name(src))]
+    if not src.is_dir():
+        raise ValueError(f"Input tidak ditemukan: {src}")
+    root_out = dst if dst is not None else src.with_name(src.name + ("-enc" if op == "encrypt" else "-dec"))
+    jobs = []
+    for path in sorted(p for p in src.rglob("*") if p.is_file()):
+        rel = path.relative_to(src)
+        jobs.append((path, out_name(root_out / rel)))
+    return jobs
+
+
+def _format_rate(nbytes: int, seconds: float) -> str:
+    mb = nbytes / (1024 * 1024)
+    rate = mb / seconds if seconds > 0 else float("inf")
+    return f"{mb:.2f} MiB dalam {seconds:.3f} s ({rate:.2f} MiB/s)"
+
+
+def run(args: argparse.Namespace) -> int:
+    try:
+        sbox = load_sbox(args.sbox)
+        key = derive_key_from_input(args.key)
+        jobs = _collect_jobs(args.command, Path(args.input), Path(args.output) if args.output else None)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    # Engine dicek KAT FIPS-197 + uji diferensial sebelum dipakai ke file
+    if not engines.registry.verify(args.engine):
+        print(f"error: engine {args.engine} {engines.registry.status[args.engine]}", file=sys.stderr)
+        return 2
+
+    tables = aes_numpy.prepare_cipher(key, sbox)
+    chunk_bytes = max(16, (args.chunk_mb * 1024 * 1024 // 16) * 16)
+    handler = encrypt_file if args.command == "encrypt" else decrypt_file
+
+    total_bytes = 0
+    failures = 0
+    start_all = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(key, sbox, args.engine)) as pool:
+        for src, dst in jobs:
+            start = time.perf_counter()
+            try:
+                nbytes = handler(pool, tables, src, dst, chunk_bytes)
+            except ValueError as e:
+                failures += 1
+                print(f"GAGAL {src}: {e}", file=sys.stderr)
+                continue
+            total_bytes += nbytes
+            if not args.quiet:
+                print(f"{src} -> {dst}: {_format_rate(nbytes, time.perf_counter() - start)}")
+    elapsed = time.perf_counter() - start_all
+    print(f"Total {len(jobs) - failures} file, {_format_rate(total_bytes, elapsed)}")
+    return 1 if failures else 0
+
+
+def run_optimize(args: argparse.Namespace) -> int:
+    """
+    Cari S-Box lewat simulated annealing; setiap kandidat terbaik dicetak begitu ditemukan.
+    Ctrl-C pertama menghentikan pencarian setelah segmen berjalan selesai (hasil terbaik tetap
+    disimpan), Ctrl-C kedua membatalkan paksa.
+    """
+    cancel = threading.Event()
+
+    def interrupt(signum, frame) -> None:
+        if cancel.is_set():
+            raise KeyboardInterrupt
+        cancel.set()
+        print("dihentikan: menunggu segmen yang berjalan selesai (Ctrl-C lagi untuk batal paksa)", file=sys.stderr)
+
+    best = None
+    previous = signal.signal(signal.SIGINT, interrupt)
+    try:
+        weights = sbox_optimizer.parse_objective(args.objective)
+        start = None if args.start == "random" else load_sbox(args.start)
+        events = sbox_optimizer.optimize(
+            weights, start, chains=args.chains, steps=args.steps, segment_steps=args.segment_steps,
+            t_start=args.t_start, t_end=args.t_end, seed=args.seed, workers=args.workers, cancel=cancel,
+        )
+        for event in events:
+            kind = event.pop("event")
+            if kind == "done":
+                best = event
+            if args.json:
+                print(json.dumps({"event": kind, **event}), flush=True)
+            elif kind == "progress" and not args.quiet:
+                print(f"rantai {event['chain']}: {event['step']}/{event['steps']} skor {event['score']} "
+                      f"(terbaik {event['best_score']})", flush=True)
+            elif kind == "candidate":
+                m = event["metrics"]
+                print(f"KANDIDAT skor {event['score']} (rantai {event['chain']}, langkah {event['step']}): "
+                      f"DU {m['du']}, LAP {m['lap_max_bias']:.4f}, NL {m['nl_min']:.0f}, "
+                      f"SAC {m['sac_avg']:.4f}, BIC-SAC {m['bic_sac_score']:.4f}", flush=True)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    if args.output and best and best["sbox"] is not None:
+        Path(args.output).write_text(json.dumps({"sbox": best["sbox"], "metrics": best["metrics"]}, indent=2))
+        if not args.json:
+            print(f"S-Box terbaik (skor {best['best_score']}) disimpan ke {args.output}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app", description="Enkripsi/dekripsi file massal AES ECB + S-Box")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("encrypt", "decrypt"):
+        p = sub.add_parser(name, help=f"{name} file atau direktori")
+        p.add_argument("input", help="file atau direktori input")
+        p.add_argument("-o", "--output", help="file/direktori output (default: di samping input)")
+        p.add_argument("-k", "--key", required=True, help="kunci (teks bebas atau 32 char hex)")
+        p.add_argument("-s", "--sbox", default="standard", help="standard, sbox44, atau path JSON S-Box")
+        p.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="jumlah proses worker")
+        p.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_MB, help="ukuran chunk per task (MiB)")
+        p.add_argument(
+            "-e",
+            "--engine",
+            default=config.ENGINE if config.ENGINE in _CLI_ENGINES else DEFAULT_ENGINE,
+            choices=_CLI_ENGINES,
+            help="engine cipher per worker (default: AES_ENGINE atau %(default)s)",
+        )
+        p.add_argument("-q", "--quiet", action="store_true", help="hanya tampilkan ringkasan")
+
+    p = sub.add_parser("optimize", help="cari S-Box lewat simulated annealing / hill climbing")
+    p.add_argument(
+        "--objective",
+        default=sbox_optimizer.DEFAULT_OBJECTIVE,
+        help=f"bobot term ({', '.join(sbox_optimizer.OBJECTIVE_TERMS)}), default %(default)s",
+    )
+    p.add_argument("--start", default="random", help="random, standard, sbox44, atau path JSON S-Box awal")
+    p.add_argument("-c", "--chains", type=int, default=os.cpu_count(), help="jumlah rantai independen")
+    p.add_argument("-n", "--steps", type=int, default=50_000, help="langkah (swap) per rantai")
+    p.add_argument("--segment-steps", type=int, default=2000, help="langkah per laporan progress")
+    p.add_argument("--t-start", type=float, default=0.5, help="temperatur awal (0 = hill climbing)")
+    p.add_argument("--t-end", type=float, default=0.005, help="temperatur akhir (0 < t_end <= t_start)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="jumlah proses worker")
+    p.add_argument("-o", "--output", help="simpan S-Box terbaik ke file JSON")
+    p.add_argument("--json", action="store_true", help="cetak setiap event sebagai JSON per baris")
+    p.add_argument("-q", "--quiet", action="store_true", help="tanpa baris progress")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "optimize":
+        return run_optimize(args)
+    return run(args)
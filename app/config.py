@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+# Batas jumlah item untuk endpoint /encrypt/batch dan /decrypt/batch
+BATCH_MAX_ITEMS = _env_int("AES_BATCH_MAX_ITEMS", 20_000)
+
+# Batas ukuran body untuk endpoint biner /data/encrypt dan /data/decrypt
+DATA_MAX_BYTES = _env_int("AES_DATA_MAX_BYTES", 64 * 1024 * 1024)
+
+# Batch gambar: jumlah maksimum gambar per request dan jumlah worker thread
+IMAGE_BATCH_MAX_ITEMS = _env_int("AES_IMAGE_BATCH_MAX_ITEMS", 200)
+IMAGE_BATCH_WORKERS = _env_int("AES_IMAGE_BATCH_WORKERS", os.cpu_count() or 4)
+IMAGE_BATCH_MAX_BYTES = _env_int("AES_IMAGE_BATCH_MAX_BYTES", 512 * 1024 * 1024)
+
+# Ukuran strip (byte) untuk pipeline gambar; hanya membatasi buffer kerja AES, bukan decode/output
+IMAGE_STRIP_BYTES = _env_int("AES_IMAGE_STRIP_BYTES", 4 * 1024 * 1024)
+# Jumlah pasangan piksel acak per arah untuk korelasi gambar; 0 = exact (semua pasangan)
+IMAGE_CORRELATION_SAMPLES = _env_int("AES_IMAGE_CORRELATION_SAMPLES", 10_000)
+# Level kompresi zlib untuk PNG output (0-9)
+PNG_COMPRESS_LEVEL = _env_int("AES_PNG_COMPRESS_LEVEL", 9)
+
+# Batas upload: ukuran file gambar, ukuran file JSON S-Box, dan ukuran body request
+MAX_UPLOAD_BYTES = _env_int("AES_MAX_UPLOAD_BYTES", 200 * 1024 * 1024)
+SBOX_UPLOAD_MAX_BYTES = _env_int("AES_SBOX_UPLOAD_MAX_BYTES", 64 * 1024)
+# Batas jumlah piksel per gambar (juga dipakai sebagai guard decompression bomb PIL)
+MAX_IMAGE_PIXELS = _env_int("AES_MAX_IMAGE_PIXELS", 120_000_000)
+# Budget memori per request gambar (estimasi dari dimensi sebelum decode)
+IMAGE_MEMORY_BUDGET_BYTES = _env_int("AES_IMAGE_MEMORY_BUDGET_BYTES", 2 * 1024 * 1024 * 1024)
+
+# Job queue asinkron: lokasi SQLite + direktori data, jumlah worker, TTL hasil (detik)
+JOBS_DB_PATH = os.environ.get("AES_JOBS_DB_PATH", os.path.join(".aes_jobs", "jobs.sqlite3"))
+JOBS_DATA_DIR = os.environ.get("AES_JOBS_DATA_DIR", os.path.join(".aes_jobs", "data"))
+JOBS_CONCURRENCY = _env_int("AES_JOBS_CONCURRENCY", 2)
+JOBS_MAX_PENDING = _env_int("AES_JOBS_MAX_PENDING", 100)
+JOBS_TTL_SECONDS = _env_int("AES_JOBS_TTL_SECONDS", 24 * 3600)
+
+# Cache hasil enkripsi deterministik (/encrypt, /image/encrypt); 0 = nonaktif
+RESULT_CACHE_DIR = os.environ.get("AES_RESULT_CACHE_DIR", os.path.join(".aes_cache", "results"))
+RESULT_CACHE_MAX_BYTES = _env_int("AES_RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# Plaintext /encrypt yang lebih pendek tidak di-cache: enkripsinya lebih murah dari tulis ke disk
+RESULT_CACHE_MIN_BYTES = _env_int("AES_RESULT_CACHE_MIN_BYTES", 1024)
+
+# Cache artefak S-Box bawaan (invers, DDT/LAT, metrik) dan warm-up saat startup
+SBOX_CACHE_PATH = os.environ.get("AES_SBOX_CACHE_PATH", os.path.join(".aes_cache", "sbox_artifacts.npz"))
+SBOX_WARMUP = _env_int("AES_SBOX_WARMUP", 1) != 0
+
+# Cache S-Box lintas worker di shared memory (prefix nama segmen, total ukuran; 0 = nonaktif)
+SBOX_SHM_PREFIX = os.environ.get("AES_SBOX_SHM_PREFIX", "aes_sbox")
+SBOX_SHM_MAX_BYTES = _env_int("AES_SBOX_SHM_MAX_BYTES", 64 * 1024 * 1024)
+
+# Engine cipher: paksa satu backend (kosong = auto-tune saat startup), probe timing, jumlah proses numpy-mp
+ENGINE = os.environ.get("AES_ENGINE", "").strip() or None
+ENGINE_PROBE = _env_int("AES_ENGINE_PROBE", 1) != 0
+ENGINE_MP_WORKERS = _env_int("AES_ENGINE_MP_WORKERS", os.cpu_count() or 1)
+
+# Admission control endpoint berat (gambar, /data, metrik S-Box): budget = total estimasi
+# detik CPU yang boleh berjalan bersamaan (0 = nonaktif), panjang antrian, batas tunggu,
+# dan cadangan budget untuk lane interaktif (request murah)
+ADMISSION_BUDGET_MS = _env_int("AES_ADMISSION_BUDGET_MS", 2000 * (os.cpu_count() or 1))
+ADMISSION_MAX_QUEUE = _env_int("AES_ADMISSION_MAX_QUEUE", 32)
+ADMISSION_MAX_WAIT_MS = _env_int("AES_ADMISSION_MAX_WAIT_MS", 30_000)
+ADMISSION_INTERACTIVE_RESERVE_MS = _env_int("AES_ADMISSION_INTERACTIVE_RESERVE_MS", 1000)
+
+# Optimizer S-Box (/sbox/optimize/stream): batas langkah per rantai dan jumlah rantai per request
+SBOX_OPTIMIZE_MAX_STEPS = _env_int("AES_SBOX_OPTIMIZE_MAX_STEPS", 50_000)
+SBOX_OPTIMIZE_MAX_CHAINS = _env_int("AES_SBOX_OPTIMIZE_MAX_CHAINS", max(4, os.cpu_count() or 1))
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import aes_numpy, config, gf256
+from .aes_core import AES_STANDARD_SBOX, NR, SBOX_44, aes_decrypt_block, aes_encrypt_block, pkcs7_pad, pkcs7_unpad
+
+# Bucket ukuran payload (batas atas byte, nama); payload lebih besar masuk bucket terakhir
+SIZE_BUCKETS = ((4 * 1024, "small"), (256 * 1024, "medium"), (None, "large"))
+# Ukuran payload yang dipakai timing probe per bucket
+PROBE_SIZES = {"small": 1024, "medium": 64 * 1024, "large": 2 * 1024 * 1024}
+
+# FIPS-197 Appendix C.1 (AES-128)
+KAT_KEY = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+KAT_PLAINTEXT = bytes.fromhex("00112233445566778899aabbccddeeff")
+KAT_CIPHERTEXT = bytes.fromhex("69c4e0d86a7b0430d8cdb78070b4c55a")
+
+DEFAULT_ENGINE = "numpy"
+
+
+def size_bucket(nbytes: int) -> str:
+    for limit, name in SIZE_BUCKETS:
+        if limit is None or nbytes <= limit:
+            return name
+    return SIZE_BUCKETS[-1][1]
+
+
+class Engine:
+    """Backend cipher ECB: enkripsi/dekripsi array blok uint8 (N, 16) dengan CipherTables."""
+
+    name = ""
+    description = ""
+    # Engine lambat hanya di-probe pada ukuran kecil
+    max_probe_bytes: Optional[int] = None
+
+    def encrypt_blocks(self, blocks, tables, out=None, progress=None) -> np.ndarray:
+        raise NotImplementedError
+
+    def decrypt_blocks(self, blocks, tables, out=None, progress=None) -> np.ndarray:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _finish(result: np.ndarray, out: Optional[np.ndarray], progress, total: int) -> np.ndarray:
+    if out is not None:
+        out.reshape(-1, 16)[:] = result
+        result = out.reshape(-1, 16)
+    if progress is not None:
+        progress(total, total)
+    return result
+
+
+class ReferenceEngine(Engine):
+    """aes_core murni Python, blok demi blok (acuan kebenaran)."""
+
+    name = "reference"
+    description = "Pure-Python aes_core, per blok"
+    max_probe_bytes = 4 * 1024
+
+    def _run(self, fn, blocks, tables, out, progress, *boxes) -> np.ndarray:
+        blocks = np.asarray(blocks, dtype=np.uint8).reshape(-1, 16)
+        key = tables.round_keys[0].tobytes()
+        result = np.empty_like(blocks)
+        for i, block in enumerate(blocks):
+            result[i] = np.frombuffer(fn(block.tobytes(), key, *boxes), dtype=np.uint8)
+        return _finish(result, out, progress, blocks.shape[0])
+
+    def encrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(aes_encrypt_block, blocks, tables, out, progress, tables.sbox.tolist())
+
+    def decrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(
+            aes_decrypt_block, blocks, tables, out, progress, tables.sbox.tolist(), tables.inv_sbox.tolist()
+        )
+
+
+class NumpyEngine(Engine):
+    """aes_numpy: semua blok diproses per langkah round secara vectorized."""
+
+    name = "numpy"
+    description = "NumPy batched (aes_numpy)"
+
+    def encrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return aes_numpy.encrypt_blocks(blocks, tables, out=out, progress=progress)
+
+    def decrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return aes_numpy.decrypt_blocks(blocks, tables, out=out, progress=progress)
+
+
+# Kolom MixColumns / InvMixColumns: koefisien baris output k untuk byte input di baris r
+_MIX = ((2, 3, 1, 1), (1, 2, 3, 1), (1, 1, 2, 3), (3, 1, 1, 2))
+_INV_MIX = ((14, 11, 13, 9), (9, 14, 11, 13), (13, 9, 14, 11), (11, 13, 9, 14))
+
+
+def _t_tables(values: np.ndarray, matrix) -> np.ndarray:
+    """T-table (4, 256) uint32: T[r][x] = kolom hasil mix dari byte values[x] di baris r."""
+    mul = gf256.AES_FIELD.mul_table
+    tables = np.zeros((4, 256), dtype="<u4")
+    for r in range(4):
+        for k in range(4):
+            tables[r] |= mul[matrix[k][r]][values].astype("<u4") << np.uint32(8 * k)
+    return tables
+
+
+class TTableEngine(Engine):
+    """
+    Varian table-driven: SubBytes + ShiftRows + MixColumns digabung dalam 4 T-table
+    uint32 per S-Box (dekripsi memakai equivalent inverse cipher).
+    """
+
+    name = "numpy-ttable"
+    description = "NumPy T-table (32-bit lookup per byte)"
+
+    def __init__(self):
+        self._cache: Dict[bytes, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _tables_for(self, tables) -> tuple:
+        key = tables.sbox.tobytes() + tables.round_keys.tobytes()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is None:
+            te = _t_tables(tables.sbox, _MIX)
+            td = _t_tables(tables.inv_sbox, _INV_MIX)
+            # Round key tengah untuk equivalent inverse cipher: InvMixColumns(rk)
+            dk = aes_numpy._inv_mix_columns(tables.round_keys.copy())
+            cached = (
+                te,
+                td,
+                np.ascontiguousarray(tables.round_keys).view("<u4"),
+                np.ascontiguousarray(dk).view("<u4"),
+            )
+            with self._lock:
+                if len(self._cache) > 64:
+                    self._cache.clear()
+                self._cache[key] = cached
+        return cached
+
+    @staticmethod
+    def _rounds(state: np.ndarray, t: np.ndarray, keys: np.ndarray, shift: np.ndarray, order) -> np.ndarray:
+        for rnd in order:
+            b = state[:, shift].reshape(-1, 4, 4)
+            cols = t[0][b[:, :, 0]] ^ t[1][b[:, :, 1]] ^ t[2][b[:, :, 2]] ^ t[3][b[:, :, 3]]
+            cols = np.ascontiguousarray(cols)
+            cols ^= keys[rnd]
+            state = cols.view(np.uint8).reshape(-1, 16)
+        return state
+
+    def _run(self, blocks, tables, out, progress, decrypt: bool) -> np.ndarray:
+        blocks = np.asarray(blocks, dtype=np.uint8).reshape(-1, 16)
+        total = blocks.shape[0]
+        result = np.empty_like(blocks) if out is None else out.reshape(-1, 16)
+        te, td, ek, dk = self._tables_for(tables)
+        rk = tables.round_keys
+        chunk = aes_numpy.DEFAULT_CHUNK_BLOCKS
+        for lo in range(0, total, chunk):
+            hi = min(lo + chunk, total)
+            if decrypt:
+                state = blocks[lo:hi] ^ rk[NR]
+                state = self._rounds(state, td, dk.reshape(-1, 4), aes_numpy.INV_SHIFT_ROWS_IDX, range(NR - 1, 0, -1))
+                state = tables.inv_sbox[state[:, aes_numpy.INV_SHIFT_ROWS_IDX]] ^ rk[0]
+            else:
+                state = blocks[lo:hi] ^ rk[0]
+                state = self._rounds(state, te, ek.reshape(-1, 4), aes_numpy.SHIFT_ROWS_IDX, range(1, NR))
+                state = tables.sbox[state[:, aes_numpy.SHIFT_ROWS_IDX]] ^ rk[NR]
+            result[lo:hi] = state
+            if progress is not None:
+                progress(hi, total)
+        return result
+
+    def encrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(blocks, tables, out, progress, decrypt=False)
+
+    def decrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(blocks, tables, out, progress, decrypt=True)
+
+
+def _mp_chunk(decrypt: bool, data: bytes, tables) -> bytes:
+    blocks = np.frombuffer(data, dtype=np.uint8)
+    fn = aes_numpy.decrypt_blocks if decrypt else aes_numpy.encrypt_blocks
+    return fn(blocks, tables).tobytes()
+
+
+class MultiprocessEngine(Engine):
+    """aes_numpy dibagi ke beberapa proses (ProcessPoolExecutor, start method spawn)."""
+
+    name = "numpy-mp"
+    description = "NumPy di process pool"
+    # Potongan minimum per task agar overhead pickling tidak mendominasi
+    min_chunk_blocks = 16 * 1024
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _run(self, blocks, tables, out, progress, decrypt: bool) -> np.ndarray:
+        blocks = np.asarray(blocks, dtype=np.uint8).reshape(-1, 16)
+        total = blocks.shape[0]
+        per_task = max(self.min_chunk_blocks, -(-total // self.workers))
+        result = np.empty_like(blocks) if out is None else out.reshape(-1, 16)
+        pool = self._get_pool()
+        futures = [
+            (lo, pool.submit(_mp_chunk, decrypt, blocks[lo:lo + per_task].tobytes(), tables))
+            for lo in range(0, total, per_task)
+        ]
+        done = 0
+        for lo, future in futures:
+            chunk = np.frombuffer(future.result(), dtype=np.uint8).reshape(-1, 16)
+            result[lo:lo + chunk.shape[0]] = chunk
+            done += chunk.shape[0]
+            if progress is not None:
+                progress(done, total)
+        return result
+
+    def encrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(blocks, tables, out, progress, decrypt=False)
+
+    def decrypt_blocks(self, blocks, tables, out=None, progress=None):
+        return self._run(blocks, tables, out, progress, decrypt=True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+class EngineRegistry:
+    """
+    Daftar engine cipher. initialize() menjalankan KAT FIPS-197 dan uji diferensial
+    terhadap aes_core.aes_encrypt_block (S-Box standard, SBOX_44, acak) untuk setiap
+    engine, lalu timing probe per bucket ukuran untuk memilih engine tercepat.
+    """
+
+    def __init__(self, engines: List[Engine], override: Optional[str] = None):
+        self.engines: Dict[str, Engine] = {engine.name: engine for engine in engines}
+        self.override = override or None
+        self.status: Dict[str, str] = {name: "unchecked" for name in self.engines}
+        self.probe_ms: Dict[str, Dict[str, float]] = {name: {} for name in self.engines}
+        self.selection: Dict[str, str] = {}
+        self.initialized = False
+
+    def _verify(self, engine: Engine) -> None:
+        kat = aes_numpy.prepare_cipher(KAT_KEY, AES_STANDARD_SBOX)
+        block = np.frombuffer(KAT_PLAINTEXT, dtype=np.uint8).reshape(1, 16)
+        if engine.encrypt_blocks(block, kat).tobytes() != KAT_CIPHERTEXT:
+            raise AssertionError("KAT FIPS-197 enkripsi gagal")
+        ct = np.frombuffer(KAT_CIPHERTEXT, dtype=np.uint8).reshape(1, 16)
+        if engine.decrypt_blocks(ct, kat).tobytes() != KAT_PLAINTEXT:
+            raise AssertionError("KAT FIPS-197 dekripsi gagal")
+
+        rng = random.Random(0x5B0C)
+        random_sbox = list(range(256))
+        rng.shuffle(random_sbox)
+        for label, sbox in (("standard", AES_STANDARD_SBOX), ("sbox44", SBOX_44), ("random", random_sbox)):
+            key = bytes(rng.randrange(256) for _ in range(16))
+            plain = bytes(rng.randrange(256) for _ in range(16 * 8))
+            expected = b"".join(aes_encrypt_block(plain[i:i + 16], key, sbox) for i in range(0, len(plain), 16))
+            tables = aes_numpy.prepare_cipher(key, sbox)
+            blocks = np.frombuffer(plain, dtype=np.uint8).reshape(-1, 16)
+            cipher = engine.encrypt_blocks(blocks, tables)
+            if cipher.tobytes() != expected:
+                raise AssertionError(f"beda dengan aes_encrypt_block (S-Box {label})")
+            if engine.decrypt_blocks(cipher, tables).tobytes() != plain:
+                raise AssertionError(f"round-trip dekripsi gagal (S-Box {label})")
+
+    def _probe(self, engine: Engine) -> None:
+        tables = aes_numpy.prepare_cipher(KAT_KEY, SBOX_44)
+        engine.encrypt_blocks(np.zeros((1, 16), dtype=np.uint8), tables)  # pemanasan (pool, cache)
+        for bucket, nbytes in PROBE_SIZES.items():
+            if engine.max_probe_bytes is not None and nbytes > engine.max_probe_bytes:
+                continue
+            data = np.frombuffer(os.urandom(nbytes), dtype=np.uint8).reshape(-1, 16)
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                engine.encrypt_blocks(data, tables)
+                best = min(best, time.perf_counter() - start)
+            self.probe_ms[engine.name][bucket] = round(best * 1000, 3)
+
+    def verify(self, name: str) -> bool:
+        """Jalankan KAT + uji diferensial untuk satu engine; hasilnya dicatat di status."""
+        try:
+            self._verify(self.engines[name])
+            self.status[name] = "ok"
+        except Exception as e:  # engine rusak tidak boleh menjatuhkan startup
+            self.status[name] = f"gagal: {e}"
+        return self.status[name] == "ok"
+
+    def initialize(self, probe: bool = True) -> None:
+        if self.override and self.override not in self.engines:
+            raise ValueError(f"AES_ENGINE tidak dikenal: {self.override} (pilihan: {', '.join(self.engines)})")
+        for name, engine in self.engines.items():
+            if not self.verify(name):
+                continue
+            if probe:
+                try:
+                    self._probe(engine)
+                except Exception as e:
+                    self.status[name] = f"probe gagal: {e}"
+        self.selection = {}
+        for _, bucket in SIZE_BUCKETS:
+            timings = {
+                name: ms[bucket] for name, ms in self.probe_ms.items()
+                if self.status[name] == "ok" and bucket in ms
+            }
+            self.selection[bucket] = min(timings, key=timings.get) if timings else DEFAULT_ENGINE
+        self.initialized = True
+
+    def get(self, name: str) -> Engine:
+        if name not in self.engines:
+            raise ValueError(f"engine tidak dikenal: {name} (pilihan: {', '.join(self.engines)})")
+        if self.status[name] not in ("ok", "unchecked"):
+            raise ValueError(f"engine {name} tidak lolos verifikasi: {self.status[name]}")
+        return self.engines[name]
+
+    def select(self, nbytes: int, requested: Optional[str] = None) -> Engine:
+        """Engine untuk payload nbytes: parameter request > env AES_ENGINE > hasil auto-tune."""
+        name = requested or self.override
+        if name:
+            return self.get(name)
+        return self.engines[self.selection.get(size_bucket(nbytes), DEFAULT_ENGINE)]
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "override": self.override,
+            "selection": self.selection or {bucket: DEFAULT_ENGINE for _, bucket in SIZE_BUCKETS},
+            "engines": {
+                name: {
+                    "description": engine.description,
+                    "status": self.status[name],
+                    "probe_ms": self.probe_ms[name],
+                }
+                for name, engine in self.engines.items()
+            },
+        }
+
+    def close(self) -> None:
+        for engine in self.engines.values():
+            engine.close()
+
+
+registry = EngineRegistry(
+    [ReferenceEngine(), NumpyEngine(), TTableEngine(), MultiprocessEngine(config.ENGINE_MP_WORKERS)],
+    override=config.ENGINE,
+)
+
+
+def encrypt_ecb(plaintext: bytes, tables, use_padding: bool = True, engine: Optional[str] = None) -> bytes:
+    """Padanan aes_core.aes_encrypt_ecb memakai engine terpilih."""
+    if use_padding:
+        plaintext = pkcs7_pad(plaintext, 16)
+    usable = (len(plaintext) // 16) * 16
+    if usable == 0:
+        return b""
+    blocks = np.frombuffer(plaintext, dtype=np.uint8, count=usable).reshape(-1, 16)
+    return registry.select(usable, engine).encrypt_blocks(blocks, tables).tobytes()
+
+
+def decrypt_ecb(ciphertext: bytes, tables, use_padding: bool = True, engine: Optional[str] = None) -> bytes:
+    """Padanan aes_core.aes_decrypt_ecb memakai engine terpilih."""
+    if len(ciphertext) % 16 != 0:
+        raise ValueError("Ciphertext harus kelipatan 16 byte (blok AES).")
+    out = b""
+    if ciphertext:
+        blocks = np.frombuffer(ciphertext, dtype=np.uint8).reshape(-1, 16)
+        out = registry.select(len(ciphertext), engine).decrypt_blocks(blocks, tables).tobytes()
+    return pkcs7_unpad(out) if use_padding else out
+
+
+def _keystream(nbytes: int, tables, backend: Engine) -> np.ndarray:
+    # Data < 1 blok tidak bisa di-steal: XOR dengan E_K(blok panjang data), seperti mode stream
+    counter = np.frombuffer(nbytes.to_bytes(16, "big"), dtype=np.uint8).reshape(1, 16)
+    return backend.encrypt_blocks(counter, tables).reshape(-1)[:nbytes]
+
+
+def encrypt_cts(data, tables, engine: Optional[str] = None) -> np.ndarray:
+    """
+    ECB dengan ciphertext stealing: output sama panjang dengan input (tanpa padding).
+    Blok penuh terakhir dienkripsi, r byte awalnya jadi blok parsial di ujung, sisanya
+    digabung ke blok parsial plaintext lalu dienkripsi di posisi blok penuh terakhir.
+    """
+    data = np.asarray(data, dtype=np.uint8).reshape(-1)
+    total = data.size
+    backend = registry.select(total, engine)
+    if total < 16:
+        return data ^ _keystream(total, tables, backend)
+    full, rem = divmod(total, 16)
+    out = np.empty_like(data)
+    usable = full * 16
+    backend.encrypt_blocks(data[:usable], tables, out=out[:usable])
+    if rem:
+        last = out[usable - 16:usable].copy()
+        stolen = np.concatenate([data[usable:], last[rem:]])
+        out[usable:] = last[:rem]
+        out[usable - 16:usable] = backend.encrypt_blocks(stolen, tables).reshape(-1)
+    return out
+
+
+def decrypt_cts(data, tables, engine: Optional[str] = None) -> np.ndarray:
+    """Kebalikan encrypt_cts."""
+    data = np.asarray(data, dtype=np.uint8).reshape(-1)
+    total = data.size
+    backend = registry.select(total, engine)
+    if total < 16:
+        return data ^ _keystream(total, tables, backend)
+    full, rem = divmod(total, 16)
+    out = np.empty_like(data)
+    usable = full * 16
+    if not rem:
+        backend.decrypt_blocks(data, tables, out=out)
+        return out
+    if usable > 16:
+        backend.decrypt_blocks(data[:usable - 16], tables, out=out[:usable - 16])
+    # Blok penuh terakhir = E(plaintext parsial || ekor ciphertext yang dicuri)
+    stolen = backend.decrypt_blocks(data[usable - 16:usable], tables).reshape(-1)
+    out[usable:] = stolen[:rem]
+    last = np.concatenate([data[usable:], stolen[rem:]])
+    out[usable - 16:usable] = backend.decrypt_blocks(last, tables).reshape(-1)
+    return out
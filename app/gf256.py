@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Sequence
+
+import numpy as np
+
+# Polinomial tak tereduksi AES: x^8 + x^4 + x^3 + x + 1
+AES_POLY = 0x11B
+
+
+def _poly_mul_mod(a: int, b: int, poly: int) -> int:
+    """Perkalian GF(2^8) bit per bit; hanya dipakai untuk membangun tabel."""
+    p = 0
+    while b:
+        if b & 1:
+            p ^= a
+        a <<= 1
+        if a & 0x100:
+            a ^= poly
+        b >>= 1
+    return p
+
+
+def is_irreducible(poly: int) -> bool:
+    """Cek polinomial derajat 8 tak tereduksi atas GF(2) (tidak habis dibagi derajat 1..4)."""
+    if not 0x100 <= poly <= 0x1FF:
+        return False
+    for divisor in range(2, 1 << 5):
+        # Pembagian panjang polinomial biner
+        rem = poly
+        deg = divisor.bit_length() - 1
+        while rem.bit_length() - 1 >= deg:
+            rem ^= divisor << (rem.bit_length() - 1 - deg)
+        if rem == 0:
+            return False
+    return True
+
+
+# Semua 30 polinomial tak tereduksi derajat 8, untuk riset S-Box
+IRREDUCIBLE_POLYS: List[int] = [p for p in range(0x100, 0x200) if is_irreducible(p)]
+
+
+@dataclass(frozen=True)
+class GF256:
+    """Tabel aritmetika GF(2^8) untuk satu polinomial tak tereduksi."""
+    poly: int
+    generator: int
+    exp: np.ndarray  # shape (510,), exp[i] = g^i (diduplikasi agar log a + log b tanpa mod)
+    log: np.ndarray  # shape (256,), log[0] tidak terdefinisi (0)
+    mul_table: np.ndarray  # shape (256, 256) uint8
+    inv: np.ndarray  # shape (256,) uint8, inv[0] = 0
+    mul_rows: tuple  # baris mul_table sebagai bytes, untuk lookup skalar cepat di Python murni
+
+    def mul(self, a: int, b: int) -> int:
+        return self.mul_rows[a][b]
+
+    def mul_arrays(self, a, b) -> np.ndarray:
+        """Perkalian elemen demi elemen dua array (atau array dengan skalar)."""
+        return self.mul_table[np.asarray(a, dtype=np.uint8), np.asarray(b, dtype=np.uint8)]
+
+    def inverse(self, a: int) -> int:
+        return int(self.inv[a])
+
+    def inv_arrays(self, a) -> np.ndarray:
+        return self.inv[np.asarray(a, dtype=np.uint8)]
+
+    def pow(self, a: int, n: int) -> int:
+        if a == 0:
+            return 0 if n else 1
+        return int(self.exp[(int(self.log[a]) * n) % 255])
+
+
+def _find_generator(poly: int) -> int:
+    for g in range(2, 256):
+        x, order = g, 1
+        while x != 1:
+            x = _poly_mul_mod(x, g, poly)
+            order += 1
+        if order == 255:
+            return g
+    raise ValueError(f"Polinomial 0x{poly:X} tidak punya generator")
+
+
+@lru_cache(maxsize=None)
+def field(poly: int = AES_POLY) -> GF256:
+    """Tabel GF(2^8) (di-cache) untuk polinomial tak tereduksi `poly`."""
+    if not is_irreducible(poly):
+        raise ValueError(f"Polinomial 0x{poly:X} bukan polinomial tak tereduksi derajat 8")
+    generator = _find_generator(poly)
+    exp = np.zeros(510, dtype=np.int64)
+    log = np.zeros(256, dtype=np.int64)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x = _poly_mul_mod(x, generator, poly)
+    exp[255:] = exp[:255]
+
+    # mul[a, b] = exp[log a + log b], baris/kolom 0 tetap 0
+    mul_table = np.zeros((256, 256), dtype=np.uint8)
+    mul_table[1:, 1:] = exp[log[1:, None] + log[None, 1:]]
+    inv = np.zeros(256, dtype=np.uint8)
+    inv[1:] = exp[(255 - log[1:]) % 255]
+    for arr in (exp, log, mul_table, inv):
+        arr.setflags(write=False)
+    return GF256(
+        poly=poly,
+        generator=generator,
+        exp=exp,
+        log=log,
+        mul_table=mul_table,
+        inv=inv,
+        mul_rows=tuple(row.tobytes() for row in mul_table),
+    )
+
+
+AES_FIELD = field(AES_POLY)
+
+
+def affine_transform(values, matrix: Sequence[Sequence[int]], constant: int) -> np.ndarray:
+    """
+    Transformasi affine b' = M.b + c atas GF(2) untuk array byte sekaligus
+    (bit ke-i = (v >> i) & 1, baris matriks = bit output).
+    """
+    arr = np.atleast_1d(np.asarray(values, dtype=np.uint8))
+    bits = np.unpackbits(arr[:, None], axis=1, bitorder="little")  # (N, 8)
+    mat = np.asarray(matrix, dtype=np.uint8) & 1
+    out_bits = (bits.astype(np.int64) @ mat.T.astype(np.int64)) & 1
+    packed = np.packbits(out_bits.astype(np.uint8), axis=1, bitorder="little")[:, 0]
+    return packed ^ np.uint8(constant)
+
+
+def affine_sbox(matrix: Sequence[Sequence[int]], constant: int = 0x63, poly: int = AES_POLY) -> List[int]:
+    """S-Box gaya AES: S(x) = M . x^-1 + c, dengan invers di GF(2^8)/poly."""
+    return affine_transform(field(poly).inv, matrix, constant).tolist()
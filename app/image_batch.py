@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import contextvars
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import aes_numpy, config, image_pipeline
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=config.IMAGE_BATCH_WORKERS, thread_name_prefix="image-batch"
+            )
+        return _executor
+
+
+def read_zip_images(contents) -> List[Tuple[str, bytes]]:
+    """Ambil semua file gambar dari arsip ZIP (bytes atau objek file, urut sesuai nama)."""
+    stream = io.BytesIO(contents) if isinstance(contents, (bytes, bytearray)) else contents
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise ValueError("File ZIP tidak valid")
+    with archive:
+        infos = [
+            info for info in archive.infolist()
+            if not info.is_dir() and PurePosixPath(info.filename).suffix.lower() in IMAGE_EXTENSIONS
+        ]
+        # Cegah zip bomb: batasi total ukuran setelah dekompresi
+        total = sum(info.file_size for info in infos)
+        if total > config.IMAGE_BATCH_MAX_BYTES:
+            raise ValueError(f"Isi ZIP melebihi batas {config.IMAGE_BATCH_MAX_BYTES} byte")
+        return [(info.filename, archive.read(info)) for info in sorted(infos, key=lambda i: i.filename)]
+
+
+def _output_name(name: str, used: set) -> str:
+    stem = PurePosixPath(name).stem or "image"
+    candidate = f"{stem}.png"
+    index = 1
+    while candidate in used:
+        candidate = f"{stem}_{index}.png"
+        index += 1
+    used.add(candidate)
+    return candidate
+
+
+def _process_one(op: str, contents, tables: aes_numpy.CipherTables) -> Tuple[bytes, Dict[str, Any]]:
+    if op == "encrypt":
+        png_bytes, analytics = image_pipeline.encrypt_image_bytes(contents, tables)
+        # Histogram tidak dimasukkan ke manifest agar tetap ringkas
+        summary = {k: v for k, v in analytics.items() if not k.endswith("_histogram")}
+        return png_bytes, summary
+    return image_pipeline.decrypt_image_bytes(contents, tables), {}
+
+
+def run_batch(op: str, items: List[Tuple[str, Any]], tables: aes_numpy.CipherTables, mode: str):
+    """
+    Proses semua gambar secara paralel di thread pool (key schedule dipakai bersama),
+    lalu tulis hasil + manifest.json ke ZIP di spooled temp file.
+    """
+    executor = _get_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, _process_one, op, contents, tables)
+        for _, contents in items
+    ]
+
+    archive_file = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+    manifest: List[Dict[str, Any]] = []
+    used_names: set = set()
+    with zipfile.ZipFile(archive_file, "w", compression=zipfile.ZIP_STORED) as archive:
+        # PNG sudah terkompresi, jadi ZIP cukup mode STORED
+        for (name, _), future in zip(items, futures):
+            entry: Dict[str, Any] = {"name": name}
+            try:
+                png_bytes, summary = future.result()
+            except ValueError as e:
+                entry.update({"ok": False, "error": str(e)})
+            else:
+                output = _output_name(name, used_names)
+                archive.writestr(output, png_bytes)
+                entry.update({"ok": True, "output": output, **summary})
+            manifest.append(entry)
+        archive.writestr(
+            "manifest.json",
+            json.dumps(
+                {
+                    "operation": op,
+                    "used_mode": mode,
+                    "count": len(items),
+                    "succeeded": sum(1 for e in manifest if e["ok"]),
+                    "images": manifest,
+                },
+                indent=2,
+            ),
+        )
+    archive_file.seek(0)
+    return archive_file
+
+
+def iter_file(fileobj, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
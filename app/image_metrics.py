@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import math
+from typing import Dict
+
+import numpy as np
+
+
+def entropy_from_histograms(histograms: Dict[str, np.ndarray]) -> float:
+    """Rata-rata entropy per kanal, dihitung dari histogram (entropy Shannon, bit per sampel)."""
+    entropies = []
+    for histogram in histograms.values():
+        histogram = np.asarray(histogram)
+        histogram = histogram[histogram > 0]
+        probabilities = histogram / histogram.sum()
+        entropies.append(-np.sum(probabilities * np.log2(probabilities)))
+    return float(np.mean(entropies))
+
+
+class HistogramAccumulator:
+    """Akumulasi histogram 256 bin per kanal (default RGB) secara bertahap (per strip)."""
+
+    def __init__(self, channels=("R", "G", "B")):
+        self.channels = channels
+        self.counts = {name: np.zeros(256, dtype=np.int64) for name in channels}
+
+    def add(self, pixels: np.ndarray) -> None:
+        flat = pixels.reshape(-1, len(self.channels))
+        for i, name in enumerate(self.channels):
+            self.counts[name] += np.bincount(flat[:, i], minlength=256)
+
+    def to_dict(self) -> Dict[str, list]:
+        return {name: counts.tolist() for name, counts in self.counts.items()}
+
+    def entropy(self) -> float:
+        return entropy_from_histograms(self.counts)
+
+
+# Nilai kritis chi-square untuk df = 255, alpha = 0.05
+CHI_SQUARE_CRITICAL_005 = 293.2478
+
+
+def chi_square_from_histograms(histograms: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """Uji chi-square histogram terhadap distribusi uniform 256 bin, per kanal."""
+    result = {}
+    for name, histogram in histograms.items():
+        observed = np.asarray(histogram, dtype=np.float64)
+        expected = observed.sum() / 256.0
+        if expected == 0:
+            result[name] = 0.0
+            continue
+        result[name] = round(float(np.sum((observed - expected) ** 2) / expected), 4)
+    return result
+
+
+def chi_square_passed(statistics: Dict[str, float]) -> Dict[str, bool]:
+    """Per kanal: histogram lolos uji uniform (alpha = 0.05) bila statistiknya < nilai kritis."""
+    return {name: stat < CHI_SQUARE_CRITICAL_005 for name, stat in statistics.items()}
+
+
+class CorrelationAccumulator:
+    """
+    Korelasi piksel bertetangga (horizontal, vertikal, diagonal) yang diakumulasi per strip.
+
+    samples=None/0 -> exact (semua pasangan piksel); samples=N -> N pasangan acak per arah
+    (seed tetap agar hasil reprodusibel). Baris terakhir strip sebelumnya disimpan supaya
+    pasangan vertikal/diagonal yang melintasi batas strip tetap terhitung.
+    """
+
+    DIRECTIONS = {"horizontal": (0, 1), "vertical": (1, 0), "diagonal": (1, 1)}
+
+    def __init__(self, width: int, height: int, channels: int = 3, samples: int | None = None, seed: int = 0):
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.samples = samples or 0
+        self._next_y = 0
+        self._prev_row: np.ndarray | None = None
+        # per arah: [sum x, sum y, sum x^2, sum y^2, sum xy] per kanal, plus jumlah pasangan
+        self._sums = {d: [[0] * 5 for _ in range(channels)] for d in self.DIRECTIONS}
+        self._counts = {d: 0 for d in self.DIRECTIONS}
+        self._coords: Dict[str, tuple] = {}
+        if self.samples:
+            rng = np.random.default_rng(seed)
+            for name, (dy, dx) in self.DIRECTIONS.items():
+                ys_range, xs_range = height - dy, width - dx
+                if ys_range <= 0 or xs_range <= 0:
+                    self._coords[name] = (np.empty(0, np.int64), np.empty(0, np.int64))
+                    continue
+                ys = rng.integers(0, ys_range, self.samples)
+                xs = rng.integers(0, xs_range, self.samples)
+                order = np.argsort(ys, kind="stable")
+                self._coords[name] = (ys[order], xs[order])
+
+    def add(self, pixels: np.ndarray) -> None:
+        """Tambahkan strip baris berikutnya (array (baris, lebar, kanal) atau flat)."""
+        strip = pixels.reshape(-1, self.width, self.channels)
+        y0 = self._next_y
+        rows = strip.shape[0]
+        if self._prev_row is not None:
+            ext = np.concatenate([self._prev_row[None], strip])
+            base = y0 - 1
+        else:
+            ext = strip
+            base = y0
+        for name, (dy, dx) in self.DIRECTIONS.items():
+            # Piksel pertama pasangan berada di baris [lo, hi) dari koordinat gambar
+            lo = y0 if dy == 0 else base
+            hi = y0 + rows - dy
+            if hi <= lo:
+                continue
+            if self.samples:
+                ys, xs = self._coords[name]
+                start, stop = np.searchsorted(ys, [lo, hi])
+                if start == stop:
+                    continue
+                ry = ys[start:stop] - base
+                rx = xs[start:stop]
+                a = ext[ry, rx]
+                b = ext[ry + dy, rx + dx]
+            else:
+                r0 = lo - base
+                a = ext[r0:hi - base, : self.width - dx]
+                b = ext[r0 + dy:hi - base + dy, dx:]
+            self._accumulate(name, a.reshape(-1, self.channels), b.reshape(-1, self.channels))
+        self._prev_row = strip[-1].copy()
+        self._next_y += rows
+
+    def _accumulate(self, name: str, a: np.ndarray, b: np.ndarray) -> None:
+        self._counts[name] += a.shape[0]
+        # float64 (BLAS) tetap exact untuk sample 8-bit: jumlah produk per strip jauh di bawah
+        # 2**53; sample 16-bit bisa melewatinya, jadi dihitung dengan int64
+        dtype = np.float64 if a.dtype.itemsize == 1 else np.int64
+        xs = np.ascontiguousarray(a.T, dtype=dtype)
+        ys = np.ascontiguousarray(b.T, dtype=dtype)
+        for c in range(self.channels):
+            x, y = xs[c], ys[c]
+            sums = self._sums[name][c]
+            sums[0] += int(x.sum())
+            sums[1] += int(y.sum())
+            sums[2] += int(x @ x)
+            sums[3] += int(y @ y)
+            sums[4] += int(x @ y)
+
+    def result(self) -> Dict[str, float]:
+        """Koefisien korelasi Pearson per arah (rata-rata antar kanal)."""
+        out = {}
+        for name in self.DIRECTIONS:
+            n = self._counts[name]
+            coefs = []
+            for sx, sy, sxx, syy, sxy in self._sums[name]:
+                # Aritmatika integer Python agar tidak overflow/kehilangan presisi
+                cov = n * sxy - sx * sy
+                var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+                if n > 1 and var > 0:
+                    coefs.append(cov / math.sqrt(var))
+            out[name] = round(float(np.mean(coefs)), 4) if coefs else 0.0
+        return out
@@ -0,0 +1,556 @@
+from __future__ import annotations
+
+import io
+import math
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from . import aes_numpy, config, engines, timing
+from .aes_core import pkcs7_pad
+from .image_metrics import CorrelationAccumulator, HistogramAccumulator, chi_square_from_histograms, chi_square_passed
+from .png_writer import PngStreamWriter
+
+
+@dataclass(frozen=True)
+class PixelLayout:
+    """Layout buffer piksel native yang dienkripsi apa adanya (tanpa konversi ke RGB)."""
+    mode: str              # mode PIL
+    channels: Tuple[str, ...]
+    sample_bytes: int      # 1 (8-bit) atau 2 (16-bit, big-endian seperti di PNG)
+    color_type: int        # color type PNG
+
+    @property
+    def pixel_bytes(self) -> int:
+        return len(self.channels) * self.sample_bytes
+
+
+PIXEL_LAYOUTS = {
+    layout.mode: layout
+    for layout in (
+        PixelLayout("L", ("L",), 1, 0),
+        PixelLayout("LA", ("L", "A"), 1, 4),
+        PixelLayout("RGB", ("R", "G", "B"), 1, 2),
+        PixelLayout("RGBA", ("R", "G", "B", "A"), 1, 6),
+        PixelLayout("I;16", ("L",), 2, 0),
+    )
+}
+# Gambar terenkripsi tanpa chunk tEXt mode piksel = format lama (RGB)
+DEFAULT_PIXEL_MODE = "RGB"
+PIXEL_MODE_TEXT_KEY = "AES-Pixel-Mode"
+
+# Mode PIL lain -> mode native terdekat (selain itu -> RGB). Tidak semuanya lossless: I dipotong
+# ke 0..65535, La/RGBa di-unpremultiply, F/CMYK/YCbCr/LAB/HSV -> RGB mengubah nilai piksel.
+_MODE_FALLBACK = {"1": "L", "La": "LA", "PA": "RGBA", "RGBa": "RGBA", "I": "I;16",
+                  "I;16B": "I;16", "I;16L": "I;16", "I;16N": "I;16"}
+# Konversi yang mempertahankan nilai piksel (dekripsi mengembalikan piksel yang sama)
+_LOSSLESS_CONVERSIONS = frozenset({"1", "P", "PA", "I;16B", "I;16L", "I;16N"})
+
+# Mode padding gambar terenkripsi: PKCS#7 + padding visual (default, format lama) atau
+# ciphertext stealing (dimensi tetap); mode non-default dicatat di chunk tEXt PNG
+PADDING_MODES = ("pkcs7", "cts")
+PADDING_TEXT_KEY = "AES-Padding"
+
+
+# Guard decompression bomb PIL mengikuti batas piksel aplikasi
+Image.MAX_IMAGE_PIXELS = config.MAX_IMAGE_PIXELS
+
+# Perkiraan byte per piksel buffer PIL hasil decode, per mode
+_MODE_BYTES = {"1": 1, "L": 1, "P": 1, "LA": 2, "PA": 2, "RGB": 3, "YCbCr": 3, "LAB": 3,
+               "HSV": 3, "RGBA": 4, "RGBa": 4, "CMYK": 4, "I": 4, "F": 4, "I;16": 2}
+
+
+class ImageTooLargeError(ValueError):
+    """Gambar melebihi batas piksel / budget memori (dipetakan ke HTTP 413)."""
+
+
+def native_layout(mode: str, info: Optional[Dict[str, Any]] = None) -> PixelLayout:
+    """Layout yang dienkripsi untuk gambar bermode PIL `mode` (P dengan transparansi -> RGBA)."""
+    if mode in PIXEL_LAYOUTS:
+        return PIXEL_LAYOUTS[mode]
+    if mode == "P":
+        return PIXEL_LAYOUTS["RGBA" if "transparency" in (info or {}) else "RGB"]
+    return PIXEL_LAYOUTS[_MODE_FALLBACK.get(mode, "RGB")]
+
+
+def conversion_is_lossy(image: Image.Image) -> bool:
+    """True jika konversi ke layout native mengubah nilai piksel, sehingga dekripsi tidak memulihkannya."""
+    if image.mode in PIXEL_LAYOUTS or image.mode in _LOSSLESS_CONVERSIONS:
+        return False
+    if image.mode == "I":
+        low, high = image.getextrema()
+        return low < 0 or high > 0xFFFF
+    return True
+
+
+def estimate_image_memory(width: int, height: int, mode: str) -> int:
+    """
+    Estimasi puncak memori memproses satu gambar: buffer decode PIL, PNG output
+    (ciphertext praktis tidak terkompresi) beserta base64-nya, plus buffer strip.
+    """
+    pixels = width * height
+    decoded = pixels * _MODE_BYTES.get(mode, 4)
+    output = pixels * (4 if mode == "P" else native_layout(mode).pixel_bytes)
+    return decoded + output + (output * 4) // 3 + 3 * config.IMAGE_STRIP_BYTES
+
+
+def check_image_limits(width: int, height: int, mode: str) -> None:
+    pixels = width * height
+    if pixels > config.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(
+            f"Gambar {width}x{height} melebihi batas {config.MAX_IMAGE_PIXELS} piksel"
+        )
+    estimate = estimate_image_memory(width, height, mode)
+    if estimate > config.IMAGE_MEMORY_BUDGET_BYTES:
+        raise ImageTooLargeError(
+            f"Estimasi memori {estimate} byte melebihi budget {config.IMAGE_MEMORY_BUDGET_BYTES} byte"
+        )
+
+
+def _open_image(source) -> Image.Image:
+    """
+    Buka gambar dari bytes atau objek file (mis. mmap upload). Header dibaca dulu
+    agar batas piksel & budget memori dicek sebelum decode penuh.
+    """
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            image = Image.open(stream)
+            check_image_limits(image.width, image.height, image.mode)
+            image.load()
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ImageTooLargeError("Gambar ditolak: terdeteksi decompression bomb")
+    except (UnidentifiedImageError, OSError):
+        raise ValueError("File bukan gambar yang valid")
+    return image
+
+
+def strip_rows_for(width: int, strip_bytes: int | None = None, pixel_bytes: int = 3) -> int:
+    """
+    Jumlah baris per strip: sedekat mungkin dengan strip_bytes, dan selalu
+    menghasilkan strip kelipatan 16 byte agar batas strip = batas blok AES.
+    """
+    if strip_bytes is None:
+        strip_bytes = config.IMAGE_STRIP_BYTES
+    row_bytes = width * pixel_bytes
+    step = 16 // math.gcd(row_bytes, 16)
+    rows = (strip_bytes // row_bytes) // step * step
+    return max(step, rows)
+
+
+def _read_rows(image: Image.Image, y0: int, y1: int, layout: PixelLayout) -> np.ndarray:
+    """Ambil baris [y0, y1) sebagai array sample (rows, W, kanal) tanpa konversi seluruh gambar."""
+    strip = image.crop((0, y0, image.width, y1))
+    if strip.mode != layout.mode:
+        strip = strip.convert(layout.mode)
+    samples = np.asarray(strip)
+    return samples.reshape(samples.shape[0], samples.shape[1], len(layout.channels))
+
+
+def _sample_bytes(samples: np.ndarray) -> np.ndarray:
+    """Array sample -> byte flat yang dienkripsi (sample 16-bit big-endian, urutan PNG)."""
+    if samples.dtype == np.uint8:
+        return samples.reshape(-1)
+    return np.ascontiguousarray(samples, dtype=">u2").reshape(-1).view(np.uint8)
+
+
+def _byte_samples(data: np.ndarray, layout: PixelLayout) -> np.ndarray:
+    """Kebalikan _sample_bytes: byte flat -> sample (N, kanal) untuk analitik."""
+    if layout.sample_bytes == 1:
+        return data.reshape(-1, len(layout.channels))
+    return data.view(">u2").astype(np.uint16).reshape(-1, len(layout.channels))
+
+
+def _histogram_samples(samples: np.ndarray) -> np.ndarray:
+    # Histogram & entropy tetap 256 bin (ideal 8 bit); sample 16-bit memakai byte atasnya
+    return samples if samples.dtype == np.uint8 else (samples >> 8).astype(np.uint8)
+
+
+def _native_writer(
+    out: io.BytesIO, width: int, height: int, layout: PixelLayout, text: Optional[Dict[str, str]] = None
+) -> PngStreamWriter:
+    return PngStreamWriter(
+        out,
+        width,
+        height,
+        color_type=layout.color_type,
+        bit_depth=8 * layout.sample_bytes,
+        compress_level=config.PNG_COMPRESS_LEVEL,
+        text=text,
+    )
+
+
+def _iter_strips(height: int, rows: int, min_last_rows: int = 1) -> Iterator[Tuple[int, int]]:
+    """Strip [y0, y1); strip terakhir yang lebih pendek dari min_last_rows digabung ke strip sebelumnya."""
+    y0 = 0
+    while y0 < height:
+        y1 = min(y0 + rows, height)
+        if height - y1 < min_last_rows:
+            y1 = height
+        yield y0, y1
+        y0 = y1
+
+
+def _cts_min_rows(row_bytes: int) -> int:
+    # Strip terakhir CTS butuh minimal satu blok penuh untuk di-steal
+    return math.ceil(16 / row_bytes)
+
+
+def visual_layout(plain_len: int, width: int, pixel_bytes: int = 3) -> Tuple[int, int]:
+    """(panjang ciphertext PKCS7, tinggi gambar visualisasi) untuk plaintext plain_len byte."""
+    total_bytes = (plain_len // 16 + 1) * 16
+    pixels_needed = math.ceil(total_bytes / pixel_bytes)
+    new_height = math.ceil(pixels_needed / width)
+    # Marker panjang butuh 4 byte di area padding visual
+    padding_len = new_height * width * pixel_bytes - total_bytes
+    while 0 < padding_len < 4:
+        new_height += 1
+        padding_len += width * pixel_bytes
+    return total_bytes, new_height
+
+
+def encrypt_image_bytes(
+    contents,
+    tables: aes_numpy.CipherTables,
+    progress: Optional[aes_numpy.ProgressCallback] = None,
+    correlation_samples: Optional[int] = None,
+    correlation_seed: int = 0,
+    engine: Optional[str] = None,
+    padding: str = "pkcs7",
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Enkripsi gambar (bytes atau objek file) -> (PNG terenkripsi, analitik).
+
+    Diproses per strip baris: setiap strip dienkripsi ke buffer output yang
+    dialokasikan sekali lalu langsung dikirim ke penulis PNG inkremental, sehingga buffer
+    kerja AES dibatasi ukuran strip (config.IMAGE_STRIP_BYTES). Gambar tetap di-decode
+    utuh dan PNG output dibangun utuh di memori; puncaknya mengikuti dimensi gambar dan
+    dijaga lewat estimate_image_memory / config.IMAGE_MEMORY_BUDGET_BYTES.
+    progress(blok_selesai, total_blok) dipanggil setiap strip selesai; exception dari
+    callback (mis. pembatalan) menghentikan proses.
+    Korelasi piksel bertetangga memakai correlation_samples pasangan acak per arah
+    (default config.IMAGE_CORRELATION_SAMPLES); 0 = exact, semua pasangan.
+    engine: nama engine cipher (default: pilihan auto-tune untuk ukuran strip).
+    padding="cts": ciphertext stealing, gambar terenkripsi berdimensi sama persis dengan
+    aslinya (tanpa baris padding visual/marker panjang).
+    Buffer piksel dienkripsi dalam mode native-nya (L, LA, RGB, RGBA, 16-bit grayscale);
+    mode lain dikonversi ke mode native terdekat, dan analitik `lossy_conversion` menandai
+    konversi yang mengubah nilai piksel. Histogram/entropy dihitung per kanal native.
+    """
+    if padding not in PADDING_MODES:
+        raise ValueError(f"padding harus salah satu dari: {', '.join(PADDING_MODES)}")
+    cts = padding == "cts"
+    if correlation_samples is None:
+        correlation_samples = config.IMAGE_CORRELATION_SAMPLES
+    with timing.stage("decode"):
+        image = _open_image(contents)
+        width, height = image.size
+        layout = native_layout(image.mode, image.info)
+        source_mode, lossy = image.mode, conversion_is_lossy(image)
+
+    row_bytes = width * layout.pixel_bytes
+    plain_len = height * row_bytes
+    if cts:
+        total_bytes, new_height = plain_len, height
+    else:
+        total_bytes, new_height = visual_layout(plain_len, width, layout.pixel_bytes)
+    rows = strip_rows_for(width, pixel_bytes=layout.pixel_bytes)
+
+    n_channels = len(layout.channels)
+    orig_hist = HistogramAccumulator(layout.channels)
+    enc_hist = HistogramAccumulator(layout.channels)
+    orig_corr = CorrelationAccumulator(width, height, n_channels, correlation_samples, correlation_seed)
+    enc_corr = CorrelationAccumulator(width, new_height, n_channels, correlation_samples, correlation_seed)
+    text = {}
+    if cts:
+        text[PADDING_TEXT_KEY] = padding
+    if layout.mode != DEFAULT_PIXEL_MODE:
+        text[PIXEL_MODE_TEXT_KEY] = layout.mode
+    out_buffer = io.BytesIO()
+    writer = _native_writer(out_buffer, width, new_height, layout, text or None)
+    strip_out = np.empty(rows * row_bytes, dtype=np.uint8)  # dipakai ulang untuk setiap strip
+    backend = engines.registry.select(min(plain_len, strip_out.size), engine)
+    first_block = b""
+    total_blocks = math.ceil(total_bytes / 16)
+
+    for y0, y1 in _iter_strips(height, rows, _cts_min_rows(row_bytes) if cts else 1):
+        with timing.stage("decode"):
+            pixels = _read_rows(image, y0, y1, layout)
+            flat = _sample_bytes(pixels)
+        with timing.stage("histogram"):
+            orig_hist.add(_histogram_samples(pixels))
+        with timing.stage("correlation"):
+            orig_corr.add(pixels)
+        if y0 == 0:
+            first_block = flat[:32].tobytes()
+
+        if y1 < height:
+            # Strip penuh: panjangnya kelipatan 16, langsung dienkripsi
+            with timing.stage("aes"):
+                cipher = backend.encrypt_blocks(flat, tables, out=strip_out[:flat.size]).reshape(-1)
+        elif cts:
+            # Strip terakhir: ciphertext stealing, panjang output = panjang input
+            with timing.stage("aes"):
+                cipher = engines.encrypt_cts(flat, tables, backend.name)
+        else:
+            # Strip terakhir: PKCS7 padding + padding visual (marker panjang lalu 0xFF)
+            with timing.stage("aes"):
+                padded = np.frombuffer(pkcs7_pad(flat.tobytes()), dtype=np.uint8)
+                cipher_tail = backend.encrypt_blocks(padded, tables).reshape(-1)
+            vis_tail_len = new_height * row_bytes - y0 * row_bytes
+            tail = bytearray(cipher_tail.tobytes())
+            padding_len = vis_tail_len - len(tail)
+            if padding_len > 0:
+                tail.extend(total_bytes.to_bytes(4, 'big'))
+                tail.extend(b'\xFF' * (padding_len - 4))
+            cipher = np.frombuffer(bytes(tail), dtype=np.uint8)
+
+        cipher_samples = _byte_samples(cipher, layout)
+        with timing.stage("histogram"):
+            enc_hist.add(_histogram_samples(cipher_samples))
+        with timing.stage("correlation"):
+            enc_corr.add(cipher_samples)
+        with timing.stage("png"):
+            writer.write_rows(cipher)
+        if progress is not None:
+            progress(y1 * row_bytes // 16 if y1 < height else total_blocks, total_blocks)
+
+    with timing.stage("png"):
+        writer.close()
+        png_bytes = out_buffer.getvalue()
+
+    # --- ANALISIS DIFFERENTIAL ---
+    # Plaintext kedua hanya beda 1 byte (byte pertama + 1). Karena ECB memproses
+    # blok secara independen, ciphertext kedua identik kecuali blok pertama; cukup
+    # blok itu yang dienkripsi ulang untuk NPCR/UACI (hasil sama persis).
+    with timing.stage("aes_diff"):
+        npcr, uaci = _differential_first_block(first_block, plain_len, total_bytes, tables, cts)
+
+    with timing.stage("entropy"):
+        orig_entropy = orig_hist.entropy()
+        enc_entropy = enc_hist.entropy()
+
+    orig_chi = chi_square_from_histograms(orig_hist.counts)
+    enc_chi = chi_square_from_histograms(enc_hist.counts)
+    analytics = {
+        "original_entropy": round(orig_entropy, 4),
+        "encrypted_entropy": round(enc_entropy, 4),
+        "npcr": round(npcr, 4),
+        "uaci": round(uaci, 4),
+        "npr": 0, # Redundant dengan NPCR
+        "original_correlation": orig_corr.result(),
+        "encrypted_correlation": enc_corr.result(),
+        "correlation_samples": correlation_samples,
+        "original_chi_square": orig_chi,
+        "encrypted_chi_square": enc_chi,
+        "original_chi_square_passed": chi_square_passed(orig_chi),
+        "encrypted_chi_square_passed": chi_square_passed(enc_chi),
+        "original_histogram": orig_hist.to_dict(),
+        "encrypted_histogram": enc_hist.to_dict(),
+        "image_size": {"width": width, "height": new_height},
+        "padding": padding,
+        "pixel_mode": layout.mode,
+        "source_mode": source_mode,
+        "lossy_conversion": lossy,
+    }
+    return png_bytes, analytics
+
+
+def _differential_first_block(
+    first_plain: bytes, plain_len: int, total_bytes: int, tables: aes_numpy.CipherTables, cts: bool = False
+) -> Tuple[float, float]:
+    if cts and plain_len < 32:
+        # Blok pertama ikut ter-steal (atau keystream): enkripsi ulang seluruh plaintext kecil
+        block2 = bytearray(first_plain)
+        if plain_len > 0:
+            block2[0] = (block2[0] + 1) % 256
+        c1 = engines.encrypt_cts(np.frombuffer(first_plain, dtype=np.uint8), tables).astype(int)
+        c2 = engines.encrypt_cts(np.frombuffer(bytes(block2), dtype=np.uint8), tables).astype(int)
+        total_bytes = max(total_bytes, 1)
+        npcr = (np.sum(c1 != c2) / total_bytes) * 100.0
+        uaci = (np.sum(np.abs(c1 - c2)) / (total_bytes * 255.0)) * 100.0
+        return float(npcr), float(uaci)
+    if plain_len >= 16:
+        block1 = first_plain[:16]
+    else:
+        block1 = pkcs7_pad(first_plain)
+    block2 = bytearray(block1)
+    if plain_len > 0:
+        block2[0] = (block2[0] + 1) % 256 # Ubah 1 nilai byte
+    pair = np.frombuffer(bytes(block1) + bytes(block2), dtype=np.uint8)
+    enc = aes_numpy.encrypt_blocks(pair, tables)
+    c1 = enc[0].astype(int)
+    c2 = enc[1].astype(int)
+    npcr = (np.sum(c1 != c2) / total_bytes) * 100.0
+    uaci = (np.sum(np.abs(c1 - c2)) / (total_bytes * 255.0)) * 100.0
+    return float(npcr), float(uaci)
+
+
+def _find_ciphertext_len(image: Image.Image, layout: PixelLayout) -> int | None:
+    """Cari marker panjang ciphertext di area padding visual (hanya baris-baris terakhir)."""
+    width, height = image.size
+    row_bytes = width * layout.pixel_bytes
+    total_len = height * row_bytes
+    # Padding visual selalu kurang dari 2 baris + 8 byte, jadi cukup periksa baris-baris terakhir
+    tail_rows = min(height, 3 + math.ceil(8 / row_bytes))
+    tail_start = (height - tail_rows) * row_bytes
+    tail = _sample_bytes(_read_rows(image, height - tail_rows, height, layout)).tobytes()
+
+    max_valid_len = (total_len // 16) * 16
+    for test_len in range(max_valid_len, 15, -16):  # Test setiap kelipatan 16
+        if test_len < tail_start:
+            break
+        if test_len + 4 <= total_len:
+            pos = test_len - tail_start
+            stored_len = int.from_bytes(tail[pos:pos + 4], 'big')
+            if stored_len == test_len:
+                return stored_len
+    return None
+
+
+def _legacy_ciphertext(image: Image.Image) -> bytes:
+    # Fallback: Jika tidak menemukan metadata, gunakan seluruh data yang valid (kelipatan 16)
+    # Hapus trailing 0xFF (visual padding lama) atau 0x00
+    enc_bytes = _read_rows(image, 0, image.height, PIXEL_LAYOUTS[DEFAULT_PIXEL_MODE]).tobytes()
+    enc_bytes_trimmed = enc_bytes.rstrip(b'\xFF').rstrip(b'\x00')
+    valid_len = (len(enc_bytes_trimmed) // 16) * 16
+    if valid_len == 0:
+        raise ValueError("Ciphertext tidak valid atau kosong")
+    return enc_bytes_trimmed[:valid_len]
+
+
+def decrypt_image_bytes(
+    contents,
+    tables: aes_numpy.CipherTables,
+    progress: Optional[aes_numpy.ProgressCallback] = None,
+    engine: Optional[str] = None,
+) -> bytes:
+    """Dekripsi PNG hasil encrypt_image_bytes -> PNG gambar asli (diproses per strip)."""
+    with timing.stage("decode"):
+        enc_image = _open_image(contents)
+        width = enc_image.width
+        pixel_mode = enc_image.info.get(PIXEL_MODE_TEXT_KEY, DEFAULT_PIXEL_MODE)
+        if pixel_mode not in PIXEL_LAYOUTS:
+            raise ValueError(f"Mode piksel gambar terenkripsi tidak dikenal: {pixel_mode}")
+        layout = PIXEL_LAYOUTS[pixel_mode]
+        if enc_image.info.get(PADDING_TEXT_KEY) == "cts":
+            return _decrypt_cts_image(enc_image, layout, tables, progress, engine)
+        ciphertext_len = _find_ciphertext_len(enc_image, layout)
+
+    if ciphertext_len is None and layout.mode == DEFAULT_PIXEL_MODE:
+        # Format lama tanpa marker: dekripsi seluruh data sekaligus
+        ciphertext = _legacy_ciphertext(enc_image)
+        try:
+            with timing.stage("aes"):
+                decrypted_bytes = aes_numpy.decrypt_ecb(ciphertext, tables, use_padding=True)
+        except ValueError as e:
+            raise ValueError(f"Dekripsi gagal: {str(e)} (Cek Key/S-Box)")
+        original_height = len(decrypted_bytes) // layout.pixel_bytes // width
+        try:
+            dec_array = np.frombuffer(decrypted_bytes, dtype=np.uint8).reshape((original_height, width, 3))
+        except ValueError:
+            raise ValueError("Gagal merekonstruksi dimensi gambar asli.")
+        with timing.stage("png"):
+            buffer = io.BytesIO()
+            Image.fromarray(dec_array, "RGB").save(buffer, format="PNG", compress_level=config.PNG_COMPRESS_LEVEL)
+            return buffer.getvalue()
+    if ciphertext_len is None:
+        # Tanpa marker = ciphertext mengisi gambar tepat tanpa padding visual
+        ciphertext_len = enc_image.height * width * layout.pixel_bytes
+        if ciphertext_len % 16 != 0:
+            raise ValueError("Marker panjang ciphertext tidak ditemukan (Cek Key/S-Box)")
+
+    row_bytes = width * layout.pixel_bytes
+
+    # Blok terakhir didekripsi dulu: panjang padding -> dimensi asli diketahui sebelum mulai
+    last_block_row = (ciphertext_len - 16) // row_bytes
+    last_rows = _sample_bytes(_read_rows(enc_image, last_block_row, math.ceil(ciphertext_len / row_bytes), layout))
+    offset = ciphertext_len - 16 - last_block_row * row_bytes
+    try:
+        with timing.stage("aes"):
+            last_plain = aes_numpy.decrypt_ecb(last_rows[offset:offset + 16].tobytes(), tables, use_padding=True)
+    except ValueError as e:
+        raise ValueError(f"Dekripsi gagal: {str(e)} (Cek Key/S-Box)")
+    plain_len = ciphertext_len - 16 + len(last_plain)
+    if plain_len == 0 or plain_len % row_bytes != 0:
+        raise ValueError("Gagal merekonstruksi dimensi gambar asli.")
+    original_height = plain_len // row_bytes
+
+    rows = strip_rows_for(width, pixel_bytes=layout.pixel_bytes)
+    out_buffer = io.BytesIO()
+    writer = _native_writer(out_buffer, width, original_height, layout)
+    strip_out = np.empty(rows * row_bytes + 16, dtype=np.uint8)
+    backend = engines.registry.select(min(plain_len, strip_out.size), engine)
+
+    for y0, y1 in _iter_strips(original_height, rows):
+        start = y0 * row_bytes
+        end = y1 * row_bytes
+        # Ambil ciphertext sampai batas blok berikutnya (bisa melewati satu baris)
+        block_end = min(ciphertext_len, ((end + 15) // 16) * 16)
+        with timing.stage("decode"):
+            read_y1 = min(enc_image.height, math.ceil(block_end / row_bytes))
+            enc_strip = _sample_bytes(_read_rows(enc_image, y0, read_y1, layout))[: block_end - start]
+        with timing.stage("aes"):
+            plain = backend.decrypt_blocks(enc_strip, tables, out=strip_out[: enc_strip.size]).reshape(-1)
+        with timing.stage("png"):
+            writer.write_rows(plain[: end - start])
+        if progress is not None:
+            progress(block_end // 16, ciphertext_len // 16)
+
+    with timing.stage("png"):
+        writer.close()
+        return out_buffer.getvalue()
+
+
+def _decrypt_cts_image(
+    enc_image: Image.Image,
+    layout: PixelLayout,
+    tables: aes_numpy.CipherTables,
+    progress: Optional[aes_numpy.ProgressCallback],
+    engine: Optional[str],
+) -> bytes:
+    """Dekripsi gambar mode CTS: dimensi sama, strip sama dengan saat enkripsi."""
+    width, height = enc_image.size
+    row_bytes = width * layout.pixel_bytes
+    total_blocks = math.ceil(height * row_bytes / 16)
+    rows = strip_rows_for(width, pixel_bytes=layout.pixel_bytes)
+    out_buffer = io.BytesIO()
+    writer = _native_writer(out_buffer, width, height, layout)
+    strip_out = np.empty(rows * row_bytes, dtype=np.uint8)
+    backend = engines.registry.select(min(height * row_bytes, strip_out.size), engine)
+
+    for y0, y1 in _iter_strips(height, rows, _cts_min_rows(row_bytes)):
+        with timing.stage("decode"):
+            enc_strip = _sample_bytes(_read_rows(enc_image, y0, y1, layout))
+        with timing.stage("aes"):
+            if y1 < height:
+                plain = backend.decrypt_blocks(enc_strip, tables, out=strip_out[: enc_strip.size]).reshape(-1)
+            else:
+                plain = engines.decrypt_cts(enc_strip, tables, backend.name)
+        with timing.stage("png"):
+            writer.write_rows(plain)
+        if progress is not None:
+            progress(y1 * row_bytes // 16 if y1 < height else total_blocks, total_blocks)
+
+    with timing.stage("png"):
+        writer.close()
+        return out_buffer.getvalue()
+
+
+def image_pixels(source) -> Optional[int]:
+    """Jumlah piksel dari header gambar tanpa decode (estimasi biaya); None bila tidak terbaca."""
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            image = Image.open(stream)
+            return image.width * image.height
+    except Exception:
+        return None
+    finally:
+        if stream is source:
+            source.seek(0)
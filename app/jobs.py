@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from . import aes_numpy, config, image_pipeline, timing
+from .aes_core import derive_key_from_input, pkcs7_pad
+
+# Status job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+# Parameter rahasia: hanya disimpan di memori proses, tidak pernah ditulis ke SQLite
+SECRET_PARAMS = ("key_hex",)
+
+# Jenis job -> (nama file hasil, media type hasil)
+JOB_KINDS: Dict[str, tuple] = {
+    "image_encrypt": ("result.png", "image/png"),
+    "image_decrypt": ("result.png", "image/png"),
+    "text_encrypt": ("result.json", "application/json"),
+    "batch_encrypt": ("result.json", "application/json"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    result_meta TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+
+class JobCancelled(Exception):
+    """Dilempar dari callback progress saat job dibatalkan."""
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Antrian job in-process: worker pool thread + persistensi SQLite.
+    Input job disimpan di disk, tetapi kunci (SECRET_PARAMS) hanya di memori: job yang
+    belum selesai saat restart ditandai gagal dan harus di-submit ulang.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        data_dir: str,
+        concurrency: int,
+        max_pending: int,
+        ttl_seconds: int,
+    ):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        self._secrets: Dict[str, Dict[str, Any]] = {}
+        self._stop = threading.Event()
+        self._cleaner: Optional[threading.Thread] = None
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        if self._conn is not None:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        self._stop.clear()
+
+        # Job yang terputus karena restart diantrikan ulang dari awal (kunci dari baris
+        # lama yang masih menyimpannya dipindah ke memori lalu dihapus dari database)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress_done = 0, updated_at = ? WHERE status = ?",
+                (QUEUED, now, RUNNING),
+            )
+            rows = self._conn.execute("SELECT id, status, params FROM jobs ORDER BY created_at").fetchall()
+            pending = []
+            for row in rows:
+                params = json.loads(row["params"])
+                secrets = _split_secrets(params)
+                if secrets:
+                    self._conn.execute("UPDATE jobs SET params = ? WHERE id = ?", (json.dumps(params), row["id"]))
+                if row["status"] == QUEUED:
+                    if secrets:
+                        self._secrets[row["id"]] = secrets
+                    pending.append(row["id"])
+        for job_id in pending:
+            self._dispatch(job_id)
+
+        self._cleaner = threading.Thread(target=self._cleanup_loop, name="job-cleaner", daemon=True)
+        self._cleaner.start()
+
+    def stop(self) -> None:
+        if self._conn is None:
+            return
+        self._stop.set()
+        for flag in list(self._cancel_flags.values()):
+            flag.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            # Job yang terhenti karena shutdown dikembalikan ke antrian untuk start berikutnya
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress_done = 0 WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.close()
+        self._conn = None
+        self._executor = None
+        self._secrets.clear()
+
+    # --- API ---
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.data_dir, job_id)
+
+    def submit(self, kind: str, params: Dict[str, Any], payload: bytes) -> str:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Jenis job tidak dikenal: {kind}")
+        with self._lock:
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+        if pending >= self.max_pending:
+            raise JobQueueFull(f"Antrian job penuh ({self.max_pending})")
+
+        job_id = uuid.uuid4().hex
+        params = dict(params)
+        self._secrets[job_id] = _split_secrets(params)
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        with open(os.path.join(self.job_dir(job_id), "input.bin"), "wb") as f:
+            f.write(payload)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), now, now),
+            )
+        self._dispatch(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop("params")
+        job["result_meta"] = json.loads(job["result_meta"]) if job["result_meta"] else None
+        if job["finished_at"] is not None:
+            job["expires_at"] = job["finished_at"] + self.ttl_seconds
+        else:
+            job["expires_at"] = None
+        return job
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        job = self.get(job_id)
+        if job is None or job["status"] != DONE:
+            return None
+        return os.path.join(self.job_dir(job_id), JOB_KINDS[job["kind"]][0])
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Batalkan job aktif, atau hapus job yang sudah selesai. Return status akhir."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in FINISHED_STATUSES:
+            self._delete(job_id)
+            return "deleted"
+        flag = self._cancel_flags.get(job_id)
+        if flag is not None:
+            flag.set()
+        self._finish(job_id, CANCELLED, error="Dibatalkan oleh pengguna", only_if_active=True)
+        return CANCELLED
+
+    # --- internal ---
+
+    def _dispatch(self, job_id: str) -> None:
+        self._cancel_flags[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None,
+                result_meta: Optional[Dict[str, Any]] = None, only_if_active: bool = False) -> None:
+        self._secrets.pop(job_id, None)
+        now = time.time()
+        sql = "UPDATE jobs SET status = ?, error = ?, result_meta = ?, updated_at = ?, finished_at = ? WHERE id = ?"
+        if only_if_active:
+            sql += f" AND status IN ('{QUEUED}', '{RUNNING}')"
+        with self._lock:
+            self._conn.execute(
+                sql,
+                (status, error, json.dumps(result_meta) if result_meta is not None else None, now, now, job_id),
+            )
+
+    def _delete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._cancel_flags.pop(job_id, None)
+        self._secrets.pop(job_id, None)
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != QUEUED:
+            # Dibatalkan/dihapus selagi masih antre: flag dari _dispatch tidak akan dipakai lagi
+            self._cancel_flags.pop(job_id, None)
+            return
+        cancel_flag = self._cancel_flags.setdefault(job_id, threading.Event())
+        kind = row["kind"]
+        secrets = self._secrets.get(job_id)
+        if secrets is None:
+            self._finish(job_id, FAILED, error="Kunci job tidak tersedia setelah restart server; submit ulang job",
+                         only_if_active=True)
+            self._cancel_flags.pop(job_id, None)
+            return
+        params = {**json.loads(row["params"]), **secrets}
+        self._update(job_id, status=RUNNING)
+        timing.begin_request(f"job:{kind}")
+
+        last_write = [0.0]
+
+        def progress(done: int, total: int) -> None:
+            if cancel_flag.is_set():
+                raise JobCancelled()
+            # Batasi frekuensi tulis ke SQLite
+            now = time.monotonic()
+            if done >= total or now - last_write[0] > 0.2:
+                last_write[0] = now
+                self._update(job_id, progress_done=done, progress_total=total)
+
+        try:
+            with open(os.path.join(self.job_dir(job_id), "input.bin"), "rb") as f:
+                payload = f.read()
+            result_bytes, meta = _RUNNERS[kind](payload, params, progress)
+            if cancel_flag.is_set():
+                raise JobCancelled()
+            out_path = os.path.join(self.job_dir(job_id), JOB_KINDS[kind][0])
+            with open(out_path, "wb") as f:
+                f.write(result_bytes)
+            self._finish(job_id, DONE, result_meta=meta, only_if_active=True)
+        except JobCancelled:
+            if self._stop.is_set():
+                return  # shutdown: status dikembalikan ke queued oleh stop()
+            self._finish(job_id, CANCELLED, error="Dibatalkan oleh pengguna", only_if_active=True)
+        except ValueError as e:
+            self._finish(job_id, FAILED, error=str(e), only_if_active=True)
+        except Exception as e:  # job tidak boleh menjatuhkan worker
+            self._finish(job_id, FAILED, error=f"Error internal: {e}", only_if_active=True)
+        finally:
+            self._cancel_flags.pop(job_id, None)
+
+    def _cleanup_loop(self) -> None:
+        while not self._stop.wait(60):
+            self.cleanup_expired()
+
+    def cleanup_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                row["id"] for row in self._conn.execute(
+                    "SELECT id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,)
+                )
+            ]
+        for job_id in expired:
+            self._delete(job_id)
+        return len(expired)
+
+
+def _split_secrets(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Pindahkan SECRET_PARAMS keluar dari params (in-place) dan kembalikan nilainya."""
+    return {name: params.pop(name) for name in SECRET_PARAMS if name in params}
+
+
+# --- Runner per jenis job: (payload, params, progress) -> (bytes hasil, metadata) ---
+
+def _tables_from_params(params: Dict[str, Any]) -> aes_numpy.CipherTables:
+    return aes_numpy.prepare_cipher(derive_key_from_input(params["key_hex"]), params["sbox"])
+
+
+def _run_image_encrypt(payload: bytes, params: Dict[str, Any], progress) -> tuple:
+    png_bytes, analytics = image_pipeline.encrypt_image_bytes(payload, _tables_from_params(params), progress)
+    return png_bytes, {"used_mode": params["mode"], **analytics}
+
+
+def _run_image_decrypt(payload: bytes, params: Dict[str, Any], progress) -> tuple:
+    png_bytes = image_pipeline.decrypt_image_bytes(payload, _tables_from_params(params), progress)
+    return png_bytes, {"used_mode": params["mode"]}
+
+
+def _run_text_encrypt(payload: bytes, params: Dict[str, Any], progress) -> tuple:
+    tables = _tables_from_params(params)
+    padded = np.frombuffer(pkcs7_pad(payload), dtype=np.uint8)
+    ciphertext = aes_numpy.encrypt_blocks(padded, tables, progress=progress, chunk_blocks=1 << 14)
+    result = {
+        "ciphertext_hex": ciphertext.tobytes().hex(),
+        "used_mode": params["mode"],
+        "plaintext_len": len(payload),
+    }
+    return json.dumps(result).encode("utf-8"), {"used_mode": params["mode"], "plaintext_len": len(payload)}
+
+
+def _run_batch_encrypt(payload: bytes, params: Dict[str, Any], progress) -> tuple:
+    tables = _tables_from_params(params)
+    plaintexts: List[str] = json.loads(payload.decode("utf-8"))
+    padded = [pkcs7_pad(pt.encode("utf-8")) for pt in plaintexts]
+    joined = b"".join(padded)
+    if joined:
+        ct_all = aes_numpy.encrypt_blocks(
+            np.frombuffer(joined, dtype=np.uint8), tables, progress=progress, chunk_blocks=1 << 14
+        ).tobytes()
+    else:
+        ct_all = b""
+    results = []
+    offset = 0
+    for item in padded:
+        results.append({"ciphertext_hex": ct_all[offset:offset + len(item)].hex(), "error": None})
+        offset += len(item)
+    body = {"results": results, "used_mode": params["mode"], "count": len(results)}
+    return json.dumps(body).encode("utf-8"), {"used_mode": params["mode"], "count": len(results)}
+
+
+_RUNNERS: Dict[str, Callable] = {
+    "image_encrypt": _run_image_encrypt,
+    "image_decrypt": _run_image_decrypt,
+    "text_encrypt": _run_text_encrypt,
+    "batch_encrypt": _run_batch_encrypt,
+}
+
+
+queue = JobQueue(
+    db_path=config.JOBS_DB_PATH,
+    data_dir=config.JOBS_DATA_DIR,
+    concurrency=config.JOBS_CONCURRENCY,
+    max_pending=config.JOBS_MAX_PENDING,
+    ttl_seconds=config.JOBS_TTL_SECONDS,
+)
@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import http.client
+import io
+import json
+import math
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+from PIL import Image
+
+# Skenario -> (method, path); bobot default campuran request
+SCENARIOS: Dict[str, Tuple[str, str]] = {
+    "encrypt": ("POST", "/encrypt"),
+    "decrypt": ("POST", "/decrypt"),
+    "image_encrypt": ("POST", "/image/encrypt"),
+    "image_decrypt": ("POST", "/image/decrypt"),
+    "sbox_metrics": ("POST", "/sbox/metrics"),
+}
+DEFAULT_MIX = "encrypt=4,decrypt=4,image_encrypt=1,image_decrypt=1,sbox_metrics=2"
+PERCENTILES = (50, 95, 99)
+
+Request = Tuple[str, str, bytes, Dict[str, str]]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'encrypt=4,image_encrypt=1' -> {skenario: bobot}."""
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"skenario tidak dikenal: {name} (pilihan: {', '.join(SCENARIOS)})")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"bobot tidak valid untuk {name}: {weight}")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("mix kosong")
+    return mix
+
+
+def synthetic_png(width: int, height: int, seed: int = 0) -> bytes:
+    """Gambar uji: gradien + noise (mirip foto, tidak seragam dan tidak sepenuhnya acak)."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // max(1, width - 1), y * 255 // max(1, height - 1), (x + y) % 256], axis=-1)
+    noise = rng.integers(-16, 17, size=base.shape)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes, str]]) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts: List[bytes] = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, (filename, data, content_type) in files.items():
+        parts.append(
+            (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode("utf-8")
+            + data
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class _Connection:
+    """Koneksi HTTP keep-alive per thread; dibuka ulang otomatis setelah error."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host, self.port, self.timeout = host, port, timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self._conn.request(method, path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            return response.status, response.read()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+@dataclass
+class Fixtures:
+    """
+    Payload siap pakai; ciphertext dibuat lewat server target agar cocok dengan konfigurasinya.
+    Skenario enkripsi memakai kunci unik per request agar tidak dilayani cache hasil,
+    kecuali cached=True (mengukur cache hit).
+    """
+    key: str
+    mode: str
+    plaintext: str
+    ciphertext_hex: str
+    image_png: bytes
+    encrypted_png: bytes
+    sboxes: List[List[int]]
+    cached: bool = False
+
+    def _encrypt_key(self, rng: random.Random) -> str:
+        return self.key if self.cached else f"{self.key}-{rng.getrandbits(64):016x}"
+
+    def build(self, scenario: str, rng: random.Random) -> Request:
+        json_headers = {"Content-Type": "application/json"}
+        if scenario == "encrypt":
+            body = {"mode": self.mode, "key_hex": self._encrypt_key(rng), "plaintext": self.plaintext}
+            return "POST", "/encrypt", json.dumps(body).encode(), json_headers
+        if scenario == "decrypt":
+            body = {"mode": self.mode, "key_hex": self.key, "ciphertext_hex": self.ciphertext_hex}
+            return "POST", "/decrypt", json.dumps(body).encode(), json_headers
+        if scenario == "sbox_metrics":
+            body = {"sbox": rng.choice(self.sboxes)}
+            return "POST", "/sbox/metrics", json.dumps(body).encode(), json_headers
+        if scenario == "image_encrypt":
+            fields = {"mode": self.mode, "key_hex": self._encrypt_key(rng)}
+            data, content_type = multipart(fields, {"file": ("load.png", self.image_png, "image/png")})
+            path = "/image/encrypt"
+        else:
+            fields = {"mode": self.mode, "key_hex": self.key}
+            data, content_type = multipart(fields, {"file": ("load.enc.png", self.encrypted_png, "image/png")})
+            path = "/image/decrypt"
+        return "POST", path, data, {"Content-Type": content_type}
+
+
+def prepare_fixtures(
+    conn: _Connection, image_size: Tuple[int, int], seed: int, sbox_variety: int, cached: bool = False
+) -> Fixtures:
+    rng = random.Random(seed)
+    key = f"loadtest-{seed}"
+    mode = "sbox44"
+    plaintext = "Load test plaintext " * 8
+    status, raw = conn.request(
+        "POST", "/encrypt", json.dumps({"mode": mode, "key_hex": key, "plaintext": plaintext}).encode(),
+        {"Content-Type": "application/json"},
+    )
+    if status != 200:
+        raise RuntimeError(f"setup /encrypt gagal: HTTP {status} {raw[:200]!r}")
+    ciphertext_hex = json.loads(raw)["ciphertext_hex"]
+
+    image_png = synthetic_png(*image_size, seed=seed)
+    data, content_type = multipart({"mode": mode, "key_hex": key}, {"file": ("load.png", image_png, "image/png")})
+    status, raw = conn.request("POST", "/image/encrypt", data, {"Content-Type": content_type})
+    if status != 200:
+        raise RuntimeError(f"setup /image/encrypt gagal: HTTP {status} {raw[:200]!r}")
+    encrypted_png = base64.b64decode(json.loads(raw)["encrypted_image_base64"])
+
+    # Campuran S-Box custom acak (tidak ter-cache sebelumnya) untuk /sbox/metrics
+    sboxes = []
+    for _ in range(max(1, sbox_variety)):
+        sbox = list(range(256))
+        rng.shuffle(sbox)
+        sboxes.append(sbox)
+    return Fixtures(key, mode, plaintext, ciphertext_hex, image_png, encrypted_png, sboxes, cached)
+
+
+@dataclass
+class _Samples:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile dari list yang sudah terurut."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(samples: _Samples, elapsed: float) -> Dict[str, object]:
+    values = sorted(samples.latencies)
+    count = len(values)
+    summary: Dict[str, object] = {
+        "requests": count,
+        "errors": samples.errors,
+        "error_rate": round(samples.errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+        "max_ms": round(values[-1] * 1000, 2) if count else 0.0,
+        "status": dict(sorted(samples.statuses.items())),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 2)
+    return summary
+
+
+def run_load(
+    host: str,
+    port: int,
+    fixtures: Fixtures,
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: Optional[float],
+    total_requests: Optional[int],
+    seed: int = 0,
+    timeout: float = 120.0,
+) -> Dict[str, object]:
+    """Jalankan `concurrency` thread klien sampai durasi habis atau total request tercapai."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, _Samples] = {name: _Samples() for name in names}
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_ticket() -> bool:
+        with lock:
+            if total_requests is not None and issued[0] >= total_requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        conn = _Connection(host, port, timeout)
+        try:
+            while (deadline is None or time.perf_counter() < deadline) and next_ticket():
+                scenario = rng.choices(names, weights)[0]
+                method, path, body, headers = fixtures.build(scenario, rng)
+                start = time.perf_counter()
+                try:
+                    status, _ = conn.request(method, path, body, headers)
+                    label = str(status)
+                    failed = not 200 <= status < 300
+                except Exception as exc:
+                    label = type(exc).__name__
+                    failed = True
+                elapsed = time.perf_counter() - start
+                with lock:
+                    entry = samples[scenario]
+                    entry.latencies.append(elapsed)
+                    entry.statuses[label] = entry.statuses.get(label, 0) + 1
+                    entry.errors += failed
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    combined = _Samples()
+    for entry in samples.values():
+        combined.latencies.extend(entry.latencies)
+        combined.errors += entry.errors
+        for label, n in entry.statuses.items():
+            combined.statuses[label] = combined.statuses.get(label, 0) + n
+    return {
+        "config": {
+            "concurrency": concurrency,
+            "duration_seconds": duration,
+            "requests": total_requests,
+            "mix": mix,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": {SCENARIOS[name][1]: _summarize(samples[name], elapsed) for name in names},
+        "total": _summarize(combined, elapsed),
+    }
+
+
+def format_table(report: Dict[str, object]) -> str:
+    header = ("endpoint", "req", "err%", "rps", "p50 ms", "p95 ms", "p99 ms", "max ms")
+    rows = []
+    for name, s in list(report["endpoints"].items()) + [("TOTAL", report["total"])]:
+        rows.append((
+            name,
+            str(s["requests"]),
+            f"{s['error_rate'] * 100:.1f}",
+            f"{s['throughput_rps']:.1f}",
+            f"{s['p50_ms']:.1f}",
+            f"{s['p95_ms']:.1f}",
+            f"{s['p99_ms']:.1f}",
+            f"{s['max_ms']:.1f}",
+        ))
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    lines = ["  ".join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(header, widths)))]
+    lines.append("  ".join("-" * w for w in widths))
+    for row in rows:
+        lines.append("  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(row, widths))))
+    return "\n".join(lines)
+
+
+class InProcessServer:
+    """Uvicorn di thread terpisah, listen di 127.0.0.1 dengan port acak."""
+
+    def __init__(self, log_level: str = "warning"):
+        import uvicorn
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self.host, self.port = self._sock.getsockname()
+        config = uvicorn.Config("app.main:app", log_level=log_level, access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def __enter__(self) -> "InProcessServer":
+        self._thread.start()
+        deadline = time.monotonic() + 120
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("server in-process gagal start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=30)
+        self._sock.close()
+
+
+def _parse_size(spec: str) -> Tuple[int, int]:
+    try:
+        width, height = (int(v) for v in spec.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("format ukuran: LEBARxTINGGI, mis. 512x512")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError("ukuran gambar harus positif")
+    return width, height
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.loadtest",
+        description="Load test endpoint API (offline): throughput, p50/p95/p99 dan error rate per endpoint",
+    )
+    parser.add_argument("--url", help="server target (mis. http://127.0.0.1:8000); default: jalankan app in-process")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="jumlah klien paralel")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="durasi (detik)")
+    parser.add_argument("-n", "--requests", type=int, help="total request (menggantikan --duration)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"bobot skenario (default: {DEFAULT_MIX})")
+    parser.add_argument("--image-size", type=_parse_size, default=(256, 256), help="ukuran gambar uji, default 256x256")
+    parser.add_argument("--sbox-variety", type=int, default=16, help="jumlah S-Box acak berbeda untuk /sbox/metrics")
+    parser.add_argument("--seed", type=int, default=0, help="seed data uji dan pemilihan skenario")
+    parser.add_argument(
+        "--cached", action="store_true",
+        help="ulangi payload enkripsi identik (mengukur cache hasil); default kunci unik per request",
+    )
+    parser.add_argument("--warmup", type=int, default=5, help="request pemanasan per skenario (tidak dihitung)")
+    parser.add_argument("--json", dest="json_path", help="tulis laporan JSON ke file ('-' = stdout)")
+    return parser
+
+
+def _warm_up(host: str, port: int, fixtures: Fixtures, mix: Dict[str, float], count: int, seed: int) -> None:
+    conn = _Connection(host, port, 120.0)
+    rng = random.Random(seed)
+    try:
+        for scenario in mix:
+            for _ in range(count):
+                conn.request(*fixtures.build(scenario, rng))
+    finally:
+        conn.close()
+
+
+def run(args: argparse.Namespace) -> int:
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.concurrency < 1:
+        print("error: concurrency minimal 1", file=sys.stderr)
+        return 2
+    duration = None if args.requests else args.duration
+
+    def execute(host: str, port: int) -> Dict[str, object]:
+        conn = _Connection(host, port, 120.0)
+        try:
+            fixtures = prepare_fixtures(conn, args.image_size, args.seed, args.sbox_variety, args.cached)
+        finally:
+            conn.close()
+        _warm_up(host, port, fixtures, mix, args.warmup, args.seed)
+        report = run_load(host, port, fixtures, mix, args.concurrency, duration, args.requests, args.seed)
+        report["target"] = f"http://{host}:{port}"
+        report["config"]["image_size"] = list(args.image_size)
+        report["config"]["cached"] = args.cached
+        return report
+
+    try:
+        if args.url:
+            parts = urlsplit(args.url)
+            if parts.scheme != "http" or not parts.hostname:
+                print("error: --url harus http://host:port", file=sys.stderr)
+                return 2
+            report = execute(parts.hostname, parts.port or 80)
+        else:
+            with InProcessServer() as server:
+                report = execute(server.host, server.port)
+    except (OSError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_table(report))
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    return 1 if report["total"]["errors"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return run(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,20 +2,22 @@ from __future__ import annotations
 
 import json
 import secrets
+import threading
+import time
 import hashlib
-import math
 import numpy as np
-from PIL import Image
-import io
 import base64
-from typing import Optional, Dict, List
+from contextlib import closing
+from typing import Optional, List, Union
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 
-from . import schemas
+from . import admission, aes_numpy, config, engines, gf256, image_batch, image_pipeline, jobs, result_cache, sbox_cache, sbox_optimizer, sbox_shm, schemas, streaming, timing, uploads
 from .aes_core import (
-    AES_INVERSE_TABLE,
     AES_STANDARD_SBOX,
     SBOX_44,
     K44_AFFINE_MATRIX,  
@@ -23,10 +25,8 @@ from .aes_core import (
     decrypt_hex_to_text,
     encrypt_text_to_hex,
     validate_sbox,
-    aes_encrypt_ecb,
-    aes_decrypt_ecb,
-    build_inv_sbox,
-    pkcs7_pad # Pastikan fungsi ini ada di aes_core.py atau di-import
+    pkcs7_pad, # Pastikan fungsi ini ada di aes_core.py atau di-import
+    pkcs7_unpad,
 )
 from .sbox_metrics import analyze_sbox
 
@@ -44,9 +44,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_label(request: Request) -> str:
+    """Path template route (mis. /image/encrypt) agar label metrik tidak meledak."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    endpoint = _route_label(request)
+    timings = timing.begin_request(endpoint)
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    response.headers["Server-Timing"] = timing.server_timing_header(timings, elapsed)
+    if endpoint != "/metrics":
+        timing.registry.observe_request(endpoint, response.status_code, elapsed)
+    return response
+
+
+# Batas body per endpoint, dari Content-Length maupun byte yang benar-benar diterima (chunked)
+app.add_middleware(uploads.BodyLimitMiddleware)
+
+
+@app.exception_handler(admission.AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: admission.AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "sbox_cache": sbox_cache.warmup_info or None,
+        "engines": engines.registry.report(),
+        "admission": admission.controller.status(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Histogram timing per stage dan counter dalam format teks Prometheus."""
+    return PlainTextResponse(
+        timing.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 # --- Helper Functions ---
 
@@ -80,10 +129,17 @@ def _resolve_sbox_from_form(mode: str, sbox_json: str | None) -> list[int]:
         return parsed
     raise HTTPException(status_code=400, detail="mode harus 'standard', 'sbox44', atau 'custom'")
 
+def _select_engine(nbytes: int, name: str | None) -> engines.Engine:
+    """Engine cipher untuk payload nbytes; nama engine dari request divalidasi ke registry."""
+    try:
+        return engines.registry.select(nbytes, name or None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # --- Text Endpoints ---
 
 @app.post("/encrypt", response_model=schemas.EncryptResponse)
-def encrypt(req: schemas.EncryptRequest):
+def encrypt(req: schemas.EncryptRequest, response: Response):
     if req.plaintext_hex:
         try:
             pt_bytes = bytes.fromhex(req.plaintext_hex)
@@ -95,27 +151,52 @@ def encrypt(req: schemas.EncryptRequest):
     else:
         raise HTTPException(status_code=400, detail="plaintext atau plaintext_hex harus diisi")
 
-    sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    with timing.stage("sbox"):
+        sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    timing.count_mode(req.mode)
 
+    pt_bytes = plaintext_str.encode("utf-8")
     try:
-        ciphertext_hex = encrypt_text_to_hex(plaintext_str, req.key_hex, sbox)
+        key = derive_key_from_input(req.key_hex)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    cache_key = cached = None
+    if result_cache.cache.enabled and len(pt_bytes) >= config.RESULT_CACHE_MIN_BYTES:
+        with timing.stage("cache"):
+            cache_key = result_cache.make_key("text_encrypt", pt_bytes, key, sbox, req.mode)
+            cached = result_cache.cache.get("text_result", cache_key)
+    if cached is not None:
+        ciphertext_hex = cached[0].hex()
+    else:
+        try:
+            with timing.stage("aes"):
+                ciphertext_hex = encrypt_text_to_hex(plaintext_str, req.key_hex, sbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        result_cache.cache.put(cache_key, bytes.fromhex(ciphertext_hex), {})
+    response.headers["X-Cache"] = "HIT" if cached is not None else "MISS"
+    timing.add_bytes("in", len(pt_bytes))
+    timing.add_bytes("out", len(ciphertext_hex) // 2)
+
     return schemas.EncryptResponse(
         ciphertext_hex=ciphertext_hex,
         used_mode=req.mode,
-        plaintext_len=len(plaintext_str.encode("utf-8")),
+        plaintext_len=len(pt_bytes),
     )
 
 @app.post("/decrypt", response_model=schemas.DecryptResponse)
 def decrypt(req: schemas.DecryptRequest):
-    sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    with timing.stage("sbox"):
+        sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    timing.count_mode(req.mode)
 
     try:
-        plaintext_str = decrypt_hex_to_text(req.ciphertext_hex, req.key_hex, sbox)
+        with timing.stage("aes"):
+            plaintext_str = decrypt_hex_to_text(req.ciphertext_hex, req.key_hex, sbox)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    timing.add_bytes("in", len(req.ciphertext_hex) // 2)
 
     return schemas.DecryptResponse(
         plaintext=plaintext_str,
@@ -123,11 +204,199 @@ def decrypt(req: schemas.DecryptRequest):
         used_mode=req.mode,
     )
 
+# --- Batch Text Endpoints ---
+
+def _prepare_batch_cipher(mode: str, sbox: list[int] | None, key_hex: str, count: int) -> aes_numpy.CipherTables:
+    """Resolusi S-Box, derivasi kunci dan key expansion sekali untuk seluruh batch."""
+    if count > config.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Jumlah item melebihi batas ({config.BATCH_MAX_ITEMS})",
+        )
+    with timing.stage("sbox"):
+        resolved = _resolve_sbox_from_body(mode, sbox)
+    timing.count_mode(mode)
+    try:
+        with timing.stage("key_schedule"):
+            key = derive_key_from_input(key_hex)
+            return aes_numpy.prepare_cipher(key, resolved)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/encrypt/batch", response_model=schemas.BatchEncryptResponse)
+def encrypt_batch(req: schemas.BatchEncryptRequest):
+    tables = _prepare_batch_cipher(req.mode, req.sbox, req.key_hex, len(req.plaintexts))
+
+    # Semua item di-pad lalu digabung jadi satu buffer agar dienkripsi dalam satu pass
+    with timing.stage("pack"):
+        padded = [pkcs7_pad(pt.encode("utf-8")) for pt in req.plaintexts]
+        joined = b"".join(padded)
+    engine = _select_engine(len(joined), req.engine)
+    with timing.stage("aes"):
+        if joined:
+            ct_all = engine.encrypt_blocks(np.frombuffer(joined, dtype=np.uint8), tables).tobytes()
+        else:
+            ct_all = b""
+    timing.add_bytes("in", len(joined))
+
+    with timing.stage("unpack"):
+        results = []
+        offset = 0
+        for item in padded:
+            results.append(schemas.BatchEncryptItem(ciphertext_hex=ct_all[offset:offset + len(item)].hex()))
+            offset += len(item)
+
+    return schemas.BatchEncryptResponse(results=results, used_mode=req.mode, count=len(results))
+
+@app.post("/decrypt/batch", response_model=schemas.BatchDecryptResponse)
+def decrypt_batch(req: schemas.BatchDecryptRequest):
+    tables = _prepare_batch_cipher(req.mode, req.sbox, req.key_hex, len(req.ciphertexts_hex))
+
+    # Item yang tidak valid dicatat error-nya, sisanya digabung untuk satu pass dekripsi
+    with timing.stage("pack"):
+        errors: list[str | None] = []
+        chunks: list[bytes] = []
+        for ct_hex in req.ciphertexts_hex:
+            try:
+                ct = bytes.fromhex(ct_hex)
+            except ValueError:
+                errors.append("ciphertext_hex bukan hex yang valid")
+                chunks.append(b"")
+                continue
+            if not ct or len(ct) % 16 != 0:
+                errors.append("Ciphertext harus kelipatan 16 byte (blok AES).")
+                chunks.append(b"")
+                continue
+            errors.append(None)
+            chunks.append(ct)
+        joined = b"".join(chunks)
+    engine = _select_engine(len(joined), req.engine)
+    with timing.stage("aes"):
+        if joined:
+            pt_all = engine.decrypt_blocks(np.frombuffer(joined, dtype=np.uint8), tables).tobytes()
+        else:
+            pt_all = b""
+    timing.add_bytes("in", len(joined))
+
+    with timing.stage("unpack"):
+        results = []
+        offset = 0
+        for chunk, error in zip(chunks, errors):
+            block = pt_all[offset:offset + len(chunk)]
+            offset += len(chunk)
+            if error is not None:
+                results.append(schemas.BatchDecryptItem(error=error))
+                continue
+            try:
+                pt_bytes = pkcs7_unpad(block)
+            except ValueError as e:
+                results.append(schemas.BatchDecryptItem(error=str(e)))
+                continue
+            plaintext_str = pt_bytes.decode("utf-8", errors="replace")
+            results.append(schemas.BatchDecryptItem(
+                plaintext=plaintext_str,
+                plaintext_hex=plaintext_str.encode("utf-8").hex(),
+            ))
+
+    return schemas.BatchDecryptResponse(results=results, used_mode=req.mode, count=len(results))
+
+# --- Raw Binary Data Endpoints ---
+
+async def _read_data_body(request: Request) -> bytes:
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > config.DATA_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body melebihi batas {config.DATA_MAX_BYTES} byte")
+    with timing.stage("read"):
+        body = await request.body()
+    if len(body) > config.DATA_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Body melebihi batas {config.DATA_MAX_BYTES} byte")
+    timing.add_bytes("in", len(body))
+    return body
+
+def _prepare_data_cipher(request: Request, mode: str, key_hex: str | None, sbox_json: str | None) -> aes_numpy.CipherTables:
+    """Kunci & S-Box dari query parameter, atau header X-AES-Key / X-AES-SBox."""
+    key_input = key_hex or request.headers.get("x-aes-key")
+    if not key_input:
+        raise HTTPException(status_code=400, detail="key_hex (query) atau header X-AES-Key wajib diisi")
+    with timing.stage("sbox"):
+        sbox = _resolve_sbox_from_form(mode, sbox_json or request.headers.get("x-aes-sbox"))
+    timing.count_mode(mode)
+    try:
+        with timing.stage("key_schedule"):
+            key = derive_key_from_input(key_input)
+            return aes_numpy.prepare_cipher(key, sbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/data/encrypt", response_class=Response)
+async def data_encrypt(
+    request: Request,
+    mode: str = "standard",
+    key_hex: Optional[str] = None,
+    sbox_json: Optional[str] = None,
+    engine: Optional[str] = None,
+):
+    """Enkripsi body biner mentah (application/octet-stream), output ciphertext biner."""
+    tables = _prepare_data_cipher(request, mode, key_hex, sbox_json)
+    body = await _read_data_body(request)
+    backend = _select_engine(len(body) + 16, engine)
+    async with admission.controller.slot(admission.data_cost(len(body))):
+        with timing.stage("aes"):
+            ciphertext = await run_in_threadpool(engines.encrypt_ecb, body, tables, True, backend.name)
+    timing.add_bytes("out", len(ciphertext))
+    return Response(
+        content=ciphertext,
+        media_type="application/octet-stream",
+        headers={"X-AES-Mode": mode, "X-AES-Engine": backend.name, "X-Plaintext-Length": str(len(body))},
+    )
+
+@app.post("/data/decrypt", response_class=Response)
+async def data_decrypt(
+    request: Request,
+    mode: str = "standard",
+    key_hex: Optional[str] = None,
+    sbox_json: Optional[str] = None,
+    engine: Optional[str] = None,
+):
+    """Dekripsi body ciphertext biner, output plaintext biner apa adanya (tanpa decode UTF-8)."""
+    tables = _prepare_data_cipher(request, mode, key_hex, sbox_json)
+    body = await _read_data_body(request)
+    backend = _select_engine(len(body), engine)
+    try:
+        async with admission.controller.slot(admission.data_cost(len(body))):
+            with timing.stage("aes"):
+                plaintext = await run_in_threadpool(engines.decrypt_ecb, body, tables, True, backend.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Dekripsi gagal: {str(e)} (Cek Key/S-Box)")
+    timing.add_bytes("out", len(plaintext))
+    return Response(
+        content=plaintext,
+        media_type="application/octet-stream",
+        headers={"X-AES-Mode": mode, "X-AES-Engine": backend.name},
+    )
+
 # --- S-Box Info Endpoints ---
 
+@app.on_event("startup")
+def _init_engines():
+    engines.registry.initialize(probe=config.ENGINE_PROBE)
+
+@app.on_event("shutdown")
+def _close_engines():
+    engines.registry.close()
+
+@app.on_event("startup")
+def _warm_up_sbox_cache():
+    if config.SBOX_WARMUP:
+        sbox_cache.warm_up()
+
+@app.on_event("shutdown")
+def _release_sbox_shm():
+    sbox_shm.cache.close()
+
 @app.get("/sbox/paper44", response_model=schemas.SBoxPaper44Response)
 def get_sbox_44():
-    metrics = analyze_sbox(SBOX_44)
+    metrics = sbox_cache.get("sbox44").summary_metrics()
     return schemas.SBoxPaper44Response(
         sbox=SBOX_44,
         metrics=schemas.SBoxMetricsResponse(**metrics),
@@ -142,267 +411,466 @@ def get_sbox_44():
 
 @app.get("/sbox/standard", response_model=schemas.SBoxStandardResponse)
 def get_sbox_standard():
-    metrics = analyze_sbox(AES_STANDARD_SBOX)
+    metrics = sbox_cache.get("standard").summary_metrics()
     return schemas.SBoxStandardResponse(
         sbox=AES_STANDARD_SBOX,
         metrics=schemas.SBoxMetricsResponse(**metrics),
         affine_matrix=None
     )
 
-@app.post("/sbox/metrics", response_model=schemas.SBoxMetricsResponse)
-def sbox_metrics(req: schemas.SBoxMetricsRequest):
+@app.post(
+    "/sbox/metrics",
+    response_model=Union[schemas.SBoxMetricsFullResponse, schemas.SBoxMetricsResponse],
+)
+async def sbox_metrics(req: schemas.SBoxMetricsRequest, detail: str = "summary"):
+    """detail=full menambahkan matriks SAC 8x8 dan BIC-SAC 28x8."""
+    if detail not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail="detail harus 'summary' atau 'full'")
     if not validate_sbox(req.sbox):
         raise HTTPException(status_code=400, detail="sbox tidak valid (harus permutasi 0..255)")
     try:
-        metrics = analyze_sbox(req.sbox)
+        async with admission.controller.slot(admission.sbox_metrics_cost(req.sbox, detail)):
+            metrics = await run_in_threadpool(sbox_cache.analyze, req.sbox, detail == "full")
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    if detail == "full":
+        return schemas.SBoxMetricsFullResponse(**metrics)
     return schemas.SBoxMetricsResponse(**metrics)
 
-# --- Image Utility Functions ---
-
-def calculate_image_entropy(image: Image.Image) -> float:
-    """Hitung entropy gambar."""
-    img_array = np.array(image)
-    if len(img_array.shape) == 3:
-        entropies = []
-        for channel in range(img_array.shape[2]):
-            channel_data = img_array[:, :, channel].flatten()
-            histogram, _ = np.histogram(channel_data, bins=256, range=(0, 256))
-            histogram = histogram[histogram > 0]
-            probabilities = histogram / histogram.sum()
-            entropy = -np.sum(probabilities * np.log2(probabilities))
-            entropies.append(entropy)
-        return np.mean(entropies)
-    else:
-        channel_data = img_array.flatten()
-        histogram, _ = np.histogram(channel_data, bins=256, range=(0, 256))
-        histogram = histogram[histogram > 0]
-        probabilities = histogram / histogram.sum()
-        entropy = -np.sum(probabilities * np.log2(probabilities))
-        return entropy
-
-def calculate_npcr_uaci_bytes(c1_bytes: bytes, c2_bytes: bytes) -> Dict[str, float]:
+# --- Optimizer S-Box (Server-Sent Events) ---
+
+def _optimizer_start(req: schemas.SBoxOptimizeRequest) -> list[int] | None:
+    if req.start == "random":
+        return None
+    if req.start == "standard":
+        return AES_STANDARD_SBOX
+    if req.start == "sbox44":
+        return SBOX_44
+    if req.start == "custom":
+        if not req.sbox or not validate_sbox(req.sbox):
+            raise HTTPException(status_code=400, detail="start=custom butuh sbox valid (permutasi 0..255)")
+        return req.sbox
+    raise HTTPException(status_code=400, detail="start harus random, standard, sbox44, atau custom")
+
+@app.post("/sbox/optimize/stream")
+async def sbox_optimize_stream(req: schemas.SBoxOptimizeRequest, request: Request):
     """
-    Hitung NPCR & UACI berdasarkan dua array bytes Ciphertext.
-    Ini adalah implementasi Differential Attack yang benar.
+    Simulated annealing / hill climbing (t_start=0) pada ruang permutasi S-Box. Event SSE:
+    `progress` per segmen rantai, `candidate` (S-Box + metrik lengkap) setiap skor terbaik
+    membaik, lalu `done`.
     """
-    arr1 = np.frombuffer(c1_bytes, dtype=np.uint8)
-    arr2 = np.frombuffer(c2_bytes, dtype=np.uint8)
-    
-    # Samakan ukuran jika beda (seharusnya sama jika padding benar)
-    min_len = min(len(arr1), len(arr2))
-    arr1 = arr1[:min_len]
-    arr2 = arr2[:min_len]
-    
-    # NPCR
-    diff = (arr1 != arr2)
-    npcr_val = (np.sum(diff) / min_len) * 100.0
-    
-    # UACI
-    abs_diff = np.abs(arr1.astype(int) - arr2.astype(int))
-    uaci_val = (np.sum(abs_diff) / (min_len * 255.0)) * 100.0
-    
-    return {"npcr": npcr_val, "uaci": uaci_val}
+    try:
+        weights = sbox_optimizer.parse_objective(req.objective)
+        sbox_optimizer.validate_schedule(req.t_start, req.t_end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if req.steps > config.SBOX_OPTIMIZE_MAX_STEPS:
+        raise HTTPException(status_code=400, detail=f"steps maksimal {config.SBOX_OPTIMIZE_MAX_STEPS}")
+    if req.chains > config.SBOX_OPTIMIZE_MAX_CHAINS:
+        raise HTTPException(status_code=400, detail=f"chains maksimal {config.SBOX_OPTIMIZE_MAX_CHAINS}")
+    start = _optimizer_start(req)
+    # Di-set oleh stream saat client putus: optimizer berhenti tanpa menunggu event berikutnya
+    cancel = threading.Event()
+
+    def produce(emit) -> None:
+        events = sbox_optimizer.optimize(
+            weights, start, chains=req.chains, steps=req.steps,
+            t_start=req.t_start, t_end=req.t_end, seed=req.seed, cancel=cancel,
+        )
+        # closing: emit gagal (client putus) -> generator ditutup, rantai yang belum jalan dibatalkan
+        with closing(events):
+            for event in events:
+                emit(event.pop("event"), event)
+
+    cost = admission.optimizer_cost(req.chains, req.steps)
+    await admission.controller.acquire(cost)
+    return streaming.events_response(
+        request, produce, ((ValueError, 400),), on_close=admission.controller.releaser(cost), cancel=cancel
+    )
 
 # --- Image Encryption Endpoints (REVISED) ---
 
+def _prepare_image_cipher(mode: str, key_hex: str, sbox_json: str | None) -> aes_numpy.CipherTables:
+    with timing.stage("sbox"):
+        sbox = _resolve_sbox_from_form(mode, sbox_json)
+    timing.count_mode(mode)
+    try:
+        with timing.stage("key_schedule"):
+            key = derive_key_from_input(key_hex)
+            return aes_numpy.prepare_cipher(key, sbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _image_cache_key(contents, tables: aes_numpy.CipherTables, mode: str, options: dict) -> str | None:
+    if not result_cache.cache.enabled:
+        return None
+    # round_keys[0] = kunci turunan; level kompresi ikut menentukan byte PNG output.
+    # options memuat padding (pkcs7/cts), jadi keduanya tidak berbagi entri cache.
+    return result_cache.make_key(
+        "image_encrypt",
+        contents,
+        tables.round_keys[0].tobytes(),
+        tables.sbox.tobytes(),
+        mode,
+        {"png_compress_level": config.PNG_COMPRESS_LEVEL, **options},
+    )
+
+async def _read_image_upload(file: UploadFile):
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File harus berupa gambar")
+
+    with timing.stage("read"):
+        contents = await uploads.read_upload(file, config.MAX_UPLOAD_BYTES)
+    timing.add_bytes("in", len(contents))
+    return contents
+
+def _image_encrypt_options(correlation_samples: Optional[int], correlation_seed: int, padding: str) -> dict:
+    if correlation_samples is None:
+        correlation_samples = config.IMAGE_CORRELATION_SAMPLES
+    if correlation_samples < 0:
+        raise HTTPException(status_code=400, detail="correlation_samples tidak boleh negatif")
+    if padding not in image_pipeline.PADDING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"padding harus salah satu dari: {', '.join(image_pipeline.PADDING_MODES)}",
+        )
+    return {"correlation_samples": correlation_samples, "correlation_seed": correlation_seed, "padding": padding}
+
+def _encrypted_image_body(png_bytes: bytes, analytics: dict, mode: str) -> dict:
+    return {
+        "encrypted_image_base64": base64.b64encode(png_bytes).decode(),
+        "used_mode": mode,
+        **analytics,
+    }
+
 @app.post("/image/encrypt", response_model=schemas.ImageEncryptResponse)
 async def encrypt_image(
+    response: Response,
     mode: str = Form(...),
     key_hex: str = Form(...),
     file: UploadFile = File(...),
-    sbox_json: Optional[str] = Form(None)
+    sbox_json: Optional[str] = Form(None),
+    correlation_samples: Optional[int] = Form(None),
+    correlation_seed: int = Form(0),
+    engine: Optional[str] = Form(None),
+    padding: str = Form("pkcs7"),
 ):
-    sbox = _resolve_sbox_from_form(mode, sbox_json)
+    """
+    correlation_samples: jumlah pasangan piksel acak per arah (0 = exact, kosong = default server).
+    padding: "pkcs7" (default) atau "cts" (ciphertext stealing, dimensi gambar tetap).
+    """
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    _select_engine(0, engine)
+    options = _image_encrypt_options(correlation_samples, correlation_seed, padding)
+    contents = await _read_image_upload(file)
+
+    async with admission.controller.slot(admission.image_cost(contents)):
+        with timing.stage("cache"):
+            cache_key = await run_in_threadpool(_image_cache_key, contents, tables, mode, options)
+            cached = await run_in_threadpool(result_cache.cache.get, "image_result", cache_key)
+        if cached is not None:
+            png_bytes, analytics = cached
+        else:
+            try:
+                png_bytes, analytics = await run_in_threadpool(
+                    image_pipeline.encrypt_image_bytes,
+                    contents,
+                    tables,
+                    engine=engine or None,
+                    **options,
+                )
+            except image_pipeline.ImageTooLargeError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            with timing.stage("cache"):
+                await run_in_threadpool(result_cache.cache.put, cache_key, png_bytes, analytics)
+    response.headers["X-Cache"] = "HIT" if cached is not None else "MISS"
+    timing.add_bytes("out", len(png_bytes))
+
+    return _encrypted_image_body(png_bytes, analytics, mode)
 
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File harus berupa gambar")
+@app.post("/image/decrypt", response_model=schemas.ImageDecryptResponse)
+async def decrypt_image(
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    file: UploadFile = File(...),
+    sbox_json: Optional[str] = Form(None),
+    engine: Optional[str] = Form(None),
+):
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    _select_engine(0, engine)
+    contents = await _read_image_upload(file)
 
-    contents = await file.read()
-    original_image = Image.open(io.BytesIO(contents)).convert("RGB")
-    width, height = original_image.size
-    
-    # Ambil raw bytes dari pixel
-    img_array = np.array(original_image)
-    flat_bytes = img_array.tobytes()
-    
-    key = derive_key_from_input(key_hex)
-
-    # --- 1. ENKRIPSI UTAMA (Ciphertext 1) ---
-    # Gunakan AES Padding (PKCS7) karena AES bekerja per blok 16-byte
-    # Gunakan use_padding=True agar aes_core melakukan padding otomatis
-    encrypted_bytes = aes_encrypt_ecb(flat_bytes, key, sbox, use_padding=True)
-    
-    # --- 2. ANALISIS DIFFERENTIAL (Ciphertext 2) ---
-    # Buat modifikasi 1 pixel pada plaintext
-    mod_flat_bytes = bytearray(flat_bytes)
-    if len(mod_flat_bytes) > 0:
-        mod_flat_bytes[0] = (mod_flat_bytes[0] + 1) % 256 # Ubah 1 nilai byte
-    
-    # Enkripsi plaintext modifikasi
-    encrypted_bytes_2 = aes_encrypt_ecb(bytes(mod_flat_bytes), key, sbox, use_padding=True)
-    
-    # Hitung NPCR & UACI (C1 vs C2)
-    npcr_uaci = calculate_npcr_uaci_bytes(encrypted_bytes, encrypted_bytes_2)
-
-    # --- 3. PEMBUATAN GAMBAR VISUALISASI ---
-    # Karena padding, ukuran data bertambah. Kita perlu menyesuaikan ukuran gambar hasil.
-    # Hitung pixel yang dibutuhkan untuk menampung semua encrypted bytes
-    total_bytes = len(encrypted_bytes)
-    pixels_needed = math.ceil(total_bytes / 3)
-    
-    # Kita pertahankan width, sesuaikan height
-    new_height = math.ceil(pixels_needed / width)
-    
-    # Buat array baru dengan padding visual (0xFF) untuk mengisi pixel terakhir
-    # Gunakan 0xFF bukan 0x00 agar mudah dibedakan dari ciphertext saat dekripsi
-    vis_array_len = new_height * width * 3
-    vis_bytes = bytearray(encrypted_bytes)
-    # Simpan panjang ciphertext asli di 4 byte pertama visual padding
-    padding_len = vis_array_len - total_bytes
-    if padding_len > 0:
-        # Encode total_bytes sebagai 4-byte integer di awal visual padding
-        vis_bytes.extend(total_bytes.to_bytes(4, 'big'))
-        # Sisanya diisi 0xFF
-        vis_bytes.extend(b'\xFF' * (padding_len - 4))
-    
-    vis_array = np.frombuffer(vis_bytes, dtype=np.uint8).reshape((new_height, width, 3))
-    encrypted_image_vis = Image.fromarray(vis_array, "RGB")
-
-    # Simpan sebagai PNG
-    buffer = io.BytesIO()
-    encrypted_image_vis.save(buffer, format="PNG", compress_level=9)
-    buffer.seek(0)
-    encrypted_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-    # Hitung metrik lain
-    orig_entropy = calculate_image_entropy(original_image)
-    enc_entropy = calculate_image_entropy(encrypted_image_vis)
-    
-    # Histogram
-    orig_hist = {
-        "R": np.histogram(img_array[:,:,0], bins=256, range=(0,256))[0].tolist(),
-        "G": np.histogram(img_array[:,:,1], bins=256, range=(0,256))[0].tolist(),
-        "B": np.histogram(img_array[:,:,2], bins=256, range=(0,256))[0].tolist()
-    }
-    enc_hist = {
-        "R": np.histogram(vis_array[:,:,0], bins=256, range=(0,256))[0].tolist(),
-        "G": np.histogram(vis_array[:,:,1], bins=256, range=(0,256))[0].tolist(),
-        "B": np.histogram(vis_array[:,:,2], bins=256, range=(0,256))[0].tolist()
-    }
+    try:
+        async with admission.controller.slot(admission.image_cost(contents)):
+            png_bytes = await run_in_threadpool(
+                image_pipeline.decrypt_image_bytes, contents, tables, engine=engine or None
+            )
+    except image_pipeline.ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    timing.add_bytes("out", len(png_bytes))
 
     return {
-        "encrypted_image_base64": encrypted_base64,
-        "original_entropy": round(orig_entropy, 4),
-        "encrypted_entropy": round(enc_entropy, 4),
-        "npcr": round(npcr_uaci["npcr"], 4),
-        "uaci": round(npcr_uaci["uaci"], 4),
-        "npr": 0, # Redundant dengan NPCR
-        "original_histogram": orig_hist,
-        "encrypted_histogram": enc_hist,
-        "used_mode": mode,
-        "image_size": {"width": width, "height": new_height}
+        "decrypted_image_base64": base64.b64encode(png_bytes).decode(),
+        "used_mode": mode
     }
 
-@app.post("/image/decrypt", response_model=schemas.ImageDecryptResponse)
-async def decrypt_image(
+# --- Streaming Progress (Server-Sent Events) ---
+
+_IMAGE_STREAM_ERRORS = ((image_pipeline.ImageTooLargeError, 413), (ValueError, 400))
+
+async def _admitted_stream(request: Request, cost: float, work, to_result) -> StreamingResponse:
+    # Slot admission dipegang sampai stream selesai / client putus, bukan sampai handler return
+    await admission.controller.acquire(cost)
+    return streaming.progress_response(
+        request, work, to_result, _IMAGE_STREAM_ERRORS, on_close=admission.controller.releaser(cost)
+    )
+
+@app.post("/image/encrypt/stream")
+async def encrypt_image_stream(
+    request: Request,
     mode: str = Form(...),
     key_hex: str = Form(...),
     file: UploadFile = File(...),
-    sbox_json: Optional[str] = Form(None)
+    sbox_json: Optional[str] = Form(None),
+    correlation_samples: Optional[int] = Form(None),
+    correlation_seed: int = Form(0),
+    engine: Optional[str] = Form(None),
+    padding: str = Form("pkcs7"),
 ):
-    sbox = _resolve_sbox_from_form(mode, sbox_json)
-    
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File harus berupa gambar")
-    
-    key = derive_key_from_input(key_hex)
-    inv_sbox = build_inv_sbox(sbox)
-
-    contents = await file.read()
-    enc_image = Image.open(io.BytesIO(contents)).convert("RGB")
-    width = enc_image.width
-    
-    # Ambil bytes dari gambar terenkripsi
-    enc_array = np.array(enc_image)
-    enc_bytes_with_visual_padding = enc_array.tobytes()
-    
-    # --- PROSES DEKRIPSI ---
-    # 1. Ekstrak ciphertext asli dari visual padding
-    # Cari metadata panjang ciphertext (4 byte di posisi setelah ciphertext)
-    # Coba deteksi panjang ciphertext yang valid (kelipatan 16)
-    
-    # Strategi: Cari dari belakang untuk menemukan blok yang valid
-    # Visual padding menggunakan 0xFF, jadi cari transisi dari data ke 0xFF
-    max_valid_len = (len(enc_bytes_with_visual_padding) // 16) * 16
-    
-    # Coba ekstrak 4 byte metadata dari area padding
-    ciphertext = None
-    for test_len in range(max_valid_len, 15, -16):  # Test setiap kelipatan 16
-        if test_len + 4 <= len(enc_bytes_with_visual_padding):
-            # Baca 4 byte metadata
+    """Seperti /image/encrypt, tapi progress per strip dikirim sebagai SSE lalu event `result`."""
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    _select_engine(0, engine)
+    options = _image_encrypt_options(correlation_samples, correlation_seed, padding)
+    contents = await _read_image_upload(file)
+
+    def work(progress):
+        cache_key = _image_cache_key(contents, tables, mode, options)
+        cached = result_cache.cache.get("image_result", cache_key)
+        if cached is not None:
+            return cached, "HIT"
+        png_bytes, analytics = image_pipeline.encrypt_image_bytes(
+            contents, tables, progress=progress, engine=engine or None, **options
+        )
+        result_cache.cache.put(cache_key, png_bytes, analytics)
+        return (png_bytes, analytics), "MISS"
+
+    def to_result(result):
+        (png_bytes, analytics), cache_status = result
+        timing.add_bytes("out", len(png_bytes))
+        return {**_encrypted_image_body(png_bytes, analytics, mode), "cache": cache_status}
+
+    return await _admitted_stream(request, admission.image_cost(contents), work, to_result)
+
+@app.post("/image/decrypt/stream")
+async def decrypt_image_stream(
+    request: Request,
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    file: UploadFile = File(...),
+    sbox_json: Optional[str] = Form(None),
+    engine: Optional[str] = Form(None),
+):
+    """Seperti /image/decrypt, dengan progress SSE per strip."""
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    _select_engine(0, engine)
+    contents = await _read_image_upload(file)
+
+    def work(progress):
+        return image_pipeline.decrypt_image_bytes(contents, tables, progress=progress, engine=engine or None)
+
+    def to_result(png_bytes):
+        timing.add_bytes("out", len(png_bytes))
+        return {"decrypted_image_base64": base64.b64encode(png_bytes).decode(), "used_mode": mode}
+
+    return await _admitted_stream(request, admission.image_cost(contents), work, to_result)
+
+# --- Multi-Image Batch Endpoints ---
+
+async def _collect_batch_images(files: List[UploadFile]) -> list[tuple[str, uploads.UploadSource]]:
+    """Kumpulkan (nama, isi) dari upload multi-part atau satu/lebih arsip ZIP."""
+    items: list[tuple[str, uploads.UploadSource]] = []
+    for upload in files:
+        contents = await uploads.read_upload(upload, config.IMAGE_BATCH_MAX_BYTES)
+        name = upload.filename or f"image_{len(items)}"
+        is_zip = (upload.content_type in ("application/zip", "application/x-zip-compressed")
+                  or name.lower().endswith(".zip"))
+        if is_zip:
             try:
-                stored_len = int.from_bytes(enc_bytes_with_visual_padding[test_len:test_len+4], 'big')
-                if stored_len == test_len and stored_len % 16 == 0:
-                    # Metadata cocok! Ini adalah panjang ciphertext yang benar
-                    ciphertext = enc_bytes_with_visual_padding[:stored_len]
-                    break
-            except:
-                pass
-    
-    # Fallback: Jika tidak menemukan metadata, gunakan seluruh data yang valid (kelipatan 16)
-    if ciphertext is None:
-        # Hapus trailing 0xFF (visual padding lama) atau 0x00
-        enc_bytes_trimmed = enc_bytes_with_visual_padding.rstrip(b'\xFF').rstrip(b'\x00')
-        valid_len = (len(enc_bytes_trimmed) // 16) * 16
-        if valid_len == 0:
-            raise HTTPException(status_code=400, detail="Ciphertext tidak valid atau kosong")
-        ciphertext = enc_bytes_trimmed[:valid_len]
-    
-    # 2. Dekripsi menggunakan AES (aes_decrypt_ecb akan handle PKCS7 unpadding)
+                items.extend(image_batch.read_zip_images(contents))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            items.append((name, contents))
+    if not items:
+        raise HTTPException(status_code=400, detail="Tidak ada gambar di dalam batch")
+    if len(items) > config.IMAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Jumlah gambar melebihi batas ({config.IMAGE_BATCH_MAX_ITEMS})",
+        )
+    timing.add_bytes("in", sum(len(c) for _, c in items))
+    return items
+
+def _zip_response(archive, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        image_batch.iter_file(archive),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/image/encrypt/batch")
+async def encrypt_image_batch(
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    files: List[UploadFile] = File(...),
+    sbox_json: Optional[str] = Form(None)
+):
+    """Enkripsi banyak gambar sekaligus; output ZIP berisi PNG terenkripsi + manifest.json."""
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    items = await _collect_batch_images(files)
+    async with admission.controller.slot(sum(admission.image_cost(c) for _, c in items)):
+        with timing.stage("batch"):
+            archive = await run_in_threadpool(image_batch.run_batch, "encrypt", items, tables, mode)
+    return _zip_response(archive, "encrypted_images.zip")
+
+@app.post("/image/decrypt/batch")
+async def decrypt_image_batch(
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    files: List[UploadFile] = File(...),
+    sbox_json: Optional[str] = Form(None)
+):
+    """Dekripsi banyak PNG terenkripsi sekaligus; output ZIP berisi PNG asli + manifest.json."""
+    tables = _prepare_image_cipher(mode, key_hex, sbox_json)
+    items = await _collect_batch_images(files)
+    async with admission.controller.slot(sum(admission.image_cost(c) for _, c in items)):
+        with timing.stage("batch"):
+            archive = await run_in_threadpool(image_batch.run_batch, "decrypt", items, tables, mode)
+    return _zip_response(archive, "decrypted_images.zip")
+
+# --- Async Job Endpoints ---
+
+@app.on_event("startup")
+def _start_job_queue():
+    jobs.queue.start()
+
+@app.on_event("shutdown")
+def _stop_job_queue():
+    jobs.queue.stop()
+
+def _submit_job(kind: str, mode: str, key_hex: str, sbox: list[int], payload: bytes) -> schemas.JobSubmitResponse:
     try:
-        decrypted_bytes = aes_decrypt_ecb(ciphertext, key, sbox, inv_sbox, use_padding=True)
+        derive_key_from_input(key_hex)
     except ValueError as e:
-         raise HTTPException(status_code=400, detail=f"Dekripsi gagal: {str(e)} (Cek Key/S-Box)")
-
-    # 3. Rekonstruksi Gambar Asli
-    # Kita perlu tahu dimensi asli. Karena stateless, kita estimasi height dari jumlah pixel.
-    total_pixels = len(decrypted_bytes) // 3
-    original_height = total_pixels // width
-    
-    # Reshape
+        raise HTTPException(status_code=400, detail=str(e))
+    timing.count_mode(mode)
+    timing.add_bytes("in", len(payload))
     try:
-        dec_array = np.frombuffer(decrypted_bytes, dtype=np.uint8).reshape((original_height, width, 3))
-        decrypted_image = Image.fromarray(dec_array, "RGB")
-    except ValueError:
-         # Fallback jika dimensi tidak pas (misal karena width berubah/crop)
-         raise HTTPException(status_code=400, detail="Gagal merekonstruksi dimensi gambar asli.")
+        job_id = jobs.queue.submit(kind, {"mode": mode, "key_hex": key_hex, "sbox": list(sbox)}, payload)
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return schemas.JobSubmitResponse(job_id=job_id, status=jobs.QUEUED, kind=kind)
 
-    buffer = io.BytesIO()
-    decrypted_image.save(buffer, format="PNG", compress_level=9)
-    buffer.seek(0)
-    decrypted_base64 = base64.b64encode(buffer.getvalue()).decode()
+async def _submit_image_job(kind: str, mode: str, key_hex: str, file: UploadFile, sbox_json: str | None):
+    sbox = _resolve_sbox_from_form(mode, sbox_json)
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File harus berupa gambar")
+    contents = await uploads.read_upload(file, config.MAX_UPLOAD_BYTES)
+    return _submit_job(kind, mode, key_hex, sbox, bytes(contents))
 
-    return {
-        "decrypted_image_base64": decrypted_base64,
-        "used_mode": mode
-    }
+@app.post("/jobs/image/encrypt", response_model=schemas.JobSubmitResponse, status_code=202)
+async def submit_image_encrypt_job(
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    file: UploadFile = File(...),
+    sbox_json: Optional[str] = Form(None)
+):
+    return await _submit_image_job("image_encrypt", mode, key_hex, file, sbox_json)
+
+@app.post("/jobs/image/decrypt", response_model=schemas.JobSubmitResponse, status_code=202)
+async def submit_image_decrypt_job(
+    mode: str = Form(...),
+    key_hex: str = Form(...),
+    file: UploadFile = File(...),
+    sbox_json: Optional[str] = Form(None)
+):
+    return await _submit_image_job("image_decrypt", mode, key_hex, file, sbox_json)
+
+@app.post("/jobs/text/encrypt", response_model=schemas.JobSubmitResponse, status_code=202)
+def submit_text_encrypt_job(req: schemas.EncryptRequest):
+    if req.plaintext_hex:
+        try:
+            payload = bytes.fromhex(req.plaintext_hex)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="plaintext_hex tidak valid")
+    elif req.plaintext:
+        payload = req.plaintext.encode("utf-8")
+    else:
+        raise HTTPException(status_code=400, detail="plaintext atau plaintext_hex harus diisi")
+    sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    return _submit_job("text_encrypt", req.mode, req.key_hex, sbox, payload)
+
+@app.post("/jobs/batch/encrypt", response_model=schemas.JobSubmitResponse, status_code=202)
+def submit_batch_encrypt_job(req: schemas.BatchEncryptRequest):
+    if len(req.plaintexts) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Jumlah item melebihi batas ({config.BATCH_MAX_ITEMS})")
+    sbox = _resolve_sbox_from_body(req.mode, req.sbox)
+    payload = json.dumps(req.plaintexts).encode("utf-8")
+    return _submit_job("batch_encrypt", req.mode, req.key_hex, sbox, payload)
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = jobs.queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return job
+
+@app.get("/jobs/{job_id}", response_model=schemas.JobStatusResponse)
+def get_job(job_id: str):
+    job = _get_job_or_404(job_id)
+    total = job["progress_total"]
+    if job["status"] == jobs.DONE:
+        percent = 100.0
+    else:
+        percent = round(job["progress_done"] * 100.0 / total, 2) if total else 0.0
+    return schemas.JobStatusResponse(
+        job_id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        progress_done=job["progress_done"],
+        progress_total=total,
+        progress_percent=percent,
+        error=job["error"],
+        result_meta=job["result_meta"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+        finished_at=job["finished_at"],
+        expires_at=job["expires_at"],
+    )
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    job = _get_job_or_404(job_id)
+    if job["status"] != jobs.DONE:
+        raise HTTPException(status_code=409, detail=f"Job belum selesai (status: {job['status']})")
+    path = jobs.queue.result_path(job_id)
+    filename, media_type = jobs.JOB_KINDS[job["kind"]]
+    return FileResponse(path, media_type=media_type, filename=f"{job_id}_{filename}")
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    status = jobs.queue.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return {"job_id": job_id, "status": status}
 
 # --- S-Box Generation/Upload Endpoints ---
 
 def apply_affine_transform(val_byte: int, matrix: list[list[int]], constant: int) -> int:
-    bits = [(val_byte >> i) & 1 for i in range(8)]
-    new_bits = [0] * 8
-    for row in range(8):
-        acc = 0
-        for col in range(8):
-            acc ^= (matrix[row][col] & bits[col])
-        new_bits[row] = acc
-    res = 0
-    for i in range(8):
-        res |= (new_bits[i] << i)
-    return res ^ constant
+    return int(gf256.affine_transform(val_byte, matrix, constant)[0])
 
 def random_invertible_matrix_8() -> list[list[int]]:
     rng = secrets.SystemRandom()
@@ -418,24 +886,30 @@ def random_invertible_matrix_8() -> list[list[int]]:
     return mat
 
 @app.get("/sbox/generate", response_model=schemas.SBoxGenerateResponse)
-def sbox_generate():
+def sbox_generate(poly: str = "0x11B"):
+    """poly: polinomial tak tereduksi derajat 8 untuk invers GF(2^8) (default AES 0x11B)."""
+    try:
+        poly_value = int(poly, 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="poly harus bilangan (mis. 0x11B atau 283)")
+    if poly_value not in gf256.IRREDUCIBLE_POLYS:
+        raise HTTPException(status_code=400, detail="poly harus polinomial tak tereduksi derajat 8")
     affine_matrix = random_invertible_matrix_8()
-    generated_sbox = []
-    for x in range(256):
-        inv_val = AES_INVERSE_TABLE[x]
-        val = apply_affine_transform(inv_val, affine_matrix, 0x63)
-        generated_sbox.append(val)
+    generated_sbox = gf256.affine_sbox(affine_matrix, 0x63, poly_value)
     metrics = analyze_sbox(generated_sbox)
     return schemas.SBoxGenerateResponse(
         sbox=generated_sbox,
         metrics=schemas.SBoxMetricsResponse(**metrics),
         affine_matrix=affine_matrix,
+        poly=poly_value,
     )
 
 @app.post("/sbox/upload", response_model=schemas.SBoxUploadResponse)
 async def sbox_upload(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".json"):
         raise HTTPException(status_code=400, detail="File harus berformat .json")
+    if uploads.upload_size(file) > config.SBOX_UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File melebihi batas {config.SBOX_UPLOAD_MAX_BYTES} byte")
     try:
         raw = await file.read()
         data = json.loads(raw.decode("utf-8"))
@@ -452,7 +926,8 @@ async def sbox_upload(file: UploadFile = File(...)):
     if not validate_sbox(sbox):
         raise HTTPException(status_code=400, detail="sbox tidak valid (harus permutasi unik 0..255)")
 
-    metrics = analyze_sbox(sbox)
+    async with admission.controller.slot(admission.sbox_metrics_cost(sbox)):
+        metrics = await run_in_threadpool(sbox_cache.analyze, sbox)
     return schemas.SBoxUploadResponse(sbox=sbox, metrics=schemas.SBoxMetricsResponse(**metrics))
 
 @app.post("/sbox/upload_json", response_model=schemas.SBoxUploadResponse)
@@ -467,5 +942,6 @@ async def sbox_upload_json(data: dict):
     if not validate_sbox(sbox):
         raise HTTPException(status_code=400, detail="sbox tidak valid (harus permutasi unik 0..255)")
 
-    metrics = analyze_sbox(sbox)
+    async with admission.controller.slot(admission.sbox_metrics_cost(sbox)):
+        metrics = await run_in_threadpool(sbox_cache.analyze, sbox)
     return schemas.SBoxUploadResponse(sbox=sbox, metrics=schemas.SBoxMetricsResponse(**metrics))
\ No newline at end of file
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from typing import BinaryIO, Dict, Optional
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# color type PNG -> jumlah kanal
+COLOR_TYPE_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+# Ukuran maksimum data per chunk IDAT
+_IDAT_CHUNK = 256 * 1024
+
+
+def _chunk(tag: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+class PngStreamWriter:
+    """
+    Penulis PNG inkremental: baris piksel ditulis per strip dan langsung dikompres,
+    sehingga gambar penuh tidak perlu ada di memori sekaligus.
+    """
+
+    def __init__(
+        self,
+        out: BinaryIO,
+        width: int,
+        height: int,
+        color_type: int = 2,
+        bit_depth: int = 8,
+        compress_level: int = 9,
+        text: Optional[Dict[str, str]] = None,
+    ):
+        if color_type not in COLOR_TYPE_CHANNELS:
+            raise ValueError(f"color type PNG tidak didukung: {color_type}")
+        self.out = out
+        self.width = width
+        self.height = height
+        self.channels = COLOR_TYPE_CHANNELS[color_type]
+        self.bytes_per_sample = bit_depth // 8
+        self.row_bytes = width * self.channels * self.bytes_per_sample
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+
+        out.write(PNG_SIGNATURE)
+        out.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)))
+        for key, value in (text or {}).items():
+            out.write(_chunk(b"tEXt", key.encode("latin-1") + b"\x00" + value.encode("latin-1")))
+
+    def write_rows(self, rows) -> None:
+        """Tulis beberapa baris (array/bytes dengan panjang kelipatan row_bytes)."""
+        data = rows.tobytes() if isinstance(rows, np.ndarray) else bytes(rows)
+        if len(data) % self.row_bytes != 0:
+            raise ValueError("Panjang data strip bukan kelipatan satu baris PNG")
+        n_rows = len(data) // self.row_bytes
+        if self.rows_written + n_rows > self.height:
+            raise ValueError("Jumlah baris melebihi tinggi gambar PNG")
+        # Setiap baris diawali byte filter 0 (None)
+        framed = np.empty((n_rows, self.row_bytes + 1), dtype=np.uint8)
+        framed[:, 0] = 0
+        framed[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(n_rows, self.row_bytes)
+        self._pending += self._compressor.compress(framed.tobytes())
+        self.rows_written += n_rows
+        self._flush_idat(final=False)
+
+    def _flush_idat(self, final: bool) -> None:
+        while len(self._pending) >= _IDAT_CHUNK or (final and self._pending):
+            piece = bytes(self._pending[:_IDAT_CHUNK])
+            del self._pending[:_IDAT_CHUNK]
+            self.out.write(_chunk(b"IDAT", piece))
+
+    def close(self) -> None:
+        if self.rows_written != self.height:
+            raise ValueError("Jumlah baris yang ditulis tidak sama dengan tinggi gambar")
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        self.out.write(_chunk(b"IEND", b""))
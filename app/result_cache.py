@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config, timing
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa flock, batas ukuran hanya dijaga per proses
+    fcntl = None
+
+# Naikkan jika format output (PNG/analytics/ciphertext) berubah agar entri lama tidak dipakai.
+# 3: gambar dienkripsi dalam mode piksel aslinya (L/LA/RGBA/I;16) + analytics pixel_mode
+# 4: analytics source_mode + lossy_conversion; 5: hasil uji chi-square per kanal
+CACHE_FORMAT_VERSION = 5
+
+_PAYLOAD_SUFFIX = ".bin"
+_META_SUFFIX = ".json"
+_USAGE_FILE = "usage"
+_LOCK_FILE = "usage.lock"
+# Eviction menurunkan total ke fraksi batas ini (bukan tepat di batas)
+_EVICT_TARGET = 0.9
+
+
+def sbox_digest(sbox: Iterable[int]) -> str:
+    return hashlib.sha256(bytes(sbox)).hexdigest()
+
+
+def make_key(
+    kind: str,
+    data,
+    key: bytes,
+    sbox: Iterable[int],
+    mode: str,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Kunci cache = SHA-256 dari (jenis, hash input, kunci turunan, digest S-Box, mode, opsi output)."""
+    digest = hashlib.sha256(data).hexdigest()
+    material = json.dumps(
+        {
+            "v": CACHE_FORMAT_VERSION,
+            "kind": kind,
+            "input": digest,
+            "key": key.hex(),
+            "sbox": sbox_digest(sbox),
+            "mode": mode,
+            "options": options or {},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache hasil enkripsi deterministik (ECB, kunci + S-Box tetap) di direktori disk
+    dengan batas total ukuran. Direktori adalah sumber kebenaran bersama semua worker:
+    total ukuran dicatat di file usage (dikunci flock) dan entri diusir LRU berdasarkan
+    mtime metadata, sehingga batasnya berlaku lintas proses, bukan per worker.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.usage_path = os.path.join(directory, _USAGE_FILE)
+        self.lock_path = os.path.join(directory, _LOCK_FILE)
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + _PAYLOAD_SUFFIX, base + _META_SUFFIX
+
+    @contextmanager
+    def _usage(self) -> Iterator[List[int]]:
+        """Baca-ubah-tulis total ukuran cache di bawah flock eksklusif (lintas worker)."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_path, "a+") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    try:
+                        with open(self.usage_path, "r", encoding="utf-8") as f:
+                            total = [int(json.load(f)["total"])]
+                    except (OSError, ValueError, KeyError, TypeError):
+                        total = [self._scan_total()]
+                    if not self._loaded:
+                        # Start proses: hitung ulang dari isi direktori (entri bisa berubah
+                        # saat server mati, atau hitungan usage meleset setelah crash)
+                        self._loaded = True
+                        total[0] = self._scan_total()
+                    yield total
+                    _atomic_write(self.usage_path, json.dumps({"total": total[0]}).encode("utf-8"))
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """(mtime metadata, key, ukuran) semua entri di direktori."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_META_SUFFIX):
+                continue
+            key = name[: -len(_META_SUFFIX)]
+            payload_path, meta_path = self._paths(key)
+            try:
+                size = os.path.getsize(payload_path) + os.path.getsize(meta_path)
+                mtime = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            entries.append((mtime, key, size))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, _, size in self._scan())
+
+    def _remove(self, key: str) -> None:
+        # Metadata dihapus dulu: entri tanpa .json tidak lagi terlihat sebagai hit
+        payload_path, meta_path = self._paths(key)
+        for path in (meta_path, payload_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self, total: List[int]) -> None:
+        """Usir entri paling lama dipakai sampai total turun ke target; total dihitung ulang dari direktori."""
+        entries = sorted(self._scan())
+        total[0] = sum(size for _, _, size in entries)
+        if total[0] <= self.max_bytes:
+            return
+        # Turun sedikit di bawah batas agar put berikutnya tidak langsung memicu scan lagi
+        target = int(self.max_bytes * _EVICT_TARGET)
+        for _, key, size in entries:
+            if total[0] <= target:
+                break
+            self._remove(key)
+            total[0] -= size
+
+    def get(self, name: str, key: Optional[str]) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """Ambil (payload, metadata) untuk key; hit/miss dicatat di metrik cache `name`."""
+        if key is None or not self.enabled:
+            return None
+        payload_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(payload_path, "rb") as f:
+                payload = f.read()
+        except FileNotFoundError:
+            timing.registry.count_cache(name, False)
+            return None
+        except (OSError, ValueError):
+            # Entri rusak: total di file usage dikoreksi saat scan eviction berikutnya
+            self._remove(key)
+            timing.registry.count_cache(name, False)
+            return None
+        try:
+            os.utime(meta_path)  # mtime metadata = waktu pakai terakhir (urutan LRU)
+        except OSError:
+            pass
+        timing.registry.count_cache(name, True)
+        return payload, meta
+
+    def put(self, key: Optional[str], payload: bytes, meta: Dict[str, Any]) -> None:
+        if key is None or not self.enabled:
+            return
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        size = len(payload) + len(meta_bytes)
+        if size > self.max_bytes:
+            return
+        payload_path, meta_path = self._paths(key)
+        if os.path.exists(meta_path):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Tulis ke file sementara lalu rename agar entri tidak pernah terbaca setengah jadi;
+            # metadata ditulis terakhir karena entri dianggap ada bila file .json-nya ada
+            _atomic_write(payload_path, payload)
+            _atomic_write(meta_path, meta_bytes)
+        except OSError:
+            return
+        with self._usage() as total:
+            total[0] += size
+            if total[0] > self.max_bytes:
+                self._evict(total)
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        with self._usage() as total:
+            for _, key, _ in self._scan():
+                self._remove(key)
+            total[0] = 0
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+cache = ResultCache(config.RESULT_CACHE_DIR, config.RESULT_CACHE_MAX_BYTES)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from . import aes_numpy, config, image_pipeline, sbox_numpy, sbox_shm
+from .aes_core import AES_STANDARD_SBOX, SBOX_44, build_inv_sbox
+from .sbox_metrics import analyze_sbox
+
+BUILTIN_SBOXES: Dict[str, List[int]] = {
+    "standard": AES_STANDARD_SBOX,
+    "sbox44": SBOX_44,
+}
+
+# Modul yang menentukan isi artefak; perubahan kodenya membatalkan cache di disk
+_VERSIONED_MODULES = ("aes_core.py", "gf256.py", "sbox_metrics.py", "sbox_numpy.py", "sbox_cache.py")
+
+# Metrik tambahan mode detail=full, dibuang untuk response ringkas
+_FULL_ONLY_KEYS = ("avalanche", "components")
+
+
+def code_version() -> str:
+    digest = hashlib.sha256()
+    base = Path(__file__).resolve().parent
+    for name in _VERSIONED_MODULES:
+        digest.update(name.encode("utf-8"))
+        digest.update((base / name).read_bytes())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class SBoxArtifacts:
+    """Artefak turunan satu S-Box yang tidak bergantung pada kunci."""
+    name: str
+    sbox: np.ndarray
+    inv_sbox: np.ndarray
+    ddt: np.ndarray
+    lat: np.ndarray
+    metrics: Dict[str, Any]  # hasil analyze_sbox(full=True)
+
+    def summary_metrics(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.metrics.items() if k not in _FULL_ONLY_KEYS}
+
+
+_lock = threading.Lock()
+_artifacts: Dict[str, SBoxArtifacts] = {}
+# Info warm-up terakhir: sumber artefak (disk/build) dan durasinya
+warmup_info: Dict[str, Any] = {}
+
+
+def build_artifacts(name: str, sbox: List[int]) -> SBoxArtifacts:
+    return SBoxArtifacts(
+        name=name,
+        sbox=np.array(sbox, dtype=np.uint8),
+        inv_sbox=np.array(build_inv_sbox(sbox), dtype=np.uint8),
+        ddt=sbox_numpy.difference_distribution_table(sbox).astype(np.uint16),
+        lat=sbox_numpy.linear_approximation_table(sbox).astype(np.int16),
+        metrics=analyze_sbox(sbox, full=True),
+    )
+
+
+def save(path: str, artifacts: Dict[str, SBoxArtifacts], version: str) -> None:
+    arrays: Dict[str, np.ndarray] = {"version": np.array(version)}
+    for name, art in artifacts.items():
+        arrays[f"{name}__sbox"] = art.sbox
+        arrays[f"{name}__inv_sbox"] = art.inv_sbox
+        arrays[f"{name}__ddt"] = art.ddt
+        arrays[f"{name}__lat"] = art.lat
+        arrays[f"{name}__metrics"] = np.array(json.dumps(art.metrics))
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load(path: str, version: str) -> Optional[Dict[str, SBoxArtifacts]]:
+    """Muat artefak dari .npz; None bila file tidak ada, rusak, beda versi, atau S-Box berubah."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["version"]) != version:
+                return None
+            loaded = {}
+            for name, sbox in BUILTIN_SBOXES.items():
+                if data[f"{name}__sbox"].tolist() != list(sbox):
+                    return None
+                loaded[name] = SBoxArtifacts(
+                    name=name,
+                    sbox=data[f"{name}__sbox"],
+                    inv_sbox=data[f"{name}__inv_sbox"],
+                    ddt=data[f"{name}__ddt"],
+                    lat=data[f"{name}__lat"],
+                    metrics=json.loads(str(data[f"{name}__metrics"])),
+                )
+            return loaded
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _warm_pipeline() -> None:
+    # Encode + enkripsi gambar kecil agar plugin PIL dan jalur NumPy sudah terinisialisasi
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4)).save(buf, "PNG")
+    tables = aes_numpy.prepare_cipher(bytes(16), AES_STANDARD_SBOX)
+    png_bytes, _ = image_pipeline.encrypt_image_bytes(buf.getvalue(), tables)
+    image_pipeline.decrypt_image_bytes(png_bytes, tables)
+
+
+def warm_up(path: Optional[str] = None) -> Dict[str, Any]:
+    """Muat (atau hitung lalu simpan) artefak S-Box bawaan dan panaskan pipeline gambar."""
+    path = path or config.SBOX_CACHE_PATH
+    start = time.perf_counter()
+    version = code_version()
+    artifacts = load(path, version)
+    source = "disk"
+    if artifacts is None:
+        source = "build"
+        artifacts = {name: build_artifacts(name, sbox) for name, sbox in BUILTIN_SBOXES.items()}
+        try:
+            save(path, artifacts, version)
+        except OSError:
+            source = "build (cache tidak bisa ditulis)"
+    with _lock:
+        _artifacts.update(artifacts)
+    _warm_pipeline()
+    warmup_info.update({"source": source, "seconds": round(time.perf_counter() - start, 4), "version": version[:12]})
+    return warmup_info
+
+
+def get(name: str) -> SBoxArtifacts:
+    """Artefak S-Box bawaan; dihitung di tempat bila warm-up belum dijalankan."""
+    with _lock:
+        art = _artifacts.get(name)
+    if art is None:
+        art = build_artifacts(name, BUILTIN_SBOXES[name])
+        with _lock:
+            _artifacts.setdefault(name, art)
+    return art
+
+
+def builtin_name(sbox: List[int]) -> Optional[str]:
+    for name, builtin in BUILTIN_SBOXES.items():
+        if sbox is builtin or list(sbox) == builtin:
+            return name
+    return None
+
+
+def analyze(sbox: List[int], full: bool = False) -> Dict[str, Any]:
+    """
+    analyze_sbox dengan jalan pintas: S-Box bawaan dari artefak warm-up, S-Box custom dari
+    cache shared memory lintas worker (dihitung sekali lalu dipakai semua worker).
+    """
+    name = builtin_name(sbox)
+    if name is not None:
+        metrics = get(name).metrics
+    else:
+        shared = sbox_shm.cache.get_or_create(sbox)
+        if shared is None:
+            return analyze_sbox(sbox, full=full)
+        metrics = shared.metrics
+    if full:
+        return dict(metrics)
+    return {k: v for k, v in metrics.items() if k not in _FULL_ONLY_KEYS}
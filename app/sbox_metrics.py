@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Any, Dict, List
 
+import numpy as np
+
+from . import sbox_numpy, timing
 from .aes_core import validate_sbox
 
 
@@ -44,39 +47,12 @@ def boolean_nonlinearity(truth_table: List[int]) -> int:
 
 def boolean_algebraic_degree(truth_table: List[int]) -> int:
     """Algebraic degree via Mobius transform of ANF."""
-    n = len(truth_table).bit_length() - 1
-    anf = truth_table[:]
-    for i in range(n):
-        step = 1 << i
-        for mask in range(len(anf)):
-            if mask & step:
-                anf[mask] ^= anf[mask ^ step]
-    deg = 0
-    for mask, coeff in enumerate(anf):
-        if coeff:
-            wt = mask.bit_count()
-            if wt > deg:
-                deg = wt
-    return deg
+    return int(sbox_numpy.algebraic_degrees(np.array([truth_table]))[0])
 
 
 def boolean_correlation_immunity(truth_table: List[int]) -> int:
-    n = len(truth_table).bit_length() - 1
-    walsh = boolean_walsh(truth_table)
-    ci = 0
-    for order in range(1, n + 1):
-        if any(
-            walsh[mask] != 0
-            for mask in range(1, 1 << n)
-            if 1 <= mask.bit_count() <= order
-        ):
-            break
-        ci = order
-    return ci
-
-
-def _truth_table_for_bit(sbox_bits: List[List[int]], bit_index: int) -> List[int]:
-    return [bits[bit_index] for bits in sbox_bits]
+    spectra = sbox_numpy.walsh_spectra(np.array([truth_table]))
+    return int(sbox_numpy.correlation_immunities(spectra)[0])
 
 
 def _truth_table_for_bit_pair_xor(sbox_bits: List[List[int]], i: int, j: int) -> List[int]:
@@ -85,15 +61,8 @@ def _truth_table_for_bit_pair_xor(sbox_bits: List[List[int]], i: int, j: int) ->
 
 def sac_average(sbox: List[int]) -> float:
     """Strict Avalanche Criterion average score across all input/output bits."""
-    total_changes = 0
-    comparisons = 256 * 8 * 8  # inputs * input_bits * output_bits
-    for in_bit in range(8):
-        delta = 1 << in_bit
-        for x in range(256):
-            y1 = sbox[x]
-            y2 = sbox[x ^ delta]
-            total_changes += (y1 ^ y2).bit_count()
-    return total_changes / comparisons
+    sac, _ = sbox_numpy.avalanche_counts(sbox)
+    return float(sac.sum() / (256 * 8 * 8))
 
 
 def bic_sac_score(sbox_bits: List[List[int]]) -> float:
@@ -101,23 +70,9 @@ def bic_sac_score(sbox_bits: List[List[int]]) -> float:
     Avalanche score for XOR pair outputs (Bit Independence Criterion).
     Nilai mendekati 0.5 lebih baik.
     """
-    total_changes = 0.0
-    pair_count = 0
-    comparisons_per_pair = 256 * 8
-    for i in range(8):
-        for j in range(i + 1, 8):
-            pair_count += 1
-            changes = 0
-            for in_bit in range(8):
-                delta = 1 << in_bit
-                for x in range(256):
-                    b1 = sbox_bits[x][i] ^ sbox_bits[x][j]
-                    b2 = sbox_bits[x ^ delta][i] ^ sbox_bits[x ^ delta][j]
-                    changes += (b1 ^ b2)
-            total_changes += changes / comparisons_per_pair
-    if pair_count == 0:
-        return 0.0
-    return total_changes / pair_count
+    sbox = [sum(bit << i for i, bit in enumerate(bits)) for bits in sbox_bits]
+    _, bic = sbox_numpy.avalanche_counts(sbox)
+    return float(bic.sum() / (len(sbox_numpy.BIT_PAIRS) * 256 * 8))
 
 
 def bic_nonlinearity_min(sbox_bits: List[List[int]]) -> int:
@@ -133,64 +88,50 @@ def bic_nonlinearity_min(sbox_bits: List[List[int]]) -> int:
 
 def du_max(sbox: List[int]) -> int:
     """Differential uniformity: maksimum count untuk semua input diff != 0."""
-    du_val = 0
-    for a in range(1, 256):
-        counts = [0] * 256
-        for x in range(256):
-            b = sbox[x] ^ sbox[x ^ a]
-            counts[b] += 1
-        du_val = max(du_val, max(counts))
-    return du_val
+    return int(sbox_numpy.difference_distribution_table(sbox)[1:].max())
 
 
 def lap_max_bias(sbox: List[int]) -> float:
     """Linear Approximation Probability: maksimum bias |C|/256 untuk mask input/output."""
-    max_bias = 0.0
-    precomp_out = [
-        [((val & b).bit_count() & 1) for val in sbox]
-        for b in range(256)
-    ]
-    for a in range(1, 256):
-        in_parity = [((x & a).bit_count() & 1) for x in range(256)]
-        for b in range(1, 256):
-            out_parity = precomp_out[b]
-            corr = 0
-            for x in range(256):
-                corr += 1 if in_parity[x] == out_parity[x] else -1
-            bias = abs(corr) / 256.0
-            if bias > max_bias:
-                max_bias = bias
-    return max_bias
-
-
-def analyze_sbox(sbox: List[int]) -> Dict[str, float | int]:
-    """Hitung metrik utama untuk S-Box 8x8."""
+    lat = sbox_numpy.linear_approximation_table(sbox)
+    # |C| = |#cocok - #beda| = 2 * |LAT[a, b]|
+    return float(2 * np.abs(lat[1:, 1:]).max() / 256.0)
+
+
+def analyze_sbox(sbox: List[int], full: bool = False) -> Dict[str, Any]:
+    """Hitung metrik utama untuk S-Box 8x8; full=True menambahkan matriks SAC/BIC-SAC."""
     if not validate_sbox(sbox):
         raise ValueError("S-Box tidak valid (harus permutasi 0..255).")
 
     sbox_bits = _precompute_bits(sbox)
-    truth_tables = [_truth_table_for_bit(sbox_bits, i) for i in range(8)]
-
-    # Nonlinearity & algebraic degree per output bit
-    nls = [boolean_nonlinearity(tt) for tt in truth_tables]
-    ads = [boolean_algebraic_degree(tt) for tt in truth_tables]
-    cis = [boolean_correlation_immunity(tt) for tt in truth_tables]
-
-    nl_min = min(nls)
-    ad_min = min(ads)
-    ci_min = min(cis)
-
-    sac_avg_val = sac_average(sbox)
-    bic_nl_min_val = bic_nonlinearity_min(sbox_bits)
-    bic_sac_val = bic_sac_score(sbox_bits)
-    lap_bias = lap_max_bias(sbox)
-    du_val = du_max(sbox)
+
+    # Nonlinearity, algebraic degree & CI per output bit (8 fungsi koordinat, batched)
+    coordinates = sbox_numpy.component_truth_tables(sbox, [1 << i for i in range(8)])
+    with timing.stage("sbox_nl"):
+        spectra = sbox_numpy.walsh_spectra(coordinates)
+        nl_min = int(128 - np.abs(spectra).max() // 2)
+    with timing.stage("sbox_ad"):
+        ad_min = int(sbox_numpy.algebraic_degrees(coordinates).min())
+    with timing.stage("sbox_ci"):
+        ci_min = int(sbox_numpy.correlation_immunities(spectra).min())
+
+    # SAC dan BIC-SAC dihitung sekaligus dari satu tabel flip bit
+    with timing.stage("sbox_sac"):
+        avalanche = sbox_numpy.avalanche_matrices(sbox)
+    sac_avg_val = avalanche["sac_avg"]
+    bic_sac_val = avalanche["bic_sac_score"]
+    with timing.stage("sbox_bic_nl"):
+        bic_nl_min_val = bic_nonlinearity_min(sbox_bits)
+    with timing.stage("sbox_lap"):
+        lap_bias = lap_max_bias(sbox)
+    with timing.stage("sbox_du"):
+        du_val = du_max(sbox)
     dap_max = du_val / 256.0
 
     # Transparansi orde placeholder
     to_value = 0.0  # TODO: implement transparency order
 
-    return {
+    result: Dict[str, Any] = {
         "nl_min": float(nl_min),
         "sac_avg": sac_avg_val,
         "bic_nl_min": float(bic_nl_min_val),
@@ -202,3 +143,9 @@ def analyze_sbox(sbox: List[int]) -> Dict[str, float | int]:
         "to_value": to_value,
         "ci_min": ci_min,
     }
+    if full:
+        result["avalanche"] = avalanche
+        # Semua 255 fungsi komponen <b, S(x)>, bukan hanya 8 bit koordinat
+        with timing.stage("sbox_components"):
+            result["components"] = sbox_numpy.component_analysis(sbox)
+    return result
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from itertools import combinations
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Pasangan bit output (i, j), i < j, urutan baris matriks BIC-SAC (28 pasangan)
+BIT_PAIRS: List[tuple] = list(combinations(range(8), 2))
+_PAIR_I = np.array([i for i, _ in BIT_PAIRS], dtype=np.intp)
+_PAIR_J = np.array([j for _, j in BIT_PAIRS], dtype=np.intp)
+
+# x ^ (1 << i) untuk setiap bit input i: shape (8, 256)
+_FLIP_INDEX = np.arange(256)[None, :] ^ (1 << np.arange(8))[:, None]
+
+
+def sbox_bits(sbox: Sequence[int]) -> np.ndarray:
+    """Bit output S-Box, shape (256, 8), bit ke-i = (S[x] >> i) & 1 (sama dengan _int_to_bits)."""
+    values = np.asarray(sbox, dtype=np.uint8)
+    return np.unpackbits(values[:, None], axis=1, bitorder="little")
+
+
+def avalanche_counts(sbox: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Jumlah flip bit output saat satu bit input dibalik, dihitung dalam satu pass.
+
+    Mengembalikan (sac, bic): sac shape (8 input, 8 output), bic shape (28 pasangan, 8 input)
+    berisi jumlah x (dari 256) yang membuat bit output / XOR pasangan bit output berubah.
+    """
+    bits = sbox_bits(sbox)
+    flips = bits[None, :, :] ^ bits[_FLIP_INDEX]  # (8 input, 256 x, 8 output)
+    sac = flips.sum(axis=1, dtype=np.int64)
+    pair_flips = flips[:, :, _PAIR_I] ^ flips[:, :, _PAIR_J]  # (8 input, 256 x, 28 pasangan)
+    bic = pair_flips.sum(axis=1, dtype=np.int64).T
+    return sac, bic
+
+
+def avalanche_matrices(sbox: Sequence[int]) -> Dict[str, object]:
+    """Matriks SAC 8x8 dan BIC-SAC 28x8 (probabilitas flip) beserta skor ringkasannya."""
+    sac, bic = avalanche_counts(sbox)
+    sac_matrix = sac / 256.0
+    bic_matrix = bic / 256.0
+    return {
+        "sac_matrix": sac_matrix.tolist(),
+        "sac_avg": float(sac.sum() / sac.size / 256.0),
+        "sac_min": float(sac_matrix.min()),
+        "sac_max": float(sac_matrix.max()),
+        # Rata-rata deviasi dari ideal 0.5
+        "sac_deviation": float(np.abs(sac_matrix - 0.5).mean()),
+        "bic_sac_matrix": bic_matrix.tolist(),
+        "bic_sac_pairs": [list(pair) for pair in BIT_PAIRS],
+        "bic_sac_score": float(bic.sum() / bic.size / 256.0),
+        "bic_sac_min": float(bic_matrix.min()),
+        "bic_sac_max": float(bic_matrix.max()),
+    }
+
+
+# Bobot Hamming 0..255
+POPCOUNT = np.array([bin(v).count("1") for v in range(256)], dtype=np.int64)
+
+
+def component_truth_tables(sbox: Sequence[int], masks: Sequence[int] | None = None) -> np.ndarray:
+    """
+    Truth table fungsi komponen f_b(x) = <b, S(x)> untuk setiap mask output b.
+    Default semua 255 mask tak-nol; shape (len(masks), 256), nilai 0/1.
+    """
+    values = np.asarray(sbox, dtype=np.int64)
+    masks_arr = np.arange(1, 256, dtype=np.int64) if masks is None else np.asarray(masks, dtype=np.int64)
+    return POPCOUNT[masks_arr[:, None] & values[None, :]] & 1
+
+
+def mobius_transform(truth_tables: np.ndarray) -> np.ndarray:
+    """Transformasi Möbius (truth table -> koefisien ANF) untuk banyak fungsi sekaligus."""
+    anf = np.array(truth_tables, dtype=np.uint8)
+    count, size = anf.shape
+    step = 1
+    while step < size:
+        view = anf.reshape(count, size // (2 * step), 2, step)
+        view[:, :, 1, :] ^= view[:, :, 0, :]
+        step *= 2
+    return anf
+
+
+def walsh_transform(signs: np.ndarray) -> np.ndarray:
+    """Fast Walsh-Hadamard transform per baris (input bentuk ±1 atau bilangan bulat)."""
+    spectrum = np.array(signs, dtype=np.int64)
+    count, size = spectrum.shape
+    step = 1
+    while step < size:
+        view = spectrum.reshape(count, size // (2 * step), 2, step)
+        lo = view[:, :, 0, :].copy()
+        hi = view[:, :, 1, :]
+        view[:, :, 0, :] += hi
+        view[:, :, 1, :] = lo - hi
+        step *= 2
+    return spectrum
+
+
+def walsh_spectra(truth_tables: np.ndarray) -> np.ndarray:
+    """Spektrum Walsh W_f(a) = sum_x (-1)^(f(x) + a.x) untuk setiap baris truth table."""
+    return walsh_transform(1 - 2 * truth_tables.astype(np.int64))
+
+
+def algebraic_degrees(truth_tables: np.ndarray) -> np.ndarray:
+    """Derajat aljabar setiap fungsi: bobot maksimum monomial dengan koefisien ANF 1."""
+    anf = mobius_transform(truth_tables)
+    return (anf * POPCOUNT[None, :]).max(axis=1)
+
+
+def correlation_immunities(spectra: np.ndarray) -> np.ndarray:
+    """Orde correlation immunity: m terbesar dengan W(a) = 0 untuk semua 1 <= wt(a) <= m."""
+    n = spectra.shape[1].bit_length() - 1
+    weights = np.where(spectra[:, 1:] != 0, POPCOUNT[None, 1:spectra.shape[1]], n + 1)
+    return weights.min(axis=1) - 1
+
+
+def autocorrelation_spectra(spectra: np.ndarray) -> np.ndarray:
+    """Autokorelasi r_f(a) = sum_x (-1)^(f(x) + f(x ^ a)), dihitung dari W^2 (Wiener-Khinchin)."""
+    size = spectra.shape[1]
+    return walsh_transform(spectra * spectra) // size
+
+
+def component_analysis(sbox: Sequence[int]) -> Dict[str, object]:
+    """
+    Analisis semua 255 fungsi komponen tak-nol sekaligus: derajat aljabar, correlation
+    immunity, nonlinearity, absolute indicator dan sum-of-squares indicator (min/max).
+    """
+    tables = component_truth_tables(sbox)
+    spectra = walsh_spectra(tables)
+    degrees = algebraic_degrees(tables)
+    cis = correlation_immunities(spectra)
+    nls = 128 - np.abs(spectra).max(axis=1) // 2
+    auto = autocorrelation_spectra(spectra)
+    abs_indicator = np.abs(auto[:, 1:]).max(axis=1)
+    sos_indicator = (auto * auto).sum(axis=1)
+    return {
+        "count": int(tables.shape[0]),
+        "ad_min": int(degrees.min()),
+        "ad_max": int(degrees.max()),
+        "ci_min": int(cis.min()),
+        "ci_max": int(cis.max()),
+        "nl_min": int(nls.min()),
+        "nl_max": int(nls.max()),
+        "abs_indicator_min": int(abs_indicator.min()),
+        "abs_indicator_max": int(abs_indicator.max()),
+        "sos_indicator_min": int(sos_indicator.min()),
+        "sos_indicator_max": int(sos_indicator.max()),
+    }
+
+
+def difference_distribution_table(sbox: Sequence[int]) -> np.ndarray:
+    """DDT[a, b] = #{x : S(x) ^ S(x ^ a) = b}, shape (256, 256)."""
+    values = np.asarray(sbox, dtype=np.int64)
+    x = np.arange(256)
+    diffs = values[None, :] ^ values[x[:, None] ^ x[None, :]]  # baris = beda input a
+    flat = (x[:, None] * 256 + diffs).ravel()
+    return np.bincount(flat, minlength=256 * 256).reshape(256, 256)
+
+
+def linear_approximation_table(sbox: Sequence[int]) -> np.ndarray:
+    """
+    LAT[a, b] = #{x : a.x = b.S(x)} - 128, shape (256, 256).
+    Kolom b adalah setengah spektrum Walsh fungsi komponen <b, S(x)>.
+    """
+    tables = component_truth_tables(sbox, np.arange(256))
+    return walsh_spectra(tables).T // 2
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import math
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from . import sbox_numpy
+from .aes_core import validate_sbox
+from .sbox_metrics import analyze_sbox
+
+# Bit ke-i dari setiap nilai byte: shape (256, 8)
+_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little").astype(np.int64)
+# XOR pasangan bit output (i, j) setiap nilai byte: shape (256, 28)
+_PAIR_BITS = np.stack([_BITS[:, i] ^ _BITS[:, j] for i, j in sbox_numpy.BIT_PAIRS], axis=1)
+# (-1)^(a.x): shape (256, 256), simetris
+_SIGNS = (1 - 2 * (sbox_numpy.POPCOUNT[np.arange(256)[:, None] & np.arange(256)[None, :]] & 1)).astype(np.int16)
+_INPUT_BITS = 1 << np.arange(8)
+_NONZERO = np.arange(1, 256)
+_COORDINATE_MASKS = 1 << np.arange(8)
+_BIC_MASKS = np.array([(1 << i) | (1 << j) for i, j in sbox_numpy.BIT_PAIRS])
+# Interval pengecekan `cancel` selama menunggu segmen selesai
+_CANCEL_POLL_SECONDS = 0.5
+
+# Term objective (semua diminimalkan). du & lap memakai tie-breaker jumlah entri maksimum
+# agar pencarian tetap punya gradien saat nilai maksimumnya belum bisa turun.
+OBJECTIVE_TERMS = ("du", "lap", "nl", "bic_nl", "sac", "bic")
+DEFAULT_OBJECTIVE = "du=1,lap=32,sac=10"
+
+
+def parse_objective(spec: str) -> Dict[str, float]:
+    """'du=1,lap=32' -> {term: bobot}."""
+    weights: Dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OBJECTIVE_TERMS:
+            raise ValueError(f"term objective tidak dikenal: {name} (pilihan: {', '.join(OBJECTIVE_TERMS)})")
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"bobot tidak valid untuk {name}: {weight}")
+    if not weights:
+        raise ValueError("objective kosong")
+    return weights
+
+
+def validate_schedule(t_start: float, t_end: float) -> None:
+    """t_start = 0 -> hill climbing (t_end diabaikan); selain itu wajib 0 < t_end <= t_start."""
+    if t_start < 0:
+        raise ValueError("t_start tidak boleh negatif")
+    if t_start > 0 and not 0 < t_end <= t_start:
+        # t_end = 0 membuat rasio pendinginan 0: annealing diam-diam berubah jadi hill climbing
+        raise ValueError("t_end harus > 0 dan <= t_start (pakai t_start=0 untuk hill climbing)")
+
+
+class SBoxState:
+    """
+    S-Box beserta DDT, spektrum Walsh semua fungsi komponen dan hitungan SAC/BIC-SAC
+    yang diperbarui inkremental saat dua entri ditukar (tanpa analyze_sbox ulang).
+
+    Menukar S[u] dan S[v] hanya mengubah pasangan {u, u^a} dan {v, v^a} di setiap baris
+    DDT (O(256)), dan di spektrum Walsh hanya suku x = u, v: update rank-1 pada baris
+    b dengan b.S(u) != b.S(v) dan kolom a dengan a.u != a.v.
+    """
+
+    def __init__(self, sbox: Sequence[int]):
+        if not validate_sbox([int(v) for v in sbox]):
+            raise ValueError("S-Box tidak valid (harus permutasi 0..255).")
+        self.sbox = np.array(sbox, dtype=np.int64)
+        # int16 cukup (|nilai| <= 256) dan memangkas bandwidth memori setiap update
+        self.ddt = sbox_numpy.difference_distribution_table(self.sbox).astype(np.int16)
+        # walsh[b, a] = sum_x (-1)^(b.S(x) + a.x) = 2 * LAT[a, b]
+        self.walsh = sbox_numpy.walsh_spectra(
+            sbox_numpy.component_truth_tables(self.sbox, np.arange(256))
+        ).astype(np.int16)
+        self.sac, bic = sbox_numpy.avalanche_counts(self.sbox)
+        self.bic = bic.T.copy()  # (8 input, 28 pasangan), sejajar dengan sac
+
+    def swap(self, u: int, v: int) -> None:
+        """Tukar S[u] dan S[v] lalu perbarui semua tabel (swap yang sama membatalkannya)."""
+        s = self.sbox
+        su, sv = int(s[u]), int(s[v])
+        ua, va = u ^ _NONZERO, v ^ _NONZERO
+        old_u, old_v = su ^ s[ua], sv ^ s[va]
+        s[u], s[v] = sv, su
+        new_u, new_v = sv ^ s[ua], su ^ s[va]
+
+        # DDT: setiap pasangan terhitung dua kali (x dan x ^ a). Di baris a = u ^ v pasangannya
+        # {u, v} sendiri sehingga selisihnya tetap; indeks tiap operasi unik (satu sel per baris).
+        self.ddt[_NONZERO, old_u] -= 2
+        self.ddt[_NONZERO, old_v] -= 2
+        self.ddt[_NONZERO, new_u] += 2
+        self.ddt[_NONZERO, new_v] += 2
+
+        # SAC/BIC: baris DDT a = 1 << i, dengan bobot bit beda output
+        rows = _INPUT_BITS - 1
+        for part_old, part_new in ((old_u[rows], new_u[rows]), (old_v[rows], new_v[rows])):
+            self.sac += 2 * (_BITS[part_new] - _BITS[part_old])
+            self.bic += 2 * (_PAIR_BITS[part_new] - _PAIR_BITS[part_old])
+
+        # Walsh: update rank-1, nol di luar baris b.S(u) != b.S(v) dan kolom a.u != a.v
+        # delta[b, a] = ((-1)^(b.S'(u)) - (-1)^(b.S(u))) * ((-1)^(a.u) - (-1)^(a.v))
+        self.walsh += np.multiply.outer(_SIGNS[sv] - _SIGNS[su], _SIGNS[u] - _SIGNS[v])
+
+    @staticmethod
+    def _top(table: np.ndarray) -> tuple[int, int]:
+        """(nilai maksimum, jumlah entri bernilai maksimum)."""
+        value = table.max()
+        return int(value), int(np.count_nonzero(table == value))
+
+    def terms(self, names: Sequence[str] = OBJECTIVE_TERMS) -> Dict[str, float]:
+        """Nilai term objective (hanya yang diminta, agar langkah annealing tetap murah)."""
+        return {name: getattr(self, f"_term_{name}")() for name in names}
+
+    def _term_du(self) -> float:
+        du, count = self._top(self.ddt[1:])
+        return du + count / 65536.0
+
+    def _term_lap(self) -> float:
+        # Baris b = 0 (fungsi konstan) tidak dihitung; max |W| / 256 = lap_max_bias
+        max_walsh, count = self._top(np.abs(self.walsh[1:]))
+        return (max_walsh + 4.0 * count / 65536.0) / 256.0
+
+    def _term_nl(self) -> float:
+        return -float(128 - np.abs(self.walsh[_COORDINATE_MASKS]).max() // 2)
+
+    def _term_bic_nl(self) -> float:
+        return -float(128 - np.abs(self.walsh[_BIC_MASKS]).max() // 2)
+
+    def _term_sac(self) -> float:
+        return float(np.abs(self.sac / 256.0 - 0.5).mean())
+
+    def _term_bic(self) -> float:
+        return float(np.abs(self.bic / 256.0 - 0.5).mean())
+
+    def score(self, weights: Dict[str, float]) -> float:
+        terms = self.terms(tuple(weights))
+        return float(sum(weight * terms[name] for name, weight in weights.items()))
+
+
+def anneal_segment(
+    sbox: Sequence[int],
+    weights: Dict[str, float],
+    steps: int,
+    step_offset: int,
+    total_steps: int,
+    t_start: float,
+    t_end: float,
+    rng_state: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Jalankan `steps` langkah simulated annealing (t_start = 0 -> hill climbing) dari sbox.
+    Temperatur turun eksponensial dari t_start ke t_end sepanjang total_steps; segmen
+    dilanjutkan dengan sbox + rng_state yang dikembalikan.
+    """
+    rng = np.random.default_rng()
+    rng.bit_generator.state = rng_state
+    state = SBoxState(sbox)
+    current = state.score(weights)
+    best, best_sbox = current, state.sbox.copy()
+    accepted = 0
+    pairs = rng.integers(0, 256, size=(steps, 2))
+    draws = rng.random(steps)
+    ratio = t_end / t_start if t_start > 0 else 0.0
+    for k in range(steps):
+        u, v = int(pairs[k, 0]), int(pairs[k, 1])
+        if u == v:
+            continue
+        state.swap(u, v)
+        candidate = state.score(weights)
+        delta = candidate - current
+        if t_start > 0:
+            temperature = t_start * ratio ** ((step_offset + k) / max(1, total_steps))
+        else:
+            temperature = 0.0
+        if delta <= 0 or (temperature > 0 and draws[k] < math.exp(-delta / temperature)):
+            current = candidate
+            accepted += 1
+            if current < best:
+                best, best_sbox = current, state.sbox.copy()
+        else:
+            state.swap(u, v)
+    return {
+        "sbox": state.sbox.tolist(),
+        "score": current,
+        "best_sbox": best_sbox.tolist(),
+        "best_score": best,
+        "accepted": accepted,
+        "rng_state": rng.bit_generator.state,
+    }
+
+
+def _ignore_sigint() -> None:
+    # Ctrl-C di terminal dikirim ke seluruh process group: penghentian diatur proses induk lewat cancel
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _start_sbox(start: Sequence[int] | None, rng: np.random.Generator) -> List[int]:
+    if start is None:
+        return rng.permutation(256).tolist()
+    return list(start)
+
+
+def optimize(
+    weights: Dict[str, float],
+    start: Sequence[int] | None = None,
+    chains: int = 4,
+    steps: int = 20000,
+    segment_steps: int = 2000,
+    t_start: float = 0.5,
+    t_end: float = 0.005,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Jalankan `chains` rantai annealing independen di process pool dan yield event:
+    `progress` ({chain, step, steps, score, best_score}) setiap segmen selesai, `candidate`
+    ({chain, step, score, sbox, metrics}) setiap kali skor terbaik global membaik (metrics =
+    analyze_sbox(full=True)), lalu satu `done` ({best_score, sbox, metrics}).
+    start=None -> setiap rantai mulai dari permutasi acak. Setelah cancel di-set, segmen yang
+    belum berjalan dibatalkan, segmen yang sedang berjalan ditunggu, lalu `done` tetap dikirim
+    dengan S-Box terbaik sejauh ini.
+    """
+    if chains < 1 or steps < 1 or segment_steps < 1:
+        raise ValueError("chains, steps dan segment_steps harus >= 1")
+    validate_schedule(t_start, t_end)
+    seeds = np.random.SeedSequence(seed).spawn(chains)
+    generators = [np.random.default_rng(s) for s in seeds]
+    sboxes = [_start_sbox(start, g) for g in generators]
+    progress = [0] * chains
+    best_score = math.inf
+    best_sbox: Optional[List[int]] = None
+    workers = min(chains, workers or multiprocessing.cpu_count())
+
+    def submit(pool, i: int, rng_state):
+        n = min(segment_steps, steps - progress[i])
+        return pool.submit(
+            anneal_segment, sboxes[i], weights, n, progress[i], steps, t_start, t_end, rng_state
+        ), n
+
+    def cancelled() -> bool:
+        return cancel is not None and cancel.is_set()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_ignore_sigint
+    ) as pool:
+        pending = {}
+        for i in range(chains):
+            future, n = submit(pool, i, generators[i].bit_generator.state)
+            pending[future] = (i, n)
+        try:
+            while pending:
+                timeout = _CANCEL_POLL_SECONDS if cancel is not None else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, n = pending.pop(future)
+                    result = future.result()
+                    progress[i] += n
+                    sboxes[i] = result["sbox"]
+                    yield {
+                        "event": "progress",
+                        "chain": i,
+                        "step": progress[i],
+                        "steps": steps,
+                        "score": round(result["score"], 6),
+                        "best_score": round(min(best_score, result["best_score"]), 6),
+                        "accepted": result["accepted"],
+                    }
+                    if result["best_score"] < best_score:
+                        best_score, best_sbox = result["best_score"], result["best_sbox"]
+                        yield {
+                            "event": "candidate",
+                            "chain": i,
+                            "step": progress[i],
+                            "score": round(best_score, 6),
+                            "sbox": best_sbox,
+                            "terms": SBoxState(best_sbox).terms(tuple(weights)),
+                            "metrics": analyze_sbox(best_sbox, full=True),
+                        }
+                    if progress[i] < steps and not cancelled():
+                        future, n = submit(pool, i, result["rng_state"])
+                        pending[future] = (i, n)
+                if cancelled():
+                    for future in [f for f in pending if f.cancel()]:
+                        del pending[future]
+        finally:
+            for future in pending:
+                future.cancel()
+    yield {
+        "event": "done",
+        "best_score": round(best_score, 6),
+        "sbox": best_sbox,
+        "metrics": analyze_sbox(best_sbox, full=True) if best_sbox is not None else None,
+    }
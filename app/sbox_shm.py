@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import config
+from .sbox_metrics import analyze_sbox
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa flock, cache lintas proses dinonaktifkan
+    fcntl = None
+
+# Layout segmen: header | metrik JSON (analyze_sbox full=True). Invers/DDT/LAT tidak
+# dipublikasikan: tidak ada pembacanya, dan prepare_cipher menurunkan invers sendiri (murah).
+_MAGIC = b"AESSBOX1"
+_HEADER = struct.Struct("<8sII")  # magic, versi format, panjang JSON metrik
+_HEADER_SIZE = 64
+_METRICS_OFF = _HEADER_SIZE
+_FORMAT_VERSION = 2
+# Batas metrik yang disimpan per proses (dict hasil parse JSON, bukan mapping segmen)
+_LOCAL_MAX_ENTRIES = 256
+# Hit lokal tidak mengambil flock; last_used-nya dicatat dan ditulis ke index paling sering sekali per interval ini
+_TOUCH_FLUSH_SECONDS = 5.0
+
+
+def sbox_digest(sbox) -> str:
+    return hashlib.sha256(bytes(bytearray(sbox))).hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # Python < 3.13 mendaftarkan setiap segmen (juga yang hanya di-attach) ke resource_tracker,
+    # yang akan meng-unlink segmen saat proses ini keluar walau worker lain masih memakainya.
+    # Siklus hidup segmen diatur sendiri lewat refcount di index.
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+@dataclass(frozen=True)
+class SharedSBoxMetrics:
+    """Metrik satu S-Box yang dibaca dari segmen shared memory."""
+    digest: str
+    size: int  # ukuran segmen (byte)
+    metrics: Dict[str, Any]
+
+
+class SharedSBoxCache:
+    """
+    Cache metrik S-Box (analyze_sbox full=True) di multiprocessing.shared_memory, dipakai
+    bersama oleh semua worker uvicorn: dihitung sekali, worker lain cukup mem-parse JSON-nya. Nama segmen diturunkan dari digest S-Box;
+    index JSON (dikunci flock) mencatat ukuran, waktu pakai terakhir dan PID yang
+    memakainya (refcount). Segmen di-unlink saat proses terakhir melepasnya, saat
+    diusir karena batas ukuran (LRU), atau saat semua pemiliknya sudah mati.
+    """
+
+    def __init__(self, prefix: str, max_bytes: int, index_dir: Optional[str] = None):
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        base = index_dir or tempfile.gettempdir()
+        self.index_path = os.path.join(base, f"{prefix}_index.json")
+        self.lock_path = self.index_path + ".lock"
+        # Metrik yang sudah dibaca proses ini (LRU)
+        self._local: OrderedDict[str, SharedSBoxMetrics] = OrderedDict()
+        self._local_lock = threading.Lock()
+        self.max_local = _LOCAL_MAX_ENTRIES
+        self._touched: Dict[str, float] = {}  # digest -> last_used yang belum ditulis ke index
+        self._flushed_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return fcntl is not None and self.max_bytes > 0
+
+    def segment_name(self, digest: str) -> str:
+        return f"{self.prefix}_{digest[:24]}"
+
+    @contextmanager
+    def _index(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Baca-ubah-tulis index di bawah flock eksklusif."""
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.index_path, "r", encoding="utf-8") as f:
+                        index = json.load(f)
+                except (OSError, ValueError):
+                    index = {}
+                self._prune_dead(index)
+                self._apply_touched(index)
+                yield index
+                tmp_path = self.index_path + f".{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self.index_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _unlink(self, digest: str) -> None:
+        try:
+            shm = shared_memory.SharedMemory(name=self.segment_name(digest))
+        except FileNotFoundError:
+            return
+        # Tanpa _untrack: unlink() sendiri yang membatalkan registrasi resource_tracker
+        shm.close()
+        shm.unlink()
+
+    def _prune_dead(self, index: Dict[str, Dict[str, Any]]) -> None:
+        # Worker yang crash tidak sempat detach: buang PID mati, unlink segmen yatim
+        for digest in list(index):
+            entry = index[digest]
+            entry["refs"] = [pid for pid in entry["refs"] if _pid_alive(pid)]
+            if not entry["refs"]:
+                self._unlink(digest)
+                del index[digest]
+
+    def _attach(self, digest: str) -> Optional[SharedSBoxMetrics]:
+        """Baca metrik dari segmen lalu tutup mapping-nya (tidak menahan fd per S-Box)."""
+        try:
+            shm = shared_memory.SharedMemory(name=self.segment_name(digest))
+        except FileNotFoundError:
+            return None
+        _untrack(shm)
+        try:
+            magic, version, metrics_len = _HEADER.unpack_from(shm.buf, 0)
+            if magic != _MAGIC or version != _FORMAT_VERSION:
+                return None
+            raw = bytes(shm.buf[_METRICS_OFF:_METRICS_OFF + metrics_len])
+            return SharedSBoxMetrics(digest=digest, size=shm.size, metrics=json.loads(raw.decode("utf-8")))
+        finally:
+            shm.close()
+
+    def _create(self, digest: str, metrics_json: bytes) -> Optional[SharedSBoxMetrics]:
+        size = _METRICS_OFF + len(metrics_json)
+        try:
+            shm = shared_memory.SharedMemory(name=self.segment_name(digest), create=True, size=size)
+        except FileExistsError:
+            # Segmen tanpa entri index (sisa proses lain): ganti dengan yang baru
+            self._unlink(digest)
+            shm = shared_memory.SharedMemory(name=self.segment_name(digest), create=True, size=size)
+        _untrack(shm)
+        shm.buf[_METRICS_OFF:size] = metrics_json
+        # Header ditulis terakhir: segmen baru dianggap valid setelah isinya lengkap
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, _FORMAT_VERSION, len(metrics_json))
+        shm.close()
+        return self._attach(digest)
+
+    def _evict_for(self, index: Dict[str, Dict[str, Any]], size: int) -> bool:
+        total = sum(entry["size"] for entry in index.values())
+        for digest in sorted(index, key=lambda d: index[d]["last_used"]):
+            if total + size <= self.max_bytes:
+                break
+            total -= index[digest]["size"]
+            self._unlink(digest)
+            del index[digest]
+            self._drop_local(digest)
+        return total + size <= self.max_bytes
+
+    def _use(self, entry: Dict[str, Any]) -> None:
+        entry["last_used"] = time.time()
+        if os.getpid() not in entry["refs"]:
+            entry["refs"].append(os.getpid())
+
+    def _apply_touched(self, index: Dict[str, Dict[str, Any]]) -> None:
+        with self._local_lock:
+            touched, self._touched = self._touched, {}
+            self._flushed_at = time.monotonic()
+        for digest, used in touched.items():
+            entry = index.get(digest)
+            if entry is not None:
+                entry["last_used"] = max(entry["last_used"], used)
+
+    def _lookup(self, digest: str) -> Optional[SharedSBoxMetrics]:
+        """Metrik lokal atau baca dari segmen yang sudah dipublikasikan; None jika belum ada."""
+        with self._local_lock:
+            local = self._local.get(digest)
+            if local is not None:
+                # Metrik per digest tidak pernah berubah: hit lokal dilayani tanpa flock/index,
+                # walau segmennya sudah diusir worker lain
+                self._touched[digest] = time.time()
+                flush = time.monotonic() - self._flushed_at >= _TOUCH_FLUSH_SECONDS
+        if local is not None:
+            if flush:
+                with self._index():
+                    pass  # _index menulis last_used yang tertunda
+            return local
+        with self._index() as index:
+            entry = index.get(digest)
+            shared = self._attach(digest) if entry is not None else None
+            if shared is not None:
+                self._use(entry)
+        return shared
+
+    def get_or_create(self, sbox: List[int]) -> Optional[SharedSBoxMetrics]:
+        """Metrik S-Box yang sudah dipublikasikan worker lain, atau hitung + publikasikan."""
+        if not self.enabled:
+            return None
+        digest = sbox_digest(sbox)
+        shared = self._lookup(digest)
+        if shared is None:
+            # analyze_sbox(full=True) mahal: hitung tanpa flock agar worker lain tidak ikut menunggu
+            metrics_json = json.dumps(analyze_sbox(sbox, full=True)).encode("utf-8")
+            size = _METRICS_OFF + len(metrics_json)
+            if size > self.max_bytes:
+                return None
+            with self._index() as index:
+                entry = index.get(digest)
+                # Kalah balapan: worker lain sudah mempublikasikan S-Box yang sama selama kita menghitung
+                shared = self._attach(digest) if entry is not None else None
+                if shared is None:
+                    index.pop(digest, None)
+                    if not self._evict_for(index, size):
+                        return None
+                    shared = self._create(digest, metrics_json)
+                    if shared is None:
+                        return None
+                    entry = index[digest] = {"size": shared.size, "refs": []}
+                self._use(entry)
+        self._remember(digest, shared)
+        return shared
+
+    def _remember(self, digest: str, shared: SharedSBoxMetrics) -> None:
+        with self._local_lock:
+            self._local[digest] = shared
+            self._local.move_to_end(digest)
+            stale = list(self._local)[:-self.max_local]
+        if stale:
+            with self._index() as index:
+                for old in stale:
+                    self._release(index, old)
+
+    def _release(self, index: Dict[str, Dict[str, Any]], digest: str) -> None:
+        """Buang metrik lokal + referensi proses ini; segmen tanpa referensi lain di-unlink."""
+        self._drop_local(digest)
+        entry = index.get(digest)
+        if entry is None:
+            return
+        entry["refs"] = [p for p in entry["refs"] if p != os.getpid()]
+        if not entry["refs"]:
+            self._unlink(digest)
+            del index[digest]
+
+    def _drop_local(self, digest: str) -> None:
+        with self._local_lock:
+            self._local.pop(digest, None)
+
+    def close(self) -> None:
+        """Lepas semua segmen milik proses ini; segmen tanpa referensi lain di-unlink."""
+        if not self.enabled:
+            return
+        with self._local_lock:
+            digests = list(self._local)
+        if not digests:
+            return
+        with self._index() as index:
+            for digest in digests:
+                self._release(index, digest)
+
+
+cache = SharedSBoxCache(config.SBOX_SHM_PREFIX, config.SBOX_SHM_MAX_BYTES)
@@ -48,10 +48,54 @@ class SBoxMetricsResponse(BaseModel):
     ci_min: int
 
 
+class SBoxAvalancheDetail(BaseModel):
+    sac_matrix: List[List[float]]  # [bit input][bit output]
+    sac_avg: float
+    sac_min: float
+    sac_max: float
+    sac_deviation: float
+    bic_sac_matrix: List[List[float]]  # [pasangan bit output][bit input]
+    bic_sac_pairs: List[List[int]]
+    bic_sac_score: float
+    bic_sac_min: float
+    bic_sac_max: float
+
+
+class SBoxComponentDetail(BaseModel):
+    count: int
+    ad_min: int
+    ad_max: int
+    ci_min: int
+    ci_max: int
+    nl_min: int
+    nl_max: int
+    abs_indicator_min: int
+    abs_indicator_max: int
+    sos_indicator_min: int
+    sos_indicator_max: int
+
+
+class SBoxMetricsFullResponse(SBoxMetricsResponse):
+    avalanche: SBoxAvalancheDetail
+    components: SBoxComponentDetail
+
+
 class SBoxGenerateResponse(BaseModel):
     sbox: List[int]
     metrics: SBoxMetricsResponse
     affine_matrix: List[List[int]]
+    poly: int = 0x11B
+
+
+class SBoxOptimizeRequest(BaseModel):
+    objective: str = Field("du=1,lap=32,sac=10", description="bobot term: du, lap, nl, bic_nl, sac, bic")
+    start: str = Field("random", description="random, standard, sbox44, atau custom (pakai field sbox)")
+    sbox: Optional[List[int]] = Field(None, description="S-Box awal untuk start=custom")
+    chains: int = Field(2, ge=1, description="jumlah rantai annealing independen (paralel)")
+    steps: int = Field(10000, ge=1, description="langkah (swap) per rantai")
+    t_start: float = Field(0.5, ge=0, description="temperatur awal (0 = hill climbing)")
+    t_end: float = Field(0.005, ge=0, description="temperatur akhir (0 < t_end <= t_start)")
+    seed: int = 0
 
 
 class SBoxUploadResponse(BaseModel):
@@ -100,10 +144,21 @@ class ImageEncryptResponse(BaseModel):
     npr: float
     uaci: float
     npcr: float
+    original_correlation: Dict[str, float]
+    encrypted_correlation: Dict[str, float]
+    correlation_samples: int
+    original_chi_square: Dict[str, float]
+    encrypted_chi_square: Dict[str, float]
+    original_chi_square_passed: Dict[str, bool] = {}
+    encrypted_chi_square_passed: Dict[str, bool] = {}
     original_histogram: Dict[str, List[int]]
     encrypted_histogram: Dict[str, List[int]]
     used_mode: str
     image_size: Dict[str, int]
+    padding: str = "pkcs7"
+    pixel_mode: str = "RGB"
+    source_mode: Optional[str] = None  # mode PIL gambar asli sebelum konversi ke pixel_mode
+    lossy_conversion: bool = False     # True: dekripsi tidak mengembalikan piksel asli
 
 class ImageDecryptRequest(BaseModel):
     mode: str = Field(..., description="standard, sbox44, atau custom")
@@ -114,3 +169,69 @@ class ImageDecryptRequest(BaseModel):
 class ImageDecryptResponse(BaseModel):
     decrypted_image_base64: str
     used_mode: str
+
+
+class BatchEncryptRequest(BaseModel):
+    mode: str = Field(..., description="standard, sbox44, atau custom")
+    key_hex: str = Field(..., description="kunci input (teks bebas atau 32 char hex)")
+    plaintexts: List[str] = Field(..., description="daftar plaintext, masing-masing di-encode UTF-8")
+    sbox: Optional[List[int]] = Field(
+        None,
+        description="list 256 angka 0-255 untuk custom S-Box (wajib kalau mode=custom)",
+    )
+    engine: Optional[str] = Field(None, description="paksa engine cipher (default: pilihan auto-tune server)")
+
+
+class BatchEncryptItem(BaseModel):
+    ciphertext_hex: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchEncryptResponse(BaseModel):
+    results: List[BatchEncryptItem]
+    used_mode: str
+    count: int
+
+
+class BatchDecryptRequest(BaseModel):
+    mode: str = Field(..., description="standard, sbox44, atau custom")
+    key_hex: str = Field(..., description="kunci input (teks bebas atau 32 char hex)")
+    ciphertexts_hex: List[str] = Field(..., description="daftar ciphertext dalam hex")
+    sbox: Optional[List[int]] = Field(
+        None,
+        description="list 256 angka 0-255 untuk custom S-Box (wajib kalau mode=custom)",
+    )
+    engine: Optional[str] = Field(None, description="paksa engine cipher (default: pilihan auto-tune server)")
+
+
+class BatchDecryptItem(BaseModel):
+    plaintext: Optional[str] = None
+    plaintext_hex: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchDecryptResponse(BaseModel):
+    results: List[BatchDecryptItem]
+    used_mode: str
+    count: int
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    kind: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    progress_done: int
+    progress_total: int
+    progress_percent: float
+    error: Optional[str] = None
+    result_meta: Optional[Dict[str, Any]] = None
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
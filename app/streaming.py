@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+# Jeda minimum antar event progress, agar gambar dengan banyak strip tidak membanjiri koneksi
+PROGRESS_INTERVAL_SECONDS = 0.1
+# Interval pengecekan client disconnect / keep-alive saat tidak ada progress baru
+POLL_SECONDS = 1.0
+
+
+class StreamCancelled(Exception):
+    """Dilempar dari callback progress saat client SSE sudah memutus koneksi."""
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+async def _emitted_events(
+    request: Request,
+    produce: Callable[[Callable[[str, Dict[str, Any]], None]], None],
+    errors: Tuple[Tuple[type, int], ...],
+    on_close: Optional[Callable[[], None]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = cancelled or threading.Event()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        # Dipanggil dari thread worker untuk setiap event
+        if cancelled.is_set():
+            raise StreamCancelled()
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    task = asyncio.ensure_future(run_in_threadpool(produce, emit))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            finished, _ = await asyncio.wait({getter, task}, timeout=POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if getter in finished:
+                yield sse_event(*getter.result())
+                continue
+            getter.cancel()
+            if task in finished:
+                break
+            if await request.is_disconnected():
+                return
+            yield b": keep-alive\n\n"
+        while not queue.empty():
+            yield sse_event(*queue.get_nowait())
+        try:
+            task.result()
+        except Exception as exc:
+            for exc_type, status_code in errors:
+                if isinstance(exc, exc_type):
+                    yield sse_event("error", {"status_code": status_code, "detail": str(exc)})
+                    return
+            raise
+    finally:
+        # Client putus (generator ditutup/di-cancel): emit berikutnya melempar StreamCancelled
+        cancelled.set()
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        if on_close is not None:
+            on_close()
+
+
+def events_response(
+    request: Request,
+    produce: Callable[[Callable[[str, Dict[str, Any]], None]], None],
+    errors: Tuple[Tuple[type, int], ...] = (),
+    on_close: Optional[Callable[[], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> StreamingResponse:
+    """
+    Jalankan produce(emit) di threadpool dan stream setiap emit(nama_event, data) sebagai
+    Server-Sent Events; exception di `errors` dikirim sebagai event `error` ({status_code, detail}).
+    Setelah client putus, emit berikutnya melempar StreamCancelled dan `cancel` (jika diberikan)
+    di-set, agar produce yang sedang menunggu bisa berhenti lebih awal.
+    on_close (idempoten) dipanggil di event loop saat stream selesai atau client putus.
+    """
+
+    async def close() -> None:
+        # Cadangan bila generator tidak sempat berjalan (client putus sebelum body dikirim)
+        on_close()
+
+    return StreamingResponse(
+        _emitted_events(request, produce, errors, on_close, cancel),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(close) if on_close is not None else None,
+    )
+
+
+def progress_response(
+    request: Request,
+    work: Callable[[Callable[[int, int], None]], Any],
+    to_result: Callable[[Any], Dict[str, Any]],
+    errors: Tuple[Tuple[type, int], ...] = (),
+    on_close: Optional[Callable[[], None]] = None,
+) -> StreamingResponse:
+    """
+    events_response untuk work(progress) yang melaporkan progress per strip: event `progress`
+    ({stage, done, total, percent}, dibatasi PROGRESS_INTERVAL_SECONDS) selama proses, lalu
+    satu `result` (to_result(hasil work)) atau `error`.
+    """
+    cancelled = threading.Event()
+
+    def produce(emit: Callable[[str, Dict[str, Any]], None]) -> None:
+        last_sent = [0.0, -1]  # waktu event terakhir, persen terakhir
+
+        def progress(done: int, total: int) -> None:
+            # Dipanggil setiap strip selesai; juga saat event di-throttle, agar batal tetap cepat
+            if cancelled.is_set():
+                raise StreamCancelled()
+            percent = int(done * 100 / total) if total else 100
+            now = time.monotonic()
+            if done < total and (now - last_sent[0] < PROGRESS_INTERVAL_SECONDS or percent == last_sent[1]):
+                return
+            last_sent[0], last_sent[1] = now, percent
+            emit("progress", {"stage": "aes" if done < total else "finalize", "done": done, "total": total, "percent": percent})
+
+        emit("progress", {"stage": "decode", "done": 0, "total": 0, "percent": 0})
+        emit("result", to_result(work(progress)))
+
+    return events_response(request, produce, errors, on_close, cancelled)
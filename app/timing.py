@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Bucket histogram (detik) untuk durasi per stage, mirip default Prometheus
+DURATION_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Timing per request: list (stage, durasi detik). Di-set oleh middleware.
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Registry metrik sederhana (histogram + counter) dengan output format Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage_hist: Dict[Tuple[str, str], _Histogram] = {}
+        self._request_hist: Dict[Tuple[str, str], _Histogram] = {}
+        self._bytes: Dict[Tuple[str, str], int] = {}
+        self._modes: Dict[Tuple[str, str], int] = {}
+        self._cache: Dict[Tuple[str, str], int] = {}
+        self._admission: Dict[Tuple[str, str], int] = {}
+
+    def observe_stage(self, endpoint: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stage_hist.setdefault((endpoint, stage), _Histogram(DURATION_BUCKETS))
+            hist.observe(seconds)
+
+    def observe_request(self, endpoint: str, status: int, seconds: float) -> None:
+        with self._lock:
+            hist = self._request_hist.setdefault((endpoint, str(status)), _Histogram(DURATION_BUCKETS))
+            hist.observe(seconds)
+
+    def add_bytes(self, endpoint: str, direction: str, n: int) -> None:
+        with self._lock:
+            key = (endpoint, direction)
+            self._bytes[key] = self._bytes.get(key, 0) + n
+
+    def count_mode(self, endpoint: str, mode: str) -> None:
+        with self._lock:
+            key = (endpoint, mode)
+            self._modes[key] = self._modes.get(key, 0) + 1
+
+    def count_cache(self, cache: str, hit: bool) -> None:
+        with self._lock:
+            key = (cache, "hit" if hit else "miss")
+            self._cache[key] = self._cache.get(key, 0) + 1
+
+    def count_admission(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            key = (endpoint, outcome)
+            self._admission[key] = self._admission.get(key, 0) + 1
+
+    def cache_hit_ratio(self, cache: str) -> float:
+        with self._lock:
+            hits = self._cache.get((cache, "hit"), 0)
+            misses = self._cache.get((cache, "miss"), 0)
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            self._render_histograms(
+                lines,
+                "aes_stage_duration_seconds",
+                "Durasi per stage pemrosesan",
+                ("endpoint", "stage"),
+                self._stage_hist,
+            )
+            self._render_histograms(
+                lines,
+                "aes_request_duration_seconds",
+                "Durasi total request",
+                ("endpoint", "status"),
+                self._request_hist,
+            )
+            self._render_counter(
+                lines,
+                "aes_bytes_processed_total",
+                "Jumlah byte yang diproses",
+                ("endpoint", "direction"),
+                self._bytes,
+            )
+            self._render_counter(
+                lines,
+                "aes_sbox_mode_total",
+                "Jumlah request per mode S-Box",
+                ("endpoint", "mode"),
+                self._modes,
+            )
+            self._render_counter(
+                lines,
+                "aes_cache_requests_total",
+                "Jumlah lookup cache (hit/miss)",
+                ("cache", "result"),
+                self._cache,
+            )
+            self._render_counter(
+                lines,
+                "aes_admission_total",
+                "Keputusan admission control (admitted/queued/rejected)",
+                ("endpoint", "outcome"),
+                self._admission,
+            )
+            caches = sorted({cache for cache, _ in self._cache})
+            lines.append("# HELP aes_cache_hit_ratio Rasio hit cache")
+            lines.append("# TYPE aes_cache_hit_ratio gauge")
+            for cache in caches:
+                hits = self._cache.get((cache, "hit"), 0)
+                total = hits + self._cache.get((cache, "miss"), 0)
+                ratio = hits / total if total else 0.0
+                lines.append(f'aes_cache_hit_ratio{{cache="{cache}"}} {ratio:.6f}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+        return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+    def _render_histograms(self, lines, name, help_text, label_names, data) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key in sorted(data):
+            hist = data[key]
+            labels = self._labels(label_names, key)
+            for upper, count in zip(hist.buckets, hist.counts):
+                lines.append(f'{name}_bucket{{{labels},le="{upper}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.total}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {hist.total}")
+
+    def _render_counter(self, lines, name, help_text, label_names, data) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key in sorted(data):
+            lines.append(f"{name}{{{self._labels(label_names, key)}}} {data[key]}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+# Endpoint aktif untuk request saat ini (dipakai sebagai label stage)
+_current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="-")
+
+
+def begin_request(endpoint: str) -> List[Tuple[str, float]]:
+    """Mulai pencatatan timing untuk satu request; return list timing-nya."""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    _current_endpoint.set(endpoint)
+    return timings
+
+
+def current_endpoint() -> str:
+    return _current_endpoint.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Ukur durasi satu stage dan catat ke request aktif + histogram global."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+        registry.observe_stage(_current_endpoint.get(), name, elapsed)
+
+
+def add_bytes(direction: str, n: int) -> None:
+    registry.add_bytes(_current_endpoint.get(), direction, n)
+
+
+def count_mode(mode: str) -> None:
+    registry.count_mode(_current_endpoint.get(), mode)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format list timing menjadi nilai header Server-Timing (durasi dalam ms)."""
+    merged: Dict[str, float] = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{_token(name)};dur={seconds * 1000:.2f}" for name, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _token(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Union
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.formparsers import MultiPartParser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+
+# Slack untuk overhead multipart (boundary, field form lain) di atas ukuran file
+_MULTIPART_SLACK = 1024 * 1024
+
+UploadSource = Union[bytes, mmap.mmap]
+
+
+def request_body_limit(path: str) -> int | None:
+    """Batas Content-Length per endpoint; None = tidak dibatasi di level request."""
+    if path.startswith("/image/") and path.endswith("/batch"):
+        return config.IMAGE_BATCH_MAX_BYTES + _MULTIPART_SLACK
+    if path.startswith("/image/"):
+        return config.MAX_UPLOAD_BYTES + _MULTIPART_SLACK
+    if path.startswith("/data/"):
+        return config.DATA_MAX_BYTES
+    if path == "/sbox/upload":
+        return config.SBOX_UPLOAD_MAX_BYTES + _MULTIPART_SLACK
+    return None
+
+
+class BodyLimitMiddleware:
+    """
+    Batasi ukuran body per endpoint (request_body_limit). Content-Length yang melebihi batas
+    ditolak sebelum body dibaca; body tanpa Content-Length (chunked) dihitung per chunk yang
+    benar-benar diterima, dan HTTP 413 dilempar begitu batas terlewati, sebelum parser
+    multipart sempat men-spool sisanya ke disk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = request_body_limit(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        detail = f"Request melebihi batas {limit} byte"
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+            return
+        received = 0
+
+        async def counted_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if received > limit:
+                # Sudah ditolak; pembacaan berikutnya (mis. deteksi disconnect) diteruskan apa adanya
+                return message
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, counted_receive, send)
+
+
+def upload_size(upload: UploadFile) -> int:
+    # UploadFile.size = jumlah byte yang benar-benar ditulis parser multipart saat spooling
+    if upload.size is not None:
+        return upload.size
+    f = upload.file
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+
+async def read_upload(upload: UploadFile, max_bytes: int) -> UploadSource:
+    """
+    Ambil isi upload tanpa menyalin file besar ke RAM.
+
+    Starlette sudah men-spool upload > MultiPartParser.max_file_size (1 MiB) ke temp file;
+    file seperti itu di-mmap (read-only) sehingga halaman dibaca dari page cache sesuai
+    kebutuhan. Upload kecil yang masih di memori dibaca biasa.
+    """
+    size = upload_size(upload)
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File melebihi batas {max_bytes} byte",
+        )
+    if size == 0:
+        return b""
+    if size > MultiPartParser.max_file_size:
+        return mmap.mmap(upload.file.fileno(), 0, access=mmap.ACCESS_READ)
+    return await upload.read()
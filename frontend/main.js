@@ -826,6 +826,62 @@ function toggleImageSBox(selectEl, wrapperEl) {
     }
 }
 
+// POST form ke endpoint SSE (/image/*/stream): panggil onProgress untuk setiap event
+// progress, kembalikan data event result, atau lempar Error untuk event error / HTTP error
+async function postImageStream(path, formData, onProgress) {
+    const res = await fetch(`${API_BASE}${path}`, {
+        method: 'POST',
+        body: formData,
+    });
+
+    if (!res.ok) {
+        const errText = await res.text();
+        let err;
+        try {
+            err = JSON.parse(errText);
+        } catch (e) {
+            err = { detail: errText };
+        }
+        throw new Error(err.detail || `HTTP ${res.status}: ${errText}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of raw.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            if (!data) continue; // komentar keep-alive
+            const payload = JSON.parse(data);
+            if (event === 'progress') {
+                onProgress(payload);
+            } else if (event === 'result') {
+                return payload;
+            } else if (event === 'error') {
+                throw new Error(payload.detail || `HTTP ${payload.status_code}`);
+            }
+        }
+    }
+    throw new Error('Koneksi terputus sebelum hasil diterima');
+}
+
+function progressLabel(prefix, progress) {
+    if (progress.stage === 'decode') return `${prefix}...`;
+    if (progress.stage === 'finalize') return `${prefix}... 100% (menyusun PNG)`;
+    return `${prefix}... ${progress.percent}%`;
+}
+
 async function handleImageEncrypt() {
     const imgErrorMsg = document.getElementById('img_error_msg');
     clearError(imgErrorMsg);
@@ -858,7 +914,7 @@ async function handleImageEncrypt() {
     encryptBtn.innerHTML = `
         <div class="flex items-center justify-center space-x-3">
             <div class="animate-spin rounded-full h-5 w-5 border-2 border-white border-t-transparent"></div>
-            <span>Processing...</span>
+            <span id="img_encrypt_progress">Processing...</span>
         </div>
     `;
     
@@ -879,32 +935,16 @@ async function handleImageEncrypt() {
     formData.append('mode', mode);
     formData.append('key_hex', keyHex);
     formData.append('file', file);
+    formData.append('padding', document.getElementById('img_padding').value);
     if (sboxJson) {
         formData.append('sbox_json', sboxJson);
     }
     
     try {
-        const res = await fetch(`${API_BASE}/image/encrypt`, {
-            method: 'POST',
-            body: formData,
+        const progressEl = document.getElementById('img_encrypt_progress');
+        const data = await postImageStream('/image/encrypt/stream', formData, (progress) => {
+            if (progressEl) progressEl.textContent = progressLabel('Encrypting', progress);
         });
-        
-        console.log('Response status:', res.status);
-        console.log('Response ok:', res.ok);
-        
-        if (!res.ok) {
-            const errText = await res.text();
-            console.error('Error response:', errText);
-            let err;
-            try {
-                err = JSON.parse(errText);
-            } catch (e) {
-                err = { detail: errText };
-            }
-            throw new Error(err.detail || `HTTP ${res.status}: ${errText}`);
-        }
-        
-        const data = await res.json();
         console.log('Success response:', data);
         currentEncryptedImageBase64 = data.encrypted_image_base64;
         currentImageMetrics = data;
@@ -1001,32 +1041,16 @@ async function handleImageDecrypt() {
       decryptBtn.innerHTML = `
       <div class="flex items-center justify-center space-x-3">
         <div class="animate-spin rounded-full h-5 w-5 border-2 border-white border-t-transparent"></div>
-        <span>Processing...</span>
+        <span id="img_decrypt_progress">Processing...</span>
       </div>`;
     }
 
     try {
-        const res = await fetch(`${API_BASE}/image/decrypt`, {
-            method: 'POST',
-            body: formData,
+        const progressEl = document.getElementById('img_decrypt_progress');
+        const data = await postImageStream('/image/decrypt/stream', formData, (progress) => {
+            if (progressEl) progressEl.textContent = progressLabel('Decrypting', progress);
         });
         
-        console.log('Decrypt response status:', res.status);
-        
-        if (!res.ok) {
-            const errText = await res.text();
-            console.error('Decrypt error:', errText);
-            let err;
-            try {
-                err = JSON.parse(errText);
-            } catch (e) {
-                err = { detail: errText };
-            }
-            throw new Error(err.detail || `HTTP ${res.status}`);
-        }
-        
-        const data = await res.json();
-        
         // Show results
         if (decResults) decResults.classList.remove('hidden');
         
@@ -1048,46 +1072,44 @@ async function handleImageDecrypt() {
     }
 }
 
-function renderHistogramOriginal(data) {
-    const ctx = document.getElementById('histogram_original');
-    if (!ctx) return;
-    if (histogramChartOriginal) histogramChartOriginal.destroy();
-    
-    const labels = Array.from({length: 256}, (_, i) => i.toString());
-    histogramChartOriginal = new Chart(ctx, {
-        type: 'bar',
-        data: {
-            labels: labels,
-            datasets: [
-                { label: 'R', data: data.R || data.r, backgroundColor: 'rgba(255, 0, 0, 0.5)' },
-                { label: 'G', data: data.G || data.g, backgroundColor: 'rgba(0, 255, 0, 0.5)' },
-                { label: 'B', data: data.B || data.b, backgroundColor: 'rgba(0, 0, 255, 0.5)' }
-            ]
-        },
-        options: { responsive: true, maintainAspectRatio: false, scales: { x: {display:false}, y: {display:false} } }
+// Warna dataset histogram per kanal native (L/LA untuk grayscale, A = alpha)
+const HISTOGRAM_COLORS = {
+    R: [255, 0, 0],
+    G: [0, 255, 0],
+    B: [0, 0, 255],
+    L: [128, 128, 128],
+    A: [160, 0, 200],
+};
+
+function histogramDatasets(data, lighten) {
+    return Object.keys(data || {}).map((channel) => {
+        const [r, g, b] = (HISTOGRAM_COLORS[channel.toUpperCase()] || [0, 0, 0])
+            .map((c) => Math.min(255, c + lighten));
+        return { label: channel, data: data[channel], backgroundColor: `rgba(${r}, ${g}, ${b}, 0.5)` };
     });
 }
 
-function renderHistogramEncrypted(data) {
-    const ctx = document.getElementById('histogram_encrypted');
-    if (!ctx) return;
-    if (histogramChartEncrypted) histogramChartEncrypted.destroy();
-    
+function renderHistogram(canvasId, chart, data, lighten) {
+    const ctx = document.getElementById(canvasId);
+    if (!ctx) return chart;
+    if (chart) chart.destroy();
+
     const labels = Array.from({length: 256}, (_, i) => i.toString());
-    histogramChartEncrypted = new Chart(ctx, {
+    return new Chart(ctx, {
         type: 'bar',
-        data: {
-            labels: labels,
-            datasets: [
-                { label: 'R', data: data.R || data.r, backgroundColor: 'rgba(255, 100, 100, 0.5)' },
-                { label: 'G', data: data.G || data.g, backgroundColor: 'rgba(100, 255, 100, 0.5)' },
-                { label: 'B', data: data.B || data.b, backgroundColor: 'rgba(100, 100, 255, 0.5)' }
-            ]
-        },
+        data: { labels: labels, datasets: histogramDatasets(data, lighten) },
         options: { responsive: true, maintainAspectRatio: false, scales: { x: {display:false}, y: {display:false} } }
     });
 }
 
+function renderHistogramOriginal(data) {
+    histogramChartOriginal = renderHistogram('histogram_original', histogramChartOriginal, data, 0);
+}
+
+function renderHistogramEncrypted(data) {
+    histogramChartEncrypted = renderHistogram('histogram_encrypted', histogramChartEncrypted, data, 100);
+}
+
 document.addEventListener("DOMContentLoaded", () => {
     // ... (Event listeners dari kode asli Anda) ...
     // Image encryption